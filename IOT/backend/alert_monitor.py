@@ -1,8 +1,19 @@
-import mysql.connector
+import numpy as np
 import time
 import logging
+import queue
+import argparse
+import json
+import os
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, Optional, Any, Tuple, List
+
+from sensor_state import SensorStateStore, TYPE_CODES, READING_TYPES, STATS_WARMUP
+from batch_eval import VALUE_RANGES, load_page, validate_page
+from alert_rules import RuleLoader, RULES_FILE
+from signal_window import SignalWindow
+import db_pool
+from db_pool import ConnectionPool, DB_ERRORS, POOL_SIZE
 
 # ========== LOGGING SETUP ==========
 logging.basicConfig(
@@ -15,116 +26,241 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ========== DATABASE CONFIG ==========
-DB_CONFIG = {
-    'host': 'srv1758.hstgr.io',
-    'user': 'u149795069_user',
-    'password': 'Smartestplant123',
-    'database': 'u149795069_smartplant',
-    'autocommit': True,
-    'connection_timeout': 10,
-    'charset': 'utf8mb4'
-}
-
 # ========== MONITOR SETTINGS ==========
 SCAN_INTERVAL = 5  # seconds
 DEBOUNCE_MINUTES = 2
+ABNORMAL_DEBOUNCE_MINUTES = 10  # Per (sensor, abnormal_sensor) cooldown
+DEDUP_WINDOW_MINUTES = 30  # Identical alerts (same sensor, observation, type, description) are dropped
+MAX_PENDING_ALERTS = 10000  # Alerts kept for retry while the database is unavailable
 MAX_MEMORY_AGE_HOURS = 24  # Clean up readings older than 24 hours
-MAX_RECONNECT_ATTEMPTS = 3
-RECONNECT_DELAY = 5  # seconds
+DB_STATS_LOG_SECONDS = 300  # How often per-query latency statistics are logged
+FETCH_PAGE_SIZE = 5000  # Max readings fetched per query
+BATCH_EVAL_MIN_ROWS = 256  # Pages at least this large are validated/evaluated with NumPy
+INITIAL_LOOKBACK_MINUTES = 10  # History replayed when no watermark is stored
+WATERMARK_FILE = 'alert_monitor.watermark'
+SNAPSHOT_FILE = 'alert_monitor.snapshot.npz'  # Sensor state + alert debounce state for warm restarts
+SNAPSHOT_INTERVAL_SECONDS = 60
+
+# ========== STREAM SETTINGS ==========
+STREAM_QUEUE_SIZE = 10000  # Max readings buffered between MQTT thread and evaluator
+SENSOR_MAP_REFRESH_SECONDS = 60  # Min interval between IoTSensors reloads on unknown sensor
 
 # Store last readings in memory for delta calculations
-last_readings: Dict[int, Dict[str, Any]] = {}  # {sensor_id: {'value': x, 'time': t, 'type': type, 'obs_id': id}}
-last_alert_time: Dict[tuple, datetime] = {}  # {(observation_id, alert_type): timestamp}
-last_fetch_time: Optional[datetime] = None  # Track last successful data fetch
-conn: Optional[mysql.connector.MySQLConnection] = None  # Global database connection
+sensor_state = SensorStateStore()  # Latest value/delta per sensor, indexed by observation
+signal_window = SignalWindow()  # Suspicious signals per observation within the composite time window
+last_alert_time: Dict[tuple, datetime] = {}  # {(observation_id, 'poaching_alert') or (sensor_id, 'abnormal_sensor'): timestamp}
+recent_alerts: Dict[tuple, datetime] = {}  # {(sensor_id, observation_id, alert_type, description): timestamp} dedup window
+pending_alerts: List[tuple] = []  # Alerts queued this cycle, written by flush_alerts()
+last_reading_id: Optional[int] = None  # High-water mark of processed SensorReadings.reading_id
+db: Optional[ConnectionPool] = None  # Pooled database access shared by fetch and alert inserts
+sensor_observations: Dict[int, int] = {}  # {sensor_id: observation_id} for stream mode
+sensor_map_loaded_at: Optional[datetime] = None
+sqlite_path: Optional[str] = None  # When set, connect to a sqlite_standin database instead of MySQL
+rule_loader = RuleLoader(RULES_FILE)  # Detection rules, hot-reloaded when the rules file changes
+clock: Callable[[], datetime] = datetime.now  # Time used for debounce/dedup/cleanup (virtual time in replays)
 
 
-def connect_db() -> Optional[mysql.connector.MySQLConnection]:
-    """Establish database connection with retry logic and error handling."""
-    for attempt in range(MAX_RECONNECT_ATTEMPTS):
-        try:
-            conn = mysql.connector.connect(**DB_CONFIG)
-            if conn.is_connected():
-                logger.info(f"Database connected successfully (attempt {attempt + 1})")
-                return conn
-        except mysql.connector.Error as e:
-            logger.error(f"Database connection attempt {attempt + 1} failed: {e}")
-            if attempt < MAX_RECONNECT_ATTEMPTS - 1:
-                logger.info(f"Retrying in {RECONNECT_DELAY} seconds...")
-                time.sleep(RECONNECT_DELAY)
-        except Exception as e:
-            logger.error(f"Unexpected error during database connection: {e}")
-            break
-    
-    logger.critical("Failed to establish database connection after all attempts")
-    return None
+def use_rules_file(path: str):
+    """Load detection rules from a different rules file (see alert_rules.py)."""
+    global rule_loader
+    rule_loader = RuleLoader(path)
+
+
+def use_sqlite(path: str):
+    """Point the monitor at a local SQLite stand-in database (testing / offline runs)."""
+    global sqlite_path
+    sqlite_path = path
+
+
+def connect_db(pool_size: int = POOL_SIZE) -> Optional[ConnectionPool]:
+    """Create the connection pool for the configured database (see db_pool.connect_db)."""
+    return db_pool.connect_db(sqlite_path, pool_size)
 
 
 def ensure_connection() -> bool:
-    """Ensure database connection is alive, reconnect if necessary."""
-    global conn
+    """
+    Ensure the database is reachable, recreating the pool if necessary.
+    The pool only pings on its health-check timer, so this is cheap to call every loop.
+    """
+    global db
     
-    if conn is None or not conn.is_connected():
+    if db is None or not db.check_health():
         logger.warning("Database connection lost, attempting to reconnect...")
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-        conn = connect_db()
-        return conn is not None
+        if db:
+            db.close()
+        db = connect_db()
+        return db is not None
+    return True
+
+
+def load_watermark() -> Optional[int]:
+    """Load the persisted reading_id watermark, if any."""
+    try:
+        with open(WATERMARK_FILE) as f:
+            return int(json.load(f)['last_reading_id'])
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Ignoring corrupt watermark file {WATERMARK_FILE}: {e}")
+        return None
+
+
+def save_watermark():
+    """Persist the reading_id watermark atomically so restarts resume where we stopped."""
+    if last_reading_id is None:
+        return
+    try:
+        tmp_path = WATERMARK_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_reading_id': last_reading_id, 'saved_at': datetime.now().isoformat()}, f)
+        os.replace(tmp_path, WATERMARK_FILE)
+    except OSError as e:
+        logger.error(f"Failed to persist watermark: {e}")
+
+
+def initial_watermark(db: ConnectionPool) -> int:
+    """Start just before the first reading of the lookback window (or at the table end)."""
+    first_id = db.query('initial_watermark', "SELECT MIN(reading_id) FROM SensorReadings WHERE reading_time > %s",
+                        (datetime.now() - timedelta(minutes=INITIAL_LOOKBACK_MINUTES),))[0][0]
+    if first_id is None:
+        last_id = db.query('max_reading_id', "SELECT MAX(reading_id) FROM SensorReadings")[0][0]
+        return last_id or 0
+    return first_id - 1
+
+
+def save_snapshot():
+    """
+    Persist sensor state, debounce/dedup state and pending alerts atomically.
+    Only call at a consistent point, i.e. right after save_watermark().
+    """
+    meta = {
+        'last_reading_id': last_reading_id,
+        'reading_types': READING_TYPES,
+        'saved_at': datetime.now().timestamp(),
+        'last_alert_time': [[list(key), t.timestamp()] for key, t in last_alert_time.items()],
+        'recent_alerts': [[list(key), t.timestamp()] for key, t in recent_alerts.items()],
+        'pending_alerts': [list(alert) for alert in pending_alerts],
+        'signal_clock': signal_window.clock,
+        'signals': signal_window.to_list(),
+    }
+    try:
+        tmp_path = SNAPSHOT_FILE + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **sensor_state.to_arrays())
+        os.replace(tmp_path, SNAPSHOT_FILE)
+        logger.debug(f"State snapshot saved ({len(sensor_state)} sensors, watermark {last_reading_id})")
+    except OSError as e:
+        logger.error(f"Failed to save state snapshot: {e}")
+
+
+def load_snapshot() -> Optional[int]:
+    """
+    Restore the state saved by save_snapshot(). Returns the snapshot's reading_id
+    watermark, or None if there is no usable snapshot (cold start).
+    """
+    global sensor_state, signal_window, last_alert_time, recent_alerts, pending_alerts
+
+    try:
+        with np.load(SNAPSHOT_FILE, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['reading_types'] != READING_TYPES:
+                logger.warning("Snapshot uses a different reading type layout, ignoring it")
+                return None
+            state = SensorStateStore.from_arrays({name: data[name] for name in data.files if name != 'meta'})
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"Ignoring corrupt snapshot file {SNAPSHOT_FILE}: {e}")
+        return None
+
+    sensor_state = state
+    signal_window = SignalWindow.from_list(meta.get('signals', []), meta.get('signal_clock', float('-inf')))
+    last_alert_time = {tuple(key): datetime.fromtimestamp(t) for key, t in meta['last_alert_time']}
+    recent_alerts = {tuple(key): datetime.fromtimestamp(t) for key, t in meta['recent_alerts']}
+    pending_alerts = [tuple(alert) for alert in meta['pending_alerts']] + pending_alerts
+    cleanup_old_data()  # The snapshot may be hours old
+
+    age = datetime.now().timestamp() - meta['saved_at']
+    logger.info(f"♻️  Restored snapshot: {len(sensor_state)} sensors, {len(last_alert_time)} debounce timers "
+                f"(age {age:.0f}s, watermark {meta['last_reading_id']})")
+    return meta['last_reading_id']
+
+
+def warm_start(db: ConnectionPool) -> bool:
+    """
+    Restore the last snapshot and catch its state up to the persisted watermark.
+    Readings between the two were already evaluated before the restart (their
+    alerts are in the database), so they are folded into state without alerting.
+    """
+    global last_reading_id
+
+    snapshot_id = load_snapshot()
+    if snapshot_id is None:
+        logger.info("No state snapshot with a watermark found, starting cold")
+        return False
+
+    watermark = load_watermark()
+    last_reading_id = snapshot_id
+    if watermark is not None and watermark > snapshot_id:
+        replayed = 0
+        has_more = True
+        while has_more:
+            readings, has_more = fetch_recent_readings(db, until=watermark)
+            fold_readings(readings)
+            replayed += len(readings)
+        logger.info(f"Caught up {replayed} readings between snapshot and watermark {watermark}")
+    last_reading_id = max(last_reading_id, watermark or 0)
     return True
 
 
-def fetch_recent_readings(conn: mysql.connector.MySQLConnection) -> list:
-    """Fetch only new readings since last fetch time with proper validation."""
-    global last_fetch_time
+def fetch_recent_readings(db: ConnectionPool, limit: int = FETCH_PAGE_SIZE,
+                          until: Optional[int] = None) -> Tuple[list, bool]:
+    """
+    Fetch the next page of readings after the reading_id watermark (up to
+    reading_id `until`, if given). Returns (valid_rows, has_more). The watermark
+    advances past every fetched row, valid or not; call save_watermark() once
+    the page has been processed.
+    """
+    global last_reading_id
     
     try:
-        cursor = conn.cursor(dictionary=True)
+        if last_reading_id is None:
+            last_reading_id = load_watermark()
+            if last_reading_id is None:
+                last_reading_id = initial_watermark(db)
+            logger.info(f"Resuming from reading_id {last_reading_id}")
         
-        # If first run, get readings from last 10 minutes
-        if last_fetch_time is None:
-            query = """
-                SELECT r.sensor_id, r.reading_type, r.reading_value, r.reading_time,
-                       s.observation_id
-                FROM SensorReadings r
-                JOIN IoTSensors s ON r.sensor_id = s.sensor_id
-                WHERE r.reading_time > NOW() - INTERVAL 10 MINUTE
-                ORDER BY r.reading_time ASC
-            """
-            cursor.execute(query)
-        else:
-            # Only fetch readings newer than last fetch time
-            query = """
-                SELECT r.sensor_id, r.reading_type, r.reading_value, r.reading_time,
-                       s.observation_id
-                FROM SensorReadings r
-                JOIN IoTSensors s ON r.sensor_id = s.sensor_id
-                WHERE r.reading_time > %s
-                ORDER BY r.reading_time ASC
-            """
-            cursor.execute(query, (last_fetch_time,))
+        rows = db.query('fetch_page', """
+            SELECT r.reading_id, r.sensor_id, r.reading_type, r.reading_value, r.reading_time,
+                   s.observation_id
+            FROM SensorReadings r
+            JOIN IoTSensors s ON r.sensor_id = s.sensor_id
+            WHERE r.reading_id > %s AND r.reading_id <= %s
+            ORDER BY r.reading_id ASC
+            LIMIT %s
+        """, (last_reading_id, until if until is not None else 2**63 - 1, limit), dictionary=True, prepared=True)
         
-        rows = cursor.fetchall()
-        cursor.close()
-        
-        # Update last fetch time to current time
-        last_fetch_time = datetime.now()
+        if rows:
+            last_reading_id = rows[-1]['reading_id']
         
         # Validate and filter readings
-        validated_rows = []
-        for row in rows:
-            if validate_reading(row):
-                validated_rows.append(row)
-            else:
-                logger.warning(f"Invalid reading skipped: {row}")
+        if len(rows) >= BATCH_EVAL_MIN_ROWS:
+            valid = validate_page(load_page(rows))
+            validated_rows = [row for row, ok in zip(rows, valid.tolist()) if ok]
+            if len(validated_rows) < len(rows):
+                logger.warning(f"{len(rows) - len(validated_rows)} invalid readings skipped")
+        else:
+            validated_rows = []
+            for row in rows:
+                if validate_reading(row):
+                    validated_rows.append(row)
+                else:
+                    logger.warning(f"Invalid reading skipped: {row}")
         
-        logger.info(f"Fetched {len(validated_rows)} valid readings")
-        return validated_rows
+        logger.info(f"Fetched {len(validated_rows)} valid readings (watermark {last_reading_id})")
+        return validated_rows, len(rows) == limit
         
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
         logger.error(f"Database error while fetching readings: {e}")
         raise
     except Exception as e:
@@ -148,23 +284,17 @@ def validate_reading(reading: dict) -> bool:
             return False
         
         # Validate reading_type is a valid string
-        valid_types = ['temperature', 'humidity', 'motion', 'soil_moisture', 'sound']
-        if reading['reading_type'] not in valid_types:
+        if reading['reading_type'] not in VALUE_RANGES:
             return False
         
         # Validate reading_value is numeric and within reasonable ranges
         try:
             value = float(reading['reading_value'])
             # Basic range validation
-            if reading['reading_type'] == 'temperature' and not (-50 <= value <= 100):
-                return False
-            elif reading['reading_type'] == 'humidity' and not (0 <= value <= 100):
-                return False
-            elif reading['reading_type'] == 'motion' and value not in [0, 1]:
+            low, high = VALUE_RANGES[reading['reading_type']]
+            if not (low <= value <= high):
                 return False
-            elif reading['reading_type'] == 'soil_moisture' and not (0 <= value <= 100):
-                return False
-            elif reading['reading_type'] == 'sound' and not (0 <= value <= 200):
+            if reading['reading_type'] == 'motion' and value not in [0, 1]:
                 return False
         except (ValueError, TypeError):
             return False
@@ -180,43 +310,72 @@ def validate_reading(reading: dict) -> bool:
         return False
 
 
-def insert_alert(conn: mysql.connector.MySQLConnection, sensor_id: int, observation_id: int, 
-                alert_type: str, description: str, severity: str, score: float) -> bool:
-    """Insert alert into database with proper error handling."""
+def queue_alert(sensor_id: int, observation_id: int, alert_type: str, description: str,
+                severity: str, score: float, debounce_key: tuple, debounce_minutes: float) -> bool:
+    """
+    Queue an alert for the next flush_alerts() unless it is debounced or a
+    duplicate of an alert raised within DEDUP_WINDOW_MINUTES.
+    """
+    time_now = clock()
+
+    last_time = last_alert_time.get(debounce_key)
+    if last_time and (time_now - last_time).total_seconds() <= debounce_minutes * 60:
+        return False
+
+    fingerprint = (sensor_id, observation_id, alert_type, description)
+    last_seen = recent_alerts.get(fingerprint)
+    if last_seen and (time_now - last_seen).total_seconds() <= DEDUP_WINDOW_MINUTES * 60:
+        logger.debug(f"Duplicate alert suppressed: {fingerprint}")
+        return False
+
+    last_alert_time[debounce_key] = time_now
+    recent_alerts[fingerprint] = time_now
+    pending_alerts.append((sensor_id, observation_id, alert_type, description, severity, score))
+    return True
+
+
+def flush_alerts(db: ConnectionPool) -> bool:
+    """
+    Write all queued alerts in one multi-row insert / transaction.
+    On failure the alerts stay queued (up to MAX_PENDING_ALERTS) and are retried next flush.
+    """
+    global pending_alerts
+    
+    if not pending_alerts:
+        return True
+    batch = pending_alerts
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
+        # Not prepared: a plain executemany becomes a single multi-row INSERT
+        db.executemany('insert_alerts', """
             INSERT INTO Alerts (sensor_id, observation_id, alert_type, description, severity, score)
             VALUES (%s, %s, %s, %s, %s, %s)
-        """, (sensor_id, observation_id, alert_type, description, severity, score))
-        conn.commit()
-        cursor.close()
-        logger.info(f"Alert inserted: {alert_type} for sensor {sensor_id} (severity: {severity})")
+        """, batch)
+        pending_alerts = []
+        for sensor_id, _, alert_type, _, severity, _ in batch:
+            logger.info(f"Alert inserted: {alert_type} for sensor {sensor_id} (severity: {severity})")
         return True
-    except mysql.connector.Error as e:
-        logger.error(f"Database error while inserting alert: {e}")
-        return False
+    except DB_ERRORS as e:
+        logger.error(f"Database error while inserting {len(batch)} alerts: {e}")
     except Exception as e:
-        logger.error(f"Unexpected error while inserting alert: {e}")
-        return False
+        logger.error(f"Unexpected error while inserting {len(batch)} alerts: {e}")
+    
+    if len(pending_alerts) > MAX_PENDING_ALERTS:
+        dropped = len(pending_alerts) - MAX_PENDING_ALERTS
+        pending_alerts = pending_alerts[dropped:]
+        logger.error(f"Pending alert buffer full, dropped {dropped} oldest alerts")
+    return False
 
 
 def cleanup_old_data():
     """Clean up old readings and alert times from memory to prevent memory leaks."""
-    global last_readings, last_alert_time
+    global last_alert_time
     
     try:
-        current_time = datetime.now()
+        current_time = clock()
         cutoff_time = current_time - timedelta(hours=MAX_MEMORY_AGE_HOURS)
         
-        # Clean up old readings
-        sensors_to_remove = []
-        for sensor_id, reading_data in last_readings.items():
-            if reading_data.get('time', current_time) < cutoff_time:
-                sensors_to_remove.append(sensor_id)
-        
-        for sensor_id in sensors_to_remove:
-            del last_readings[sensor_id]
+        # Clean up old readings (vectorized over the state arrays)
+        readings_removed = sensor_state.remove_older_than(cutoff_time.timestamp())
         
         # Clean up old alert times
         alerts_to_remove = []
@@ -227,102 +386,161 @@ def cleanup_old_data():
         for key in alerts_to_remove:
             del last_alert_time[key]
         
-        if sensors_to_remove or alerts_to_remove:
-            logger.info(f"Memory cleanup: removed {len(sensors_to_remove)} old readings and {len(alerts_to_remove)} old alert times")
+        # Expire the dedup window
+        dedup_cutoff = current_time - timedelta(minutes=DEDUP_WINDOW_MINUTES)
+        for fingerprint in [k for k, t in recent_alerts.items() if t < dedup_cutoff]:
+            del recent_alerts[fingerprint]
+        
+        if readings_removed or alerts_to_remove:
+            logger.info(f"Memory cleanup: removed {readings_removed} old readings and {len(alerts_to_remove)} old alert times")
             
     except Exception as e:
         logger.error(f"Error during memory cleanup: {e}")
 
 
-def compute_composite_alert(conn, observation_id: int) -> bool:
-    """
-    Check recent sensor deltas in the same observation group and determine if
-    poaching_alert should be triggered with proper error handling.
-    """
-    try:
-        # Collect relevant sensors
-        group = [v for v in last_readings.values() if v['obs_id'] == observation_id]
-        if not group:
-            logger.debug(f"No readings found for observation {observation_id}")
-            return False
+def describe_signal(rtype: str, delta: float) -> str:
+    """Human readable description of a suspicious signal for the composite alert."""
+    if rtype == "motion":
+        return "Motion detected"
+    elif rtype == "sound":
+        return f"Sound spike (Δ{delta:.1f}dB)"
+    elif rtype == "temperature":
+        return f"Temperature rise (Δ{delta:.1f}°C)"
+    elif rtype == "humidity":
+        return f"Humidity fluctuation (Δ{delta:.1f}%)"
+    return f"Soil change (Δ{delta:.1f}%)"
+
+
+def trigger_abnormal_alert(sensor_id: int, observation_id: int, rtype: str,
+                           delta: float, zscore: float, samples: int, severity: str = "medium") -> bool:
+    """Queue an abnormal_sensor alert, debounced per sensor."""
+    if samples > STATS_WARMUP:
+        description = f"Abnormal {rtype} fluctuation detected (Δ={delta:.2f}, z={zscore:.1f})"
+        score = min(0.5 + max(delta / 100, abs(zscore) / 20), 1.0)
+    else:
+        description = f"Abnormal {rtype} fluctuation detected (Δ={delta:.2f})"
+        score = min(0.5 + delta / 100, 1.0)
+    if queue_alert(sensor_id, observation_id, "abnormal_sensor", description, severity, score,
+                   (sensor_id, "abnormal_sensor"), ABNORMAL_DEBOUNCE_MINUTES):
+        logger.info(f"Abnormal sensor alert triggered for sensor {sensor_id}")
+        return True
+    return False
 
-        suspicious_signals = []
-        description_parts = []
 
-        for s in group:
-            try:
-                rtype, delta = s['type'], s.get('delta', 0)
-                value = s.get('value', 0)
-                sensor_id = s.get('sid')
+def trigger_composite_alert(observation_id: int, representative_sensor: int,
+                            description_parts: List[str], severity: str) -> bool:
+    """Queue a poaching_alert for an observation with enough suspicious signals, debounced per observation."""
+    try:
+        # Confidence score grows with the number of confirming signals
+        count = len(description_parts)
+        score = min(0.5 + 0.1 * count, 1.0)
+        desc = ", ".join(description_parts)
+
+        if queue_alert(representative_sensor, observation_id, "poaching_alert",
+                       f"Possible poaching activity detected ({desc})", severity, score,
+                       (observation_id, "poaching_alert"), DEBOUNCE_MINUTES):
+            logger.info(f"Composite poaching alert triggered for observation {observation_id} - {desc}")
+            return True
+        return False
                 
-                if not sensor_id:
-                    logger.warning(f"Missing sensor_id in reading: {s}")
-                    continue
-
-                # Abnormal individual sensor (for sensor health monitoring)
-                if delta > 5 * abs(value) * 0.01 and delta > 8:
-                    if insert_alert(conn, sensor_id, observation_id, "abnormal_sensor",
-                                   f"Abnormal {rtype} fluctuation detected (Δ={delta:.2f})",
-                                   "medium", min(0.5 + delta / 100, 1.0)):
-                        logger.info(f"Abnormal sensor alert triggered for sensor {sensor_id}")
-
-                # Evaluate anomaly per sensor for composite logic
-                if rtype == "motion" and value == 1:
-                    suspicious_signals.append("motion")
-                    description_parts.append("Motion detected")
-
-                elif rtype == "sound" and delta > 20:
-                    suspicious_signals.append("sound_spike")
-                    description_parts.append(f"Sound spike (Δ{delta:.1f}dB)")
-
-                elif rtype == "temperature" and delta > 3:
-                    suspicious_signals.append("temp_rise")
-                    description_parts.append(f"Temperature rise (Δ{delta:.1f}°C)")
-
-                elif rtype == "humidity" and delta > 10:
-                    suspicious_signals.append("humidity_drop")
-                    description_parts.append(f"Humidity fluctuation (Δ{delta:.1f}%)")
-
-                elif rtype == "soil_moisture" and delta > 12:
-                    suspicious_signals.append("soil_disturbance")
-                    description_parts.append(f"Soil change (Δ{delta:.1f}%)")
-                    
-            except Exception as e:
-                logger.error(f"Error processing sensor reading {s}: {e}")
-                continue
+    except Exception as e:
+        logger.error(f"Error creating composite alert for observation {observation_id}: {e}")
+        return False
 
-        # === Composite Poaching Detection ===
-        # Confidence and severity based on how many sensors confirm
-        count = len(suspicious_signals)
-        if count >= 2:
-            try:
-                # Compute confidence score and severity
-                score = min(0.5 + 0.1 * count, 1.0)
-                severity = "medium" if count == 2 else "high" if count == 3 else "critical"
-                desc = ", ".join(description_parts)
-
-                key = (observation_id, "poaching_alert")
-                time_now = datetime.now()
-                last_time = last_alert_time.get(key)
-
-                if not last_time or (time_now - last_time).total_seconds() > DEBOUNCE_MINUTES * 60:
-                    # Use the first sensor as representative
-                    representative_sensor = group[0]['sid']
-                    if insert_alert(conn, representative_sensor, observation_id, "poaching_alert",
-                                   f"Possible poaching activity detected ({desc})",
-                                   severity, score):
-                        last_alert_time[key] = time_now
-                        logger.info(f"Composite poaching alert triggered for observation {observation_id} - {desc}")
-                        return True
-                        
-            except Exception as e:
-                logger.error(f"Error creating composite alert for observation {observation_id}: {e}")
-                return False
-        
+
+def check_composite(rules, observation_id: int) -> bool:
+    """Queue a poaching_alert if the observation has enough suspicious signals within its window."""
+    # Confidence and severity based on how many sensors confirm within the window
+    description_parts = signal_window.active(observation_id)
+    count = len(description_parts)
+    if count < rules.min_signals(observation_id):
         return False
-        
+    sensors = sensor_state.observation_sensors.get(observation_id)
+    if not sensors:
+        return False
+    # Use the first sensor as representative
+    return trigger_composite_alert(observation_id, min(sensors), description_parts,
+                                   rules.composite_severity(observation_id, count))
+
+
+def evaluate_reading(rules, observation_id: int, sensor_id: int, rtype: str, delta: float,
+                     zscore: float, samples: int, reading_time: float, abnormal: bool, suspicious: bool):
+    """
+    Act on one reading's rule flags at that reading's point in event time: queue
+    its abnormal_sensor alert, record its suspicious signal and re-check the
+    observation's composite window.
+    """
+    signal_window.advance(reading_time)
+    if abnormal:
+        trigger_abnormal_alert(sensor_id, observation_id, rtype, delta, zscore, samples,
+                               rules.abnormal_severity(observation_id))
+    if suspicious and signal_window.record(observation_id, sensor_id, reading_time,
+                                           rules.window_seconds(observation_id), describe_signal(rtype, delta)):
+        check_composite(rules, observation_id)
+
+
+def evaluate_page(rows: Dict[str, np.ndarray]) -> int:
+    """
+    Evaluate every reading of a stored page (store_batch output), not just each
+    sensor's final state: during backlog catch-up a page spans minutes to hours,
+    and a threshold crossing early in the page must count even if the sensor is
+    calm again by the page's end. Rules are flagged with NumPy for pages of at
+    least BATCH_EVAL_MIN_ROWS and with the compiled scalar checks otherwise; only
+    flagged rows drop into Python. Returns the number of alerts queued.
+    """
+    count = len(rows['sensor_id'])
+    if count == 0:
+        return 0
+    queued = len(pending_alerts)
+    rules = rule_loader.rules()
+    obs, type_code, value = rows['observation_id'], rows['type_code'], rows['value']
+    delta, zscore, samples, times = rows['delta'], rows['zscore'], rows['samples'], rows['time']
+
+    if count >= BATCH_EVAL_MIN_ROWS:
+        abnormal, suspicious = rules.flag(obs, type_code, value, delta, zscore, samples)
+    else:
+        abnormal = np.zeros(count, dtype=bool)
+        suspicious = np.zeros(count, dtype=bool)
+        for i, (o, t, v, d, z, n) in enumerate(zip(obs.tolist(), type_code.tolist(), value.tolist(),
+                                                   delta.tolist(), zscore.tolist(), samples.tolist())):
+            abnormal[i] = rules.is_abnormal(o, READING_TYPES[t], v, d, z, n)
+            suspicious[i] = rules.is_suspicious(o, READING_TYPES[t], v, d, z, n)
+
+    # Flagged rows in arrival order, so the signal window sees them in event time
+    for i in np.flatnonzero(abnormal | suspicious).tolist():
+        try:
+            evaluate_reading(rules, int(obs[i]), int(rows['sensor_id'][i]), READING_TYPES[type_code[i]],
+                             float(delta[i]), float(zscore[i]), int(samples[i]), float(times[i]),
+                             bool(abnormal[i]), bool(suspicious[i]))
+        except Exception as e:
+            logger.error(f"Error evaluating reading of sensor {rows['sensor_id'][i]}: {e}")
+
+    signal_window.advance(float(times.max()))
+    # Signals from earlier pages can still complete (or re-raise, once debounced) a composite
+    for oid in np.unique(obs).tolist():
+        check_composite(rules, oid)
+    return len(pending_alerts) - queued
+
+
+def evaluate_stored_reading(sensor_id: int) -> bool:
+    """
+    Evaluate the reading check_and_store() just applied for sensor_id, and only
+    that reading: the other sensors of the observation are judged when they
+    report, so a sensor's stale delta never re-raises an alert. Returns True if
+    an alert was queued.
+    """
+    try:
+        s = sensor_state.get(sensor_id)
+        rules = rule_loader.rules()
+        queued = len(pending_alerts)
+        evaluate_reading(rules, s.obs_id, s.sid, s.type, s.delta, s.zscore, s.samples, s.time,
+                         rules.is_abnormal(s.obs_id, s.type, s.value, s.delta, s.zscore, s.samples),
+                         rules.is_suspicious(s.obs_id, s.type, s.value, s.delta, s.zscore, s.samples))
+        # Signals from earlier readings can still complete (or re-raise, once debounced) a composite
+        check_composite(rules, s.obs_id)
+        return len(pending_alerts) > queued
     except Exception as e:
-        logger.error(f"Error in compute_composite_alert for observation {observation_id}: {e}")
+        logger.error(f"Error evaluating reading of sensor {sensor_id}: {e}")
         return False
 
 
@@ -336,19 +554,10 @@ def check_and_store(reading: Dict[str, Any]) -> bool:
         obs_id = reading['observation_id']
         rtype = reading['reading_type']
         val = float(reading['reading_value'])
-        time_now = datetime.now()
-
-        prev = last_readings.get(sid)
-        delta = abs(val - prev['value']) if prev else 0
-
-        last_readings[sid] = {
-            'sid': sid,
-            'obs_id': obs_id,
-            'type': rtype,
-            'value': val,
-            'time': time_now,
-            'delta': delta
-        }
+        reading_time = reading['reading_time'].timestamp()
+
+        sensor_state.update(sid, obs_id, rtype, val, reading_time)
+        signal_window.advance(reading_time)
         return True
         
     except Exception as e:
@@ -356,17 +565,208 @@ def check_and_store(reading: Dict[str, Any]) -> bool:
         return False
 
 
+def store_batch(readings: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Bulk-store a page of validated readings (as returned by fetch_recent_readings)
+    and return its columns, with each row's delta / zscore / samples at the time
+    it was applied (see evaluate_page).
+    """
+    count = len(readings)
+    rows = {
+        'sensor_id': np.fromiter((r['sensor_id'] for r in readings), dtype=np.int64, count=count),
+        'observation_id': np.fromiter((r['observation_id'] for r in readings), dtype=np.int64, count=count),
+        'type_code': np.fromiter((TYPE_CODES[r['reading_type']] for r in readings), dtype=np.int8, count=count),
+        'value': np.fromiter((float(r['reading_value']) for r in readings), dtype=np.float64, count=count),
+        'time': np.fromiter((r['reading_time'].timestamp() for r in readings), dtype=np.float64, count=count),
+    }
+    rows['delta'], rows['zscore'], rows['samples'] = sensor_state.update_batch(
+        rows['sensor_id'], rows['observation_id'].astype(np.int32), rows['type_code'], rows['value'], rows['time'])
+    return rows
+
+
+def fold_readings(readings: List[Dict[str, Any]]):
+    """Fold readings into state without evaluating them (warm-up and catch-up replays)."""
+    rows = store_batch(readings)
+    if readings:
+        signal_window.advance(float(rows['time'].max()))
+
+
+def process_page(db: ConnectionPool, readings: List[Dict[str, Any]]) -> bool:
+    """
+    Store a page of validated readings, evaluate the observations they touched
+    and write the resulting alerts. Returns False if the alerts could not be written.
+    """
+    if readings:
+        logger.debug(f"Processing {len(readings)} new readings")
+        evaluate_page(store_batch(readings))
+    else:
+        logger.debug("No new readings to process")
+    
+    return flush_alerts(db)
+
+
+def load_sensor_observations(db: ConnectionPool) -> bool:
+    """Reload the sensor -> observation mapping used to enrich streamed readings."""
+    global sensor_observations, sensor_map_loaded_at
+    
+    try:
+        rows = db.query('sensor_observations',
+                        "SELECT sensor_id, observation_id FROM IoTSensors WHERE observation_id IS NOT NULL")
+        sensor_observations = {sid: oid for sid, oid in rows}
+        sensor_map_loaded_at = datetime.now()
+        logger.info(f"Loaded observation mapping for {len(sensor_observations)} sensors")
+        return True
+    except DB_ERRORS as e:
+        logger.error(f"Database error while loading sensor mapping: {e}")
+        return False
+
+
+def resolve_observation(db: ConnectionPool, sensor_id: int) -> Optional[int]:
+    """Look up a sensor's observation, reloading the mapping (rate limited) for unknown sensors."""
+    obs_id = sensor_observations.get(sensor_id)
+    if obs_id is None:
+        stale = (sensor_map_loaded_at is None or
+                 (datetime.now() - sensor_map_loaded_at).total_seconds() > SENSOR_MAP_REFRESH_SECONDS)
+        if stale and load_sensor_observations(db):
+            obs_id = sensor_observations.get(sensor_id)
+    return obs_id
+
+
+def process_stream_reading(db: ConnectionPool, reading: Dict[str, Any]) -> bool:
+    """Store and evaluate a single streamed reading immediately."""
+    reading = dict(reading)
+    if reading.get('observation_id') is None:
+        reading['observation_id'] = resolve_observation(db, reading['sensor_id'])
+    if reading['observation_id'] is None:
+        logger.debug(f"Reading from unassigned sensor {reading['sensor_id']} skipped")
+        return False
+    
+    if not check_and_store(reading):
+        logger.warning(f"Invalid reading skipped: {reading}")
+        return False
+    return evaluate_stored_reading(reading['sensor_id'])
+
+
+def start_stream_client(source: str, reading_queue: queue.Queue):
+    """
+    Start an MQTT client feeding readings into reading_queue.
+    'bridge' runs the MQTT-to-MySQL bridge in-process and receives each reading
+    after it is stored; 'mqtt' subscribes alongside the bridge without storing.
+    """
+    import mqtt_to_mysql
+
+    if sqlite_path:
+        mqtt_to_mysql.use_sqlite(sqlite_path)
+
+    def enqueue(reading: Dict[str, Any]):
+        try:
+            reading_queue.put_nowait(reading)
+        except queue.Full:
+            logger.warning(f"Stream queue full, dropping reading: {reading}")
+
+    if source == 'bridge':
+        mqtt_to_mysql.reading_listeners.append(enqueue)
+        client = mqtt_to_mysql.create_client()
+    else:
+        def on_message(client, userdata, msg):
+            try:
+                for sensor_id, reading_type, reading_value in mqtt_to_mysql.parse_payload(msg.payload.decode()):
+                    enqueue({
+                        'sensor_id': sensor_id,
+                        'reading_type': reading_type,
+                        'reading_value': reading_value,
+                        'reading_time': datetime.now()
+                    })
+            except Exception as e:
+                logger.error(f"Error parsing streamed message: {e}")
+
+        client = mqtt_to_mysql.create_client(on_message)
+
+    client.loop_start()
+    return client
+
+
+def run_stream(source: str):
+    """Event-driven monitoring: evaluate readings as they arrive instead of polling."""
+    global db
+    logger.info(f"📡 Starting stream monitoring (source: {source})...")
+    db = connect_db()
+    
+    if not db:
+        logger.error("Failed to establish initial database connection. Exiting.")
+        exit(1)
+    
+    load_snapshot()  # Sensor state and debounce timers only; stream mode has no watermark
+    load_sensor_observations(db)
+    reading_queue: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    client = start_stream_client(source, reading_queue)
+    last_cleanup = time.monotonic()
+    last_snapshot = time.monotonic()
+    last_stats = time.monotonic()
+
+    try:
+        while True:
+            try:
+                reading = reading_queue.get(timeout=1)
+            except queue.Empty:
+                reading = None
+            
+            now = time.monotonic()
+            if not ensure_connection():
+                logger.error("Database connection lost and could not be re-established. Retrying in 30 seconds...")
+                time.sleep(30)
+                continue
+            
+            if reading is not None:
+                try:
+                    process_stream_reading(db, reading)
+                except Exception as e:
+                    logger.error(f"Error processing streamed reading {reading}: {e}")
+            
+            # Batch alert writes across bursts; flush as soon as the queue drains
+            if pending_alerts and reading_queue.empty():
+                flush_alerts(db)
+            
+            if now - last_snapshot >= SNAPSHOT_INTERVAL_SECONDS:
+                save_snapshot()
+                last_snapshot = now
+            
+            if now - last_cleanup >= 3600:
+                cleanup_old_data()
+                last_cleanup = now
+            
+            if now - last_stats >= DB_STATS_LOG_SECONDS:
+                db.log_stats()
+                last_stats = now
+
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Stopping monitor gracefully.")
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        if db:
+            flush_alerts(db)
+            db.log_stats()
+            db.close()
+            logger.info("Database connection closed.")
+        save_snapshot()
+
+
 def main():
-    global conn
+    global db
     logger.info("🔍 Starting composite multi-sensor monitoring...")
-    conn = connect_db()
+    db = connect_db()
     
-    if not conn:
+    if not db:
         logger.error("Failed to establish initial database connection. Exiting.")
         exit(1)
         
+    warm_start(db)
     cleanup_counter = 0
     CLEANUP_INTERVAL = 3600 // SCAN_INTERVAL  # Cleanup every hour
+    last_snapshot = time.monotonic()
+    last_stats = time.monotonic()
+    in_page = False  # True while a fetched page is not fully processed (state not snapshot-safe)
 
     try:
         while True:
@@ -377,27 +777,29 @@ def main():
                 continue
             
             try:
-                readings = fetch_recent_readings(conn)
-                
-                if readings:
-                    logger.debug(f"Processing {len(readings)} new readings")
+                has_more = True
+                while has_more:
+                    in_page = True
+                    readings, has_more = fetch_recent_readings(db)
                     
-                    for r in readings:
-                        check_and_store(r)
-
-                    # Check by observation group
-                    obs_ids = set(v['obs_id'] for v in last_readings.values())
-                    for oid in obs_ids:
-                        if oid:  # Ensure obs_id is not None
-                            compute_composite_alert(conn, oid)
-                else:
-                    logger.debug("No new readings to process")
+                    # Only persist the watermark once this page's alerts are in the database
+                    page_written = process_page(db, readings)
+                    in_page = False
+                    if page_written:
+                        save_watermark()
+                        if time.monotonic() - last_snapshot >= SNAPSHOT_INTERVAL_SECONDS:
+                            save_snapshot()
+                            last_snapshot = time.monotonic()
                 
                 # Periodic memory cleanup
                 cleanup_counter += 1
                 if cleanup_counter >= CLEANUP_INTERVAL:
                     cleanup_old_data()
                     cleanup_counter = 0
+                
+                if time.monotonic() - last_stats >= DB_STATS_LOG_SECONDS:
+                    db.log_stats()
+                    last_stats = time.monotonic()
                     
             except Exception as e:
                 logger.error(f"Error in main monitoring loop: {e}")
@@ -410,10 +812,38 @@ def main():
     except Exception as e:
         logger.error(f"Unexpected error in main loop: {e}")
     finally:
-        if conn and conn.is_connected():
-            conn.close()
+        if db:
+            if flush_alerts(db) and not in_page:
+                save_watermark()
+                save_snapshot()
+            db.log_stats()
+            db.close()
             logger.info("Database connection closed.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Composite multi-sensor alert monitor")
+    parser.add_argument('--stream', choices=['bridge', 'mqtt'],
+                        help="Evaluate readings as they arrive: 'bridge' runs the MQTT-to-MySQL "
+                             "bridge in-process, 'mqtt' subscribes to the broker directly")
+    parser.add_argument('--sqlite', metavar='PATH',
+                        help="Use a local SQLite stand-in database (see sqlite_standin.py) instead of MySQL")
+    parser.add_argument('--rules', metavar='PATH', default=RULES_FILE,
+                        help="Detection rules file, reloaded when it changes (see alert_rules.example.json)")
+    parser.add_argument('--broker', metavar='HOST',
+                        help="Stream mode: MQTT broker to use instead of the configured one (e.g. localhost)")
+    parser.add_argument('--port', type=int, default=1883, help="Port of --broker")
+    parser.add_argument('--no-tls', action='store_true', help="Connect to --broker without TLS")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        use_sqlite(args.sqlite)
+    use_rules_file(args.rules)
+    if args.broker:
+        import mqtt_to_mysql
+        mqtt_to_mysql.use_broker(args.broker, args.port, not args.no_tls)
+
+    if args.stream:
+        run_stream(args.stream)
+    else:
+        main()
@@ -0,0 +1,273 @@
+"""
+Configurable detection rules for alert_monitor.py.
+
+Rules are layered: the built-in DEFAULT_RULES, then the "defaults" section of
+the rules file, then per-observation (site) overrides from its "observations"
+section. Inside a profile, "types" holds per-reading-type parameters, with "*"
+applying to every type.
+
+Each profile is compiled once at load time into
+  - one closure per (profile, reading type) for the scalar path, and
+  - (profile x type) threshold tables for the vectorized path (RuleSet.flag),
+so evaluation never walks the config. RuleLoader re-reads the file when it
+changes, without restarting the monitor. See alert_rules.example.json.
+"""
+
+import copy
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from sensor_state import READING_TYPES, STATS_WARMUP
+
+logger = logging.getLogger(__name__)
+
+# ========== RULE SETTINGS ==========
+RULES_FILE = 'alert_rules.json'
+RULES_RELOAD_SECONDS = 10  # Min interval between rules file modification checks
+
+# Behaviour before this module existed; a rules file only needs to list what it changes.
+# Once a sensor's rolling statistics are warm (> STATS_WARMUP readings), z-scores
+# replace the single previous-value delta: noisy sensors need a proportionally
+# larger jump, and slow drifts away from the rolling mean are caught.
+DEFAULT_RULES: Dict[str, Any] = {
+    'types': {
+        '*': {
+            'abnormal': True,
+            'abnormal_min_delta': 8,  # Abnormal sensor: delta > 8 ...
+            'abnormal_relative_delta': 0.05,  # ... and delta > 5% of the current value
+            'abnormal_zscore': 4.0,  # Abnormal sensor (warm): |z| above this
+            'signal_delta': None,  # Suspicious signal: delta above this (None = never) ...
+            'signal_zscore': 2.0,  # ... and (warm) |z| above this
+            'signal_value': None,  # Suspicious when the value equals this (ignores delta)
+        },
+        'motion': {'abnormal': False, 'signal_value': 1},
+        'sound': {'signal_delta': 20},
+        'temperature': {'signal_delta': 3},
+        'humidity': {'signal_delta': 10},
+        'soil_moisture': {'signal_delta': 12},
+    },
+    'abnormal_severity': 'medium',
+    'composite': {
+        'min_signals': 2,  # Suspicious signals needed for a poaching_alert ...
+        'window_seconds': 300,  # ... within this many seconds of each other
+        'severity': {'2': 'medium', '3': 'high', '4': 'critical'},  # By signal count (highest key <= count)
+    },
+}
+TYPE_PARAMS = set(DEFAULT_RULES['types']['*'])
+SEVERITIES = {'low', 'medium', 'high', 'critical'}
+
+Check = Callable[[float, float, float, int], bool]  # (value, delta, zscore, samples) -> bool
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """Deep-merge override into a copy of base, rejecting keys base doesn't know."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if path.endswith('.types'):
+            if key not in READING_TYPES and key != '*':
+                raise ValueError(f"Unknown reading type '{path}.{key}'")
+            unknown = set(value) - TYPE_PARAMS
+            if unknown:
+                raise ValueError(f"Unknown rule parameter(s) in '{path}.{key}': {sorted(unknown)}")
+            merged[key] = {**merged.get(key, {}), **value}
+            continue
+        if key not in base and not path.endswith('.severity'):
+            raise ValueError(f"Unknown rule key '{path}.{key}'")
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value, f'{path}.{key}')
+        else:
+            merged[key] = value
+    return merged
+
+
+def _type_params(profile: Dict[str, Any], rtype: str) -> Dict[str, Any]:
+    return {**profile['types'].get('*', {}), **profile['types'].get(rtype, {})}
+
+
+def _compile_abnormal(p: Dict[str, Any]) -> Check:
+    if not p['abnormal']:
+        return lambda value, delta, zscore, samples: False
+    min_delta, relative, z_limit = p['abnormal_min_delta'], p['abnormal_relative_delta'], p['abnormal_zscore']
+
+    def check(value, delta, zscore, samples):
+        if samples > STATS_WARMUP:
+            return abs(zscore) > z_limit
+        return delta > relative * abs(value) and delta > min_delta
+    return check
+
+
+def _compile_signal(p: Dict[str, Any]) -> Check:
+    if p['signal_value'] is not None:
+        target = p['signal_value']
+        return lambda value, delta, zscore, samples: value == target
+    if p['signal_delta'] is None:
+        return lambda value, delta, zscore, samples: False
+    delta_limit, z_limit = p['signal_delta'], p['signal_zscore']
+
+    def check(value, delta, zscore, samples):
+        if delta <= delta_limit:
+            return False
+        return samples <= STATS_WARMUP or abs(zscore) > z_limit
+    return check
+
+
+class RuleSet:
+    """Rules compiled for evaluation. Profile 0 is the default; others are observation overrides."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        unknown = set(config) - {'defaults', 'observations'}
+        if unknown:
+            raise ValueError(f"Unknown rules file section(s): {sorted(unknown)}")
+
+        defaults = _merge(DEFAULT_RULES, config.get('defaults', {}), 'defaults')
+        profiles = [defaults]
+        self.profile_of: Dict[int, int] = {}
+        for obs_id, override in config.get('observations', {}).items():
+            self.profile_of[int(obs_id)] = len(profiles)
+            profiles.append(_merge(defaults, override, f'observations.{obs_id}'))
+
+        shape = (len(profiles), len(READING_TYPES))
+        self._abnormal_on = np.zeros(shape, dtype=bool)
+        self._abnormal_min_delta = np.zeros(shape)
+        self._abnormal_relative = np.zeros(shape)
+        self._abnormal_zscore = np.zeros(shape)
+        self._signal_delta = np.full(shape, np.inf)
+        self._signal_zscore = np.zeros(shape)
+        self._signal_value = np.full(shape, np.nan)
+        self._checks = []
+        self._min_signals = []
+        self._window_seconds = []
+        self._severities = []
+        self._abnormal_severity = []
+
+        for index, profile in enumerate(profiles):
+            checks = {}
+            for code, rtype in enumerate(READING_TYPES):
+                p = _type_params(profile, rtype)
+                checks[rtype] = (_compile_abnormal(p), _compile_signal(p))
+                self._abnormal_on[index, code] = bool(p['abnormal'])
+                self._abnormal_min_delta[index, code] = p['abnormal_min_delta']
+                self._abnormal_relative[index, code] = p['abnormal_relative_delta']
+                self._abnormal_zscore[index, code] = p['abnormal_zscore']
+                if p['signal_value'] is not None:
+                    self._signal_value[index, code] = p['signal_value']
+                elif p['signal_delta'] is not None:
+                    self._signal_delta[index, code] = p['signal_delta']
+                self._signal_zscore[index, code] = p['signal_zscore']
+            self._checks.append(checks)
+
+            composite = profile['composite']
+            severities = sorted((int(count), severity) for count, severity in composite['severity'].items())
+            if not severities or any(s not in SEVERITIES for _, s in severities) or \
+                    profile['abnormal_severity'] not in SEVERITIES:
+                raise ValueError(f"Severities must be one of {sorted(SEVERITIES)}")
+            self._min_signals.append(int(composite['min_signals']))
+            self._window_seconds.append(float(composite['window_seconds']))
+            self._severities.append(severities)
+            self._abnormal_severity.append(profile['abnormal_severity'])
+
+    def _profile(self, observation_id: int) -> int:
+        return self.profile_of.get(observation_id, 0)
+
+    def is_abnormal(self, observation_id: int, rtype: str, value: float, delta: float,
+                    zscore: float, samples: int) -> bool:
+        """Scalar abnormal_sensor check (see flag for the vectorized form)."""
+        return self._checks[self._profile(observation_id)][rtype][0](value, delta, zscore, samples)
+
+    def is_suspicious(self, observation_id: int, rtype: str, value: float, delta: float,
+                      zscore: float, samples: int) -> bool:
+        """Scalar composite-signal check (see flag for the vectorized form)."""
+        return self._checks[self._profile(observation_id)][rtype][1](value, delta, zscore, samples)
+
+    def flag(self, obs_id: np.ndarray, type_code: np.ndarray, value: np.ndarray, delta: np.ndarray,
+             zscore: np.ndarray, samples: np.ndarray):
+        """
+        Vectorized is_abnormal / is_suspicious over many sensors.
+        Returns (abnormal, suspicious) boolean masks.
+        """
+        if self.profile_of:
+            unique_obs, inverse = np.unique(obs_id, return_inverse=True)
+            profile = np.array([self._profile(o) for o in unique_obs.tolist()], dtype=np.int64)[inverse]
+        else:
+            profile = np.zeros(len(obs_id), dtype=np.int64)
+        cell = (profile, type_code)
+        warm = samples > STATS_WARMUP
+        abs_z = np.abs(zscore)
+
+        delta_abnormal = ((delta > self._abnormal_relative[cell] * np.abs(value)) &
+                          (delta > self._abnormal_min_delta[cell]))
+        abnormal = self._abnormal_on[cell] & np.where(warm, abs_z > self._abnormal_zscore[cell], delta_abnormal)
+
+        signal_value = self._signal_value[cell]
+        delta_signal = (delta > self._signal_delta[cell]) & (~warm | (abs_z > self._signal_zscore[cell]))
+        suspicious = np.where(np.isnan(signal_value), delta_signal, value == signal_value)
+        return abnormal, suspicious
+
+    def min_signals(self, observation_id: int) -> int:
+        return self._min_signals[self._profile(observation_id)]
+
+    def window_seconds(self, observation_id: int) -> float:
+        return self._window_seconds[self._profile(observation_id)]
+
+    def composite_severity(self, observation_id: int, count: int) -> str:
+        """Severity for a poaching_alert confirmed by `count` signals."""
+        severities = self._severities[self._profile(observation_id)]
+        chosen = severities[0][1]
+        for threshold, severity in severities:
+            if count >= threshold:
+                chosen = severity
+        return chosen
+
+    def abnormal_severity(self, observation_id: int) -> str:
+        return self._abnormal_severity[self._profile(observation_id)]
+
+
+def load_rules(path: str) -> RuleSet:
+    """Compile a rules file; raises ValueError/OSError on a bad file."""
+    with open(path) as f:
+        return RuleSet(json.load(f))
+
+
+class RuleLoader:
+    """Holds the active RuleSet and recompiles it when the rules file changes."""
+
+    def __init__(self, path: str = RULES_FILE):
+        self.path = path
+        self._rules = RuleSet()
+        self._mtime: Optional[float] = None
+        self._checked_at = float('-inf')
+
+    def rules(self) -> RuleSet:
+        now = time.monotonic()
+        if now - self._checked_at >= RULES_RELOAD_SECONDS:
+            self._checked_at = now
+            self.reload()
+        return self._rules
+
+    def reload(self) -> bool:
+        """Recompile if the file changed. A broken file keeps the previous rules active."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._mtime is not None:
+                logger.warning(f"Rules file {self.path} removed, using built-in rules")
+                self._rules, self._mtime = RuleSet(), None
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            rules = load_rules(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid rules file {self.path}, keeping previous rules: {e}")
+            self._mtime = mtime  # Don't retry until the file changes again
+            return False
+        self._rules, self._mtime = rules, mtime
+        logger.info(f"📏 Loaded alert rules from {self.path} ({len(rules.profile_of)} observation overrides)")
+        return True
@@ -0,0 +1,60 @@
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sensor_state import READING_TYPES, TYPE_CODES
+
+# ========== VALIDATION RANGES ==========
+# Shared by the scalar path in alert_monitor.py and the vectorized path below
+# (detection thresholds live in alert_rules.py)
+VALUE_RANGES = {
+    'temperature': (-50, 100),
+    'humidity': (0, 100),
+    'motion': (0, 1),  # additionally restricted to exactly 0 or 1
+    'soil_moisture': (0, 100),
+    'sound': (0, 200),
+}
+
+# Per type-code lookup tables (indexed by sensor_state.TYPE_CODES)
+_MIN_VALUE = np.array([VALUE_RANGES[t][0] for t in READING_TYPES], dtype=np.float64)
+_MAX_VALUE = np.array([VALUE_RANGES[t][1] for t in READING_TYPES], dtype=np.float64)
+_MOTION = TYPE_CODES['motion']
+
+
+def _int_or_zero(value: Any) -> int:
+    # Mirrors validate_reading: only real ints count, anything else fails the > 0 check
+    return value if isinstance(value, int) else 0
+
+
+def _float_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def load_page(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Load a fetched page into column arrays; unparsable fields become sentinels that fail validation."""
+    count = len(rows)
+    return {
+        'sensor_id': np.fromiter((_int_or_zero(r.get('sensor_id')) for r in rows), dtype=np.int64, count=count),
+        'observation_id': np.fromiter((_int_or_zero(r.get('observation_id')) for r in rows), dtype=np.int64, count=count),
+        'type_code': np.fromiter((TYPE_CODES.get(r.get('reading_type'), -1) for r in rows), dtype=np.int8, count=count),
+        'value': np.fromiter((_float_or_nan(r.get('reading_value')) for r in rows), dtype=np.float64, count=count),
+        'has_time': np.fromiter((isinstance(r.get('reading_time'), datetime) for r in rows), dtype=bool, count=count),
+    }
+
+
+def validate_page(page: Dict[str, np.ndarray]) -> np.ndarray:
+    """Vectorized equivalent of alert_monitor.validate_reading; returns a boolean mask of valid rows."""
+    type_code = page['type_code']
+    value = page['value']
+    known_type = type_code >= 0
+    safe_code = np.where(known_type, type_code, 0)
+
+    # NaN compares False, so unparsable values fail the range check like the scalar path
+    in_range = (value >= _MIN_VALUE[safe_code]) & (value <= _MAX_VALUE[safe_code])
+    motion_ok = (type_code != _MOTION) | (value == 0) | (value == 1)
+
+    return ((page['sensor_id'] > 0) & (page['observation_id'] > 0) & known_type &
+            in_range & motion_ok & page['has_time'])
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+End-to-end ingestion-to-alert latency benchmark.
+
+Runs the real pipeline against local stand-ins: a local MQTT broker (e.g.
+mosquitto on localhost:1883) and a SQLite stand-in database (or the MySQL
+databases configured in mqtt_to_mysql.py / alert_monitor.py with --mysql).
+Two pipelines can be measured:
+
+  poll    mqtt_to_mysql.py + alert_monitor.py (watermark polling)
+  stream  alert_monitor.py --stream bridge (bridge in-process, event driven)
+
+For each load level the benchmark publishes synthetic device reports
+({"<id>[<type>]": value}) at the target rate and remembers the publish time of
+every reading. A poller matches new SensorReadings rows back to their publish
+(per sensor and value, in order) and injects poaching scenarios (motion + sound
+spike) on fresh observations, timing when their poaching_alert appears. Each
+level uses its own sensors and observations, so debounce never carries over.
+
+Reported per level: achieved rate, readings lost, p50/p95/p99/max
+publish->insert and publish->alert latency. The JSON report (--json) includes
+the git commit and monitor settings so results can be tracked across releases.
+
+Insert and alert times come from reading_time / created_at on SQLite (sub-
+millisecond), and from the poll time (resolution POLL_INTERVAL) on MySQL,
+whose DATETIME columns only store seconds.
+
+Usage:
+    mosquitto -p 1883 &
+    python3 benchmark_latency.py --rates 50,200,1000 --duration 30
+    python3 benchmark_latency.py --pipeline stream --rates 100,500 --json latency_stream.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+
+import alert_monitor as monitor
+from sensor_state import READING_TYPES
+
+logger = logging.getLogger(__name__)
+
+# ========== BENCHMARK SETTINGS ==========
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MQTT_TOPIC = 'sensors'
+SENSORS_PER_DEVICE = len(READING_TYPES)
+DEVICE_PERIOD = 10.0  # seconds between reports of one device (devices = rate * period / 5)
+FIRST_SENSOR_ID = 200000  # Benchmark sensors, clear of real hardware and fleet_simulator.py
+FIRST_OBSERVATION_ID = 1
+WARMUP_SECONDS = 2 * DEVICE_PERIOD  # Every device reports twice before scenarios start
+POLL_INTERVAL = 0.05  # seconds between SensorReadings / Alerts polls
+DRAIN_SECONDS = 30  # Max wait after a level for outstanding readings and alerts
+STARTUP_SECONDS = 5  # Time given to the bridge / monitor to connect
+BASELINE = {'temperature': 24.0, 'humidity': 60.0, 'motion': 0, 'soil_moisture': 40.0, 'sound': 45.0}
+NOISE = {'temperature': 0.2, 'humidity': 0.8, 'motion': 0, 'soil_moisture': 0.3, 'sound': 2.0}
+SOUND_SPIKE = 40.0
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return round(ordered[min(int(math.ceil(p * len(ordered))) - 1, len(ordered) - 1)] * 1000, 1)
+
+    return {'count': len(ordered), 'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99),
+            'max_ms': round(ordered[-1] * 1000, 1)}
+
+
+class LoadLevel:
+    """Sensors, observations and publish bookkeeping of one load level."""
+
+    def __init__(self, index: int, rate: float, first_sensor_id: int, first_observation_id: int):
+        self.index = index
+        self.rate = rate
+        self.devices = max(math.ceil(rate * DEVICE_PERIOD / SENSORS_PER_DEVICE), 1)
+        self.first_sensor_id = first_sensor_id
+        self.first_observation_id = first_observation_id
+        self.published: Dict[Tuple[int, float], Deque[float]] = defaultdict(deque)  # {(sid, value): publish times}
+        self.outstanding = 0
+        self.insert_latency: List[float] = []
+        self.events: Dict[int, float] = {}  # {observation_id: scenario publish time}
+        self.alert_latency: Dict[int, float] = {}
+        self.sent_readings = 0
+
+    def sensor_ids(self, device: int) -> List[int]:
+        first = self.first_sensor_id + device * SENSORS_PER_DEVICE
+        return list(range(first, first + SENSORS_PER_DEVICE))
+
+    def observation(self, device: int) -> int:
+        return self.first_observation_id + device
+
+    def sensor_observations(self) -> Dict[int, int]:
+        return {sid: self.observation(d) for d in range(self.devices) for sid in self.sensor_ids(d)}
+
+
+class Poller(threading.Thread):
+    """Matches new SensorReadings and Alerts rows to what the benchmark published."""
+
+    def __init__(self, db, exact_times: bool):
+        super().__init__(daemon=True)
+        self.db = db
+        self.exact_times = exact_times
+        self.level: Optional[LoadLevel] = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.last_reading_id = db.query('bench_max_reading', "SELECT MAX(reading_id) FROM SensorReadings")[0][0] or 0
+        self.last_alert_id = db.query('bench_max_alert', "SELECT MAX(alert_id) FROM Alerts")[0][0] or 0
+
+    @staticmethod
+    def _epoch(value) -> float:
+        if isinstance(value, str):  # SQLite returns aggregates/defaults as text
+            value = datetime.fromisoformat(value)
+        return value.timestamp()
+
+    def poll(self):
+        readings = self.db.query('bench_poll_readings', """
+            SELECT reading_id, sensor_id, reading_value, reading_time FROM SensorReadings
+            WHERE reading_id > %s ORDER BY reading_id
+        """, (self.last_reading_id,))
+        alerts = self.db.query('bench_poll_alerts', """
+            SELECT alert_id, observation_id, created_at FROM Alerts
+            WHERE alert_id > %s AND alert_type = 'poaching_alert' ORDER BY alert_id
+        """, (self.last_alert_id,))
+        seen_at = time.time()
+
+        with self.lock:
+            level = self.level
+            for reading_id, sensor_id, value, reading_time in readings:
+                self.last_reading_id = reading_id
+                queue = level.published.get((sensor_id, round(float(value), 2))) if level else None
+                if queue:
+                    published_at = queue.popleft()
+                    inserted_at = self._epoch(reading_time) if self.exact_times else seen_at
+                    level.insert_latency.append(max(inserted_at - published_at, 0.0))
+                    level.outstanding -= 1
+            for alert_id, observation_id, created_at in alerts:
+                self.last_alert_id = alert_id
+                if level and observation_id in level.events and observation_id not in level.alert_latency:
+                    alerted_at = self._epoch(created_at) if self.exact_times else seen_at
+                    level.alert_latency[observation_id] = max(alerted_at - level.events[observation_id], 0.0)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Poll failed: {e}")
+            time.sleep(POLL_INTERVAL)
+
+
+def run_level(client: mqtt.Client, poller: Poller, level: LoadLevel, duration: float, events: int,
+              rng: random.Random) -> Dict[str, Any]:
+    with poller.lock:
+        poller.level = level
+    messages_per_sec = level.rate / SENSORS_PER_DEVICE
+    scenario_devices = rng.sample(range(level.devices), min(events, level.devices))
+    event_times = sorted(rng.uniform(WARMUP_SECONDS, max(duration - DEVICE_PERIOD, WARMUP_SECONDS))
+                         for _ in scenario_devices)
+    pending_events = list(zip(event_times, scenario_devices))
+    armed = set()  # Devices whose next report carries the scenario
+
+    logger.info(f"⏱️  Level {level.index}: {level.rate:,.0f} readings/s on {level.devices} devices "
+                f"for {duration:.0f}s, {len(scenario_devices)} scenarios")
+    started = time.monotonic()
+    sent_messages = 0
+    cursor = 0
+    while True:
+        elapsed = time.monotonic() - started
+        if elapsed >= duration:
+            break
+        while pending_events and pending_events[0][0] <= elapsed:
+            armed.add(pending_events.pop(0)[1])
+
+        due = int(elapsed * messages_per_sec) - sent_messages
+        if due <= 0:
+            time.sleep(min(1 / messages_per_sec, 0.01))
+            continue
+        for _ in range(due):
+            device = cursor
+            cursor = (cursor + 1) % level.devices
+            scenario = device in armed
+            payload = {}
+            for sid, rtype in zip(level.sensor_ids(device), READING_TYPES):
+                if rtype == 'motion':
+                    value = 1 if scenario else 0
+                else:
+                    value = round(BASELINE[rtype] + rng.gauss(0, NOISE[rtype]) +
+                                  (SOUND_SPIKE if scenario and rtype == 'sound' else 0), 2)
+                payload[f'{sid}[{rtype}]'] = value
+            with poller.lock:
+                published_at = time.time()
+                for key, value in payload.items():
+                    level.published[(int(key.split('[')[0]), round(float(value), 2))].append(published_at)
+                level.outstanding += len(payload)
+                if scenario:
+                    level.events[level.observation(device)] = published_at
+                    armed.discard(device)
+            client.publish(MQTT_TOPIC, json.dumps(payload))
+            sent_messages += 1
+    publish_seconds = time.monotonic() - started
+    level.sent_readings = sent_messages * SENSORS_PER_DEVICE
+
+    # Drain: wait for outstanding inserts and scenario alerts
+    deadline = time.monotonic() + DRAIN_SECONDS
+    while time.monotonic() < deadline:
+        with poller.lock:
+            done = level.outstanding <= 0 and len(level.alert_latency) >= len(level.events)
+        if done:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    with poller.lock:
+        poller.level = None
+        result = {
+            'target_rate': level.rate,
+            'achieved_rate': round(level.sent_readings / publish_seconds, 1),
+            'devices': level.devices,
+            'duration_s': round(publish_seconds, 1),
+            'readings_published': level.sent_readings,
+            'readings_inserted': len(level.insert_latency),
+            'readings_lost': level.outstanding,
+            'publish_to_insert': percentiles(level.insert_latency),
+            'scenarios': len(level.events),
+            'scenarios_alerted': len(level.alert_latency),
+            'publish_to_alert': percentiles(list(level.alert_latency.values())),
+        }
+    insert, alert = result['publish_to_insert'], result['publish_to_alert']
+    logger.info(f"   inserted {result['readings_inserted']:,}/{result['readings_published']:,} readings, "
+                f"publish->insert p50 {insert['p50_ms']} ms p95 {insert['p95_ms']} ms p99 {insert['p99_ms']} ms; "
+                f"alerts {result['scenarios_alerted']}/{result['scenarios']}, "
+                f"publish->alert p50 {alert['p50_ms']} ms p95 {alert['p95_ms']} ms p99 {alert['p99_ms']} ms")
+    return result
+
+
+def start_pipeline(args, workdir: str) -> List[subprocess.Popen]:
+    """Start the bridge / monitor processes; their logs and state files go to workdir."""
+    db_args = [] if args.mysql else ['--sqlite', args.sqlite]
+    broker_args = ['--broker', args.broker, '--port', str(args.port), '--no-tls']
+    commands = []
+    if args.pipeline == 'poll':
+        commands.append([sys.executable, os.path.join(BACKEND_DIR, 'mqtt_to_mysql.py'), *broker_args, *db_args])
+        commands.append([sys.executable, os.path.join(BACKEND_DIR, 'alert_monitor.py'), *db_args])
+    else:
+        commands.append([sys.executable, os.path.join(BACKEND_DIR, 'alert_monitor.py'), '--stream', 'bridge',
+                         *broker_args, *db_args])
+    processes = []
+    for command in commands:
+        log = open(os.path.join(workdir, os.path.basename(command[1]) + '.out'), 'w')
+        processes.append(subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT))
+    return processes
+
+
+def stop_pipeline(processes: List[subprocess.Popen]):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGINT)  # Both scripts shut down cleanly on ^C
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end MQTT publish -> insert -> alert latency benchmark")
+    parser.add_argument('--pipeline', choices=['poll', 'stream'], default='poll')
+    parser.add_argument('--rates', default='50,200,1000', help="Comma-separated load levels in readings/s")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds of publishing per level")
+    parser.add_argument('--events', type=int, default=10, help="Poaching scenarios injected per level")
+    parser.add_argument('--broker', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--sqlite', metavar='PATH', help="SQLite stand-in database (default: temporary file)")
+    parser.add_argument('--mysql', action='store_true',
+                        help="Use the (local) MySQL databases configured in mqtt_to_mysql.py / alert_monitor.py")
+    parser.add_argument('--json', metavar='PATH', default='latency_report.json')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rates = [float(rate) for rate in args.rates.split(',')]
+    if args.duration < WARMUP_SECONDS + 2 * DEVICE_PERIOD:
+        parser.error(f"--duration must be at least {WARMUP_SECONDS + 2 * DEVICE_PERIOD:.0f}s "
+                     f"(warm-up plus time for every scenario device to report)")
+    workdir = tempfile.mkdtemp(prefix='latency-bench-')
+    if not args.mysql:
+        args.sqlite = os.path.abspath(args.sqlite or os.path.join(workdir, 'bench.db'))
+        monitor.use_sqlite(args.sqlite)
+    monitor.logger.setLevel(logging.WARNING)
+
+    levels = []
+    first_sensor, first_observation = FIRST_SENSOR_ID, FIRST_OBSERVATION_ID
+    for index, rate in enumerate(rates):
+        level = LoadLevel(index, rate, first_sensor, first_observation)
+        levels.append(level)
+        first_sensor += level.devices * SENSORS_PER_DEVICE
+        first_observation += level.devices
+
+    db = monitor.connect_db(pool_size=1)
+    if not db:
+        raise SystemExit("❌ Could not connect to the benchmark database")
+    rows = [(sid, f'bench-{sid}', oid) for level in levels for sid, oid in level.sensor_observations().items()]
+    db.executemany('bench_register', f"""
+        {'INSERT IGNORE' if args.mysql else 'INSERT OR REPLACE'} INTO IoTSensors (sensor_id, sensor_name, observation_id)
+        VALUES (%s, %s, %s)
+    """, rows)
+    logger.info(f"Registered {len(rows)} benchmark sensors; pipeline logs in {workdir}")
+
+    client = mqtt.Client(client_id=f'latency-bench-{os.getpid()}')
+    client.max_queued_messages_set(0)  # Unbounded: drops would look like pipeline losses
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+
+    poller = Poller(db, exact_times=not args.mysql)
+    processes = start_pipeline(args, workdir)
+    rng = random.Random(args.seed)
+    results = []
+    try:
+        time.sleep(STARTUP_SECONDS)
+        if any(process.poll() is not None for process in processes):
+            raise SystemExit(f"❌ Pipeline process exited during startup, see logs in {workdir}")
+        poller.start()
+        for level in levels:
+            results.append(run_level(client, poller, level, args.duration, args.events, rng))
+    finally:
+        poller.stop_event.set()
+        stop_pipeline(processes)
+        client.loop_stop()
+        client.disconnect()
+        db.close()
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'pipeline': args.pipeline,
+        'database': 'mysql' if args.mysql else 'sqlite',
+        'settings': {
+            'scan_interval_s': monitor.SCAN_INTERVAL,
+            'fetch_page_size': monitor.FETCH_PAGE_SIZE,
+            'device_period_s': DEVICE_PERIOD,
+            'poll_interval_s': POLL_INTERVAL,
+            'duration_s': args.duration,
+        },
+        'levels': results,
+    }
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark SensorReadings / Alerts query latency before and after the
+backend/sql/migrations index (and optional partitioning) migrations.
+
+Seeds a dedicated benchmark schema (never the production tables) with millions
+of readings, times the queries issued by alert_monitor.py and the Node
+backend's SensorData model, applies the migrations and times them again.
+
+Usage:
+    python3 benchmark_sensor_queries.py --database smartplant_bench --rows 2000000
+    python3 benchmark_sensor_queries.py --database smartplant_bench --partition
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mysql.connector
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / 'backend' / 'sql' / 'migrations'
+INDEX_MIGRATION = MIGRATIONS_DIR / '001_sensor_alert_indexes.sql'
+PARTITION_MIGRATION = MIGRATIONS_DIR / '002_partition_sensor_readings.sql'
+
+READING_TYPES = ['temperature', 'humidity', 'soil_moisture', 'sound', 'motion']
+SEED_BATCH_SIZE = 5000
+
+# Baseline schema: what production has today (primary keys and foreign keys only)
+BASELINE_SCHEMA = """
+DROP TABLE IF EXISTS Alerts;
+DROP TABLE IF EXISTS SensorReadings;
+DROP TABLE IF EXISTS IoTSensors;
+
+CREATE TABLE IoTSensors (
+    sensor_id INT AUTO_INCREMENT PRIMARY KEY,
+    sensor_name VARCHAR(100) NOT NULL,
+    observation_id INT
+);
+
+CREATE TABLE SensorReadings (
+    reading_id INT AUTO_INCREMENT PRIMARY KEY,
+    sensor_id INT NOT NULL,
+    reading_type ENUM('temperature', 'humidity', 'soil_moisture', 'sound', 'motion') NOT NULL,
+    reading_value DECIMAL(10,2) NOT NULL,
+    reading_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (sensor_id) REFERENCES IoTSensors(sensor_id) ON DELETE CASCADE
+);
+
+CREATE TABLE Alerts (
+    alert_id INT AUTO_INCREMENT PRIMARY KEY,
+    sensor_id INT,
+    observation_id INT,
+    alert_type ENUM('abnormal_sensor', 'poaching_alert') NOT NULL,
+    severity ENUM('low', 'medium', 'high', 'critical') DEFAULT 'low',
+    score DECIMAL(4,2),
+    description TEXT,
+    resolved BOOLEAN DEFAULT FALSE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (sensor_id) REFERENCES IoTSensors(sensor_id) ON DELETE SET NULL
+);
+"""
+
+
+def split_sql_script(script):
+    """Split a SQL script into statements, honouring mysql client DELIMITER lines."""
+    statements = []
+    delimiter = ';'
+    buffer = []
+
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).strip()
+            statements.append(statement[:-len(delimiter)].strip())
+            buffer = []
+
+    if buffer and '\n'.join(buffer).strip():
+        statements.append('\n'.join(buffer).strip())
+    return statements
+
+
+def run_script(conn, script):
+    cursor = conn.cursor()
+    for statement in split_sql_script(script):
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+    conn.commit()
+    cursor.close()
+
+
+def seed(conn, rows, sensors, observations, days):
+    """Insert sensors, `rows` readings spread over `days` and a proportional number of alerts."""
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO IoTSensors (sensor_id, sensor_name, observation_id) VALUES (%s, %s, %s)",
+        [(sid, f'bench-{sid}', (sid - 1) % observations + 1) for sid in range(1, sensors + 1)]
+    )
+
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / rows
+    started = time.perf_counter()
+
+    for offset in range(0, rows, SEED_BATCH_SIZE):
+        batch = []
+        for i in range(offset, min(offset + SEED_BATCH_SIZE, rows)):
+            sid = random.randint(1, sensors)
+            rtype = READING_TYPES[sid % len(READING_TYPES)]
+            value = random.randint(0, 1) if rtype == 'motion' else round(random.uniform(0, 100), 2)
+            batch.append((sid, rtype, value, start + step * i))
+        cursor.executemany(
+            "INSERT INTO SensorReadings (sensor_id, reading_type, reading_value, reading_time) "
+            "VALUES (%s, %s, %s, %s)", batch
+        )
+        conn.commit()
+        print(f"\r🌱 Seeded {offset + len(batch):,}/{rows:,} readings", end='', flush=True)
+
+    alerts = []
+    for _ in range(max(rows // 100, 1)):
+        sid = random.randint(1, sensors)
+        alerts.append((sid, (sid - 1) % observations + 1,
+                       random.choice(['abnormal_sensor', 'poaching_alert']),
+                       'medium', 0.7, 'benchmark alert',
+                       start + timedelta(seconds=random.uniform(0, days * 86400))))
+    for offset in range(0, len(alerts), SEED_BATCH_SIZE):
+        cursor.executemany(
+            "INSERT INTO Alerts (sensor_id, observation_id, alert_type, severity, score, description, created_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)", alerts[offset:offset + SEED_BATCH_SIZE]
+        )
+    conn.commit()
+    cursor.execute("ANALYZE TABLE SensorReadings, Alerts")
+    cursor.fetchall()
+    cursor.close()
+    print(f"\n✅ Seeded {rows:,} readings and {len(alerts):,} alerts in {time.perf_counter() - started:.1f}s")
+
+
+def benchmark_queries(sensors, observations):
+    """Queries issued by alert_monitor.py and backend/src/models/SensorData.js."""
+    now = datetime.now()
+
+    def random_sensor():
+        return random.randint(1, sensors)
+
+    return {
+        'monitor_time_window': (
+            """SELECT r.sensor_id, r.reading_type, r.reading_value, r.reading_time, s.observation_id
+               FROM SensorReadings r JOIN IoTSensors s ON r.sensor_id = s.sensor_id
+               WHERE r.reading_time > %s ORDER BY r.reading_time ASC""",
+            lambda: (now - timedelta(minutes=10),)
+        ),
+        'monitor_initial_watermark': (
+            "SELECT MIN(reading_id) FROM SensorReadings WHERE reading_time > %s",
+            lambda: (now - timedelta(minutes=10),)
+        ),
+        'monitor_watermark_page': (
+            """SELECT r.reading_id, r.sensor_id, r.reading_type, r.reading_value, r.reading_time,
+                      s.observation_id
+               FROM SensorReadings r JOIN IoTSensors s ON r.sensor_id = s.sensor_id
+               WHERE r.reading_id > (SELECT MAX(reading_id) - 5000 FROM SensorReadings)
+               ORDER BY r.reading_id ASC LIMIT 5000""",
+            lambda: ()
+        ),
+        'sensor_latest': (
+            """SELECT reading_id, reading_type, reading_value, reading_time FROM SensorReadings
+               WHERE sensor_id = %s ORDER BY reading_time DESC LIMIT 1""",
+            lambda: (random_sensor(),)
+        ),
+        'sensor_history_page': (
+            """SELECT reading_id, reading_type, reading_value, reading_time FROM SensorReadings
+               WHERE sensor_id = %s ORDER BY reading_time DESC LIMIT 100 OFFSET 0""",
+            lambda: (random_sensor(),)
+        ),
+        'sensor_time_range': (
+            """SELECT reading_id, reading_type, reading_value, reading_time FROM SensorReadings
+               WHERE sensor_id = %s AND reading_time BETWEEN %s AND %s
+               ORDER BY reading_time DESC LIMIT 1000""",
+            lambda: (random_sensor(), now - timedelta(days=2), now - timedelta(days=1))
+        ),
+        'alert_debounce_lookup': (
+            """SELECT MAX(created_at) FROM Alerts
+               WHERE observation_id = %s AND alert_type = 'poaching_alert' AND created_at > %s""",
+            lambda: (random.randint(1, observations), now - timedelta(minutes=2))
+        ),
+    }
+
+
+def time_queries(conn, queries, repeat):
+    results = {}
+    cursor = conn.cursor()
+    for name, (sql, params) in queries.items():
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(sql, params())
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        results[name] = {
+            'median_ms': statistics.median(latencies),
+            'p95_ms': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        }
+    cursor.close()
+    return results
+
+
+def print_report(phases):
+    names = list(next(iter(phases.values())).keys())
+    header = f"{'query':<28}" + ''.join(f"{phase + ' p50/p95 (ms)':>34}" for phase in phases)
+    print('\n' + header)
+    print('-' * len(header))
+    for name in names:
+        row = f"{name:<28}"
+        for results in phases.values():
+            r = results[name]
+            row += f"{r['median_ms']:>24.2f} / {r['p95_ms']:>7.2f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sensor queries before/after index migrations")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='smartplant_bench',
+                        help="Benchmark schema; its IoTSensors/SensorReadings/Alerts tables are recreated")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--sensors', type=int, default=500)
+    parser.add_argument('--observations', type=int, default=100)
+    parser.add_argument('--days', type=int, default=180, help="Time span the seeded readings cover")
+    parser.add_argument('--repeat', type=int, default=20, help="Executions per query per phase")
+    parser.add_argument('--partition', action='store_true', help="Also apply and benchmark monthly partitioning")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.close()
+    conn.database = args.database
+
+    print(f"🏗️  Creating baseline schema in {args.database}")
+    run_script(conn, BASELINE_SCHEMA)
+    seed(conn, args.rows, args.sensors, args.observations, args.days)
+
+    queries = benchmark_queries(args.sensors, args.observations)
+    phases = {}
+
+    print("⏱️  Benchmarking baseline schema")
+    phases['baseline'] = time_queries(conn, queries, args.repeat)
+
+    print(f"🔧 Applying {INDEX_MIGRATION.name}")
+    run_script(conn, INDEX_MIGRATION.read_text())
+    phases['indexed'] = time_queries(conn, queries, args.repeat)
+
+    if args.partition:
+        print(f"🔧 Applying {PARTITION_MIGRATION.name}")
+        run_script(conn, PARTITION_MIGRATION.read_text())
+        phases['partitioned'] = time_queries(conn, queries, args.repeat)
+
+    print_report(phases)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
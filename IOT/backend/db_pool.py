@@ -0,0 +1,295 @@
+"""
+Pooled database access for the alert monitor and the rollup job.
+
+ConnectionPool hands out a small set of long-lived connections (MySQL or the
+sqlite_standin) to the fetch and alert-insert paths:
+  - idle connections are health-checked on a timer (HEALTH_CHECK_SECONDS)
+    when they are checked out, not pinged on every monitor loop,
+  - hot read queries run through per-connection cached prepared cursors, so
+    the statement is parsed and planned once per connection,
+  - every query is timed under a name, giving count / error / p50 / p95 / max
+    latency per query type (log_stats()).
+Broken connections are dropped and replaced lazily on the next checkout.
+
+connect_db() builds a pool for MySQL (DB_CONFIG) or, given a path, the
+sqlite_standin database, so scripts share the connection setup without
+importing alert_monitor (and its global state / log file).
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import mysql.connector
+
+import sqlite_standin
+
+logger = logging.getLogger(__name__)
+
+# ========== DATABASE CONFIG ==========
+DB_CONFIG = {
+    'host': 'srv1758.hstgr.io',
+    'user': 'u149795069_user',
+    'password': 'Smartestplant123',
+    'database': 'u149795069_smartplant',
+    'autocommit': True,
+    'connection_timeout': 10,
+    'charset': 'utf8mb4'
+}
+MAX_RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 5  # seconds
+DB_ERRORS = (mysql.connector.Error, sqlite_standin.Error)  # Errors of either database backend
+
+# ========== POOL SETTINGS ==========
+POOL_SIZE = 4
+POOL_TIMEOUT = 10  # seconds to wait for a free connection
+HEALTH_CHECK_SECONDS = 30  # Checked-out connections idle longer than this are pinged first
+LATENCY_SAMPLES = 1000  # Recent latencies kept per query type for percentiles
+
+
+class QueryStats:
+    """Latency statistics of one query type."""
+
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, elapsed_ms: float, ok: bool):
+        self.count += 1
+        self.errors += not ok
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+
+    def summary(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return recent[min(int(len(recent) * p), len(recent) - 1)] if recent else 0.0
+
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'max_ms': self.max_ms,
+        }
+
+
+class PooledConnection:
+    __slots__ = ('raw', 'checked_at', 'prepared')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.checked_at = time.monotonic()
+        self.prepared: Dict[str, Any] = {}  # {query name: prepared cursor}
+
+
+class ConnectionPool:
+    def __init__(self, connect: Callable[[], Any], size: int = POOL_SIZE):
+        self._connect = connect
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()  # LIFO keeps the hottest connection in use
+        self._open = 0
+        self._lock = threading.Lock()
+        self._last_health_check = float('-inf')
+        self.stats: Dict[str, QueryStats] = {}
+
+    def _create(self) -> PooledConnection:
+        with self._lock:
+            if self._open >= self.size:
+                raise queue.Full
+            self._open += 1
+        try:
+            return PooledConnection(self._connect())
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _discard(self, pooled: PooledConnection):
+        with self._lock:
+            self._open -= 1
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+    def _acquire(self) -> PooledConnection:
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._create()
+            except queue.Full:
+                try:
+                    pooled = self._idle.get(timeout=POOL_TIMEOUT)
+                except queue.Empty:
+                    raise TimeoutError(f"No free database connection within {POOL_TIMEOUT}s") from None
+
+        if time.monotonic() - pooled.checked_at >= HEALTH_CHECK_SECONDS:
+            try:
+                pooled.raw.ping(reconnect=False)
+                pooled.checked_at = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Dropping dead pooled connection: {e}")
+                self._discard(pooled)
+                return self._create()
+        return pooled
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Check out a connection; it is rolled back and dropped if the caller fails on a dead link."""
+        pooled = self._acquire()
+        try:
+            yield pooled
+        except Exception:
+            try:
+                pooled.raw.rollback()
+            except Exception:
+                self._discard(pooled)
+                raise
+            self._idle.put(pooled)
+            raise
+        else:
+            self._idle.put(pooled)
+
+    def _record(self, name: str, started: float, ok: bool):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = QueryStats()
+        stats.record((time.perf_counter() - started) * 1000, ok)
+
+    def query(self, name: str, sql: str, params: Sequence = (), dictionary: bool = False,
+              prepared: bool = False) -> List[Any]:
+        """Run a SELECT and return all rows. prepared=True reuses a server-side prepared statement."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            with self.connection() as pooled:
+                if prepared:
+                    cursor = pooled.prepared.get(name)
+                    if cursor is None:
+                        cursor = pooled.prepared[name] = pooled.raw.cursor(prepared=True, dictionary=dictionary)
+                    try:
+                        cursor.execute(sql, tuple(params))
+                        rows = cursor.fetchall()
+                    except Exception:
+                        pooled.prepared.pop(name, None)  # Re-prepare on next use
+                        raise
+                else:
+                    cursor = pooled.raw.cursor(dictionary=dictionary)
+                    cursor.execute(sql, tuple(params))
+                    rows = cursor.fetchall()
+                    cursor.close()
+            ok = True
+            return rows
+        finally:
+            self._record(name, started, ok)
+
+    def executemany(self, name: str, sql: str, rows: Sequence[Sequence]) -> int:
+        """Run a (multi-row) write in one transaction and commit it."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            with self.connection() as pooled:
+                cursor = pooled.raw.cursor()
+                cursor.executemany(sql, [tuple(row) for row in rows])
+                pooled.raw.commit()
+                count = cursor.rowcount
+                cursor.close()
+            ok = True
+            return count
+        finally:
+            self._record(name, started, ok)
+
+    @contextmanager
+    def transaction(self, name: str):
+        """Run several statements atomically on one connection; yields a cursor and commits on success."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            with self.connection() as pooled:
+                pooled.raw.start_transaction()
+                cursor = pooled.raw.cursor()
+                yield cursor
+                pooled.raw.commit()
+                cursor.close()
+            ok = True
+        finally:
+            self._record(name, started, ok)
+
+    def check_health(self, force: bool = False) -> bool:
+        """
+        At most every HEALTH_CHECK_SECONDS (or when forced), make sure a working
+        connection can be checked out. Returns False if the database is unreachable.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_health_check < HEALTH_CHECK_SECONDS:
+            return True
+        self._last_health_check = now
+        try:
+            with self.connection() as pooled:
+                pooled.raw.ping(reconnect=False)
+                pooled.checked_at = time.monotonic()
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            self._last_health_check = float('-inf')  # Retry on the next call
+            return False
+
+    def log_stats(self):
+        for name, stats in sorted(self.stats.items()):
+            s = stats.summary()
+            logger.info(f"📈 {name}: {s['count']} queries, {s['errors']} errors, mean {s['mean_ms']:.1f}ms, "
+                        f"p50 {s['p50_ms']:.1f}ms, p95 {s['p95_ms']:.1f}ms, max {s['max_ms']:.1f}ms")
+
+    def close(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+
+# ========== CONNECTIONS ==========
+
+def open_connection(sqlite_path: Optional[str] = None):
+    """Open one raw database connection (MySQL, or the SQLite stand-in at sqlite_path)."""
+    if sqlite_path:
+        return sqlite_standin.connect(sqlite_path)
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def connect_db(sqlite_path: Optional[str] = None, pool_size: int = POOL_SIZE) -> Optional[ConnectionPool]:
+    """Create a connection pool, verifying connectivity with retry logic and error handling."""
+    for attempt in range(MAX_RECONNECT_ATTEMPTS):
+        try:
+            pool = ConnectionPool(partial(open_connection, sqlite_path), pool_size)
+            with pool.connection() as pooled:
+                if pooled.raw.is_connected():
+                    logger.info(f"Database connected successfully (attempt {attempt + 1})")
+                    return pool
+        except DB_ERRORS as e:
+            logger.error(f"Database connection attempt {attempt + 1} failed: {e}")
+            if attempt < MAX_RECONNECT_ATTEMPTS - 1:
+                logger.info(f"Retrying in {RECONNECT_DELAY} seconds...")
+                time.sleep(RECONNECT_DELAY)
+        except Exception as e:
+            logger.error(f"Unexpected error during database connection: {e}")
+            break
+    
+    logger.critical("Failed to establish database connection after all attempts")
+    return None
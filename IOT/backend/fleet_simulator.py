@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Synthetic sensor fleet load generator.
+
+Simulates thousands of virtual sensors grouped into ESP32-like devices (one
+device per observation site slot, SENSORS_PER_DEVICE sensors each) and
+publishes their readings to MQTT in the firmware's payload format
+({"<id>[<type>]": value, ...}, one message per device report) at a
+configurable aggregate rate. Values follow a mean-reverting drift around a
+per-type baseline, with measurement noise and a daily temperature cycle, so
+the monitor's rolling statistics see realistic data.
+
+Poaching scenarios (motion + sound spike, optionally with temperature and
+humidity disturbance) are injected into random devices at --events-per-minute;
+each is logged as a JSON line (--events-log) with the time its first
+scenario reading was published, so alerts can be matched against injected
+events afterwards.
+
+--ramp-to raises the rate stepwise to find the breaking point of
+mqtt_to_mysql.py / alert_monitor.py; every second the target and achieved
+publish rates are logged. Publishing is spread over --processes worker
+processes, each owning a slice of the devices.
+
+Usage:
+    python3 fleet_simulator.py --sensors 5000 --observations 200 --rate 2000
+    python3 fleet_simulator.py --sensors 20000 --rate 1000 --ramp-to 20000 --ramp-step-seconds 30 --processes 4
+    python3 fleet_simulator.py --sensors 500 --register --sqlite /tmp/monitor.db   # create IoTSensors rows first
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing as mp
+import queue
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import paho.mqtt.client as mqtt
+
+from batch_eval import VALUE_RANGES
+from sensor_state import READING_TYPES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ========== FLEET SETTINGS ==========
+MQTT_TOPIC = 'sensors'
+SENSORS_PER_DEVICE = len(READING_TYPES)  # One sensor of every type per device
+FIRST_SENSOR_ID = 100000  # Virtual sensor ids start here, clear of real hardware
+STATS_INTERVAL = 1.0  # seconds between rate log lines
+
+# ========== SIGNAL MODEL ==========
+# Per type: (baseline, drift std per sqrt(minute), measurement noise std)
+SIGNAL_MODEL = {
+    'temperature': (24.0, 0.3, 0.2),
+    'humidity': (60.0, 1.0, 0.8),
+    'motion': (0.0, 0.0, 0.0),
+    'soil_moisture': (40.0, 0.4, 0.3),
+    'sound': (45.0, 1.5, 2.0),
+}
+DRIFT_REVERSION = 0.05  # Fraction of the distance to baseline recovered per minute
+TEMPERATURE_DAILY_AMPLITUDE = 4.0  # °C, peak mid-afternoon
+MOTION_FALSE_POSITIVE = 0.0005  # Chance a quiet motion sensor reports 1 (animals, wind)
+
+# ========== SCENARIOS ==========
+SCENARIO_REPORTS = 3  # Device reports a scenario lasts
+SCENARIOS = {
+    'poaching': {'motion': 1, 'sound': 40.0},  # motion value / sound rise in dB
+    'critical_poaching': {'motion': 1, 'sound': 55.0, 'temperature': 4.0, 'humidity': 12.0},
+}
+
+
+class VirtualDevice:
+    """One ESP32: SENSORS_PER_DEVICE sensors with drifting levels."""
+
+    __slots__ = ('index', 'observation_id', 'sensor_ids', 'types', 'levels', 'last_report', 'scenario',
+                 'scenario_left', 'event')
+
+    def __init__(self, index: int, observation_id: int, first_sensor_id: int, rng: random.Random):
+        self.index = index
+        self.observation_id = observation_id
+        self.sensor_ids = [first_sensor_id + index * SENSORS_PER_DEVICE + k for k in range(SENSORS_PER_DEVICE)]
+        self.types = [READING_TYPES[k % len(READING_TYPES)] for k in range(SENSORS_PER_DEVICE)]
+        self.levels = [SIGNAL_MODEL[t][0] + rng.gauss(0, SIGNAL_MODEL[t][1]) for t in self.types]
+        self.last_report: Optional[float] = None
+        self.scenario: Optional[Dict[str, float]] = None
+        self.scenario_left = 0
+        self.event: Optional[Dict[str, Any]] = None  # Injected scenario not yet published
+
+    def payload(self, now: float, rng: random.Random) -> Dict[str, float]:
+        minutes = 0.0 if self.last_report is None else min(now - self.last_report, 3600) / 60
+        self.last_report = now
+        local = time.localtime(now)
+        hour = local.tm_hour + local.tm_min / 60
+        payload = {}
+        for k, (sid, rtype) in enumerate(zip(self.sensor_ids, self.types)):
+            baseline, drift, noise = SIGNAL_MODEL[rtype]
+            # Ornstein-Uhlenbeck step: wander, pulled back towards the baseline
+            self.levels[k] += (DRIFT_REVERSION * minutes * (baseline - self.levels[k])
+                               + drift * math.sqrt(minutes) * rng.gauss(0, 1))
+            if rtype == 'motion':
+                value = 1 if rng.random() < MOTION_FALSE_POSITIVE else 0
+            else:
+                value = self.levels[k] + rng.gauss(0, noise)
+                if rtype == 'temperature':
+                    value += TEMPERATURE_DAILY_AMPLITUDE * math.sin((hour - 9) / 24 * 2 * math.pi)
+            if self.scenario is not None and rtype in self.scenario:
+                value = self.scenario[rtype] if rtype == 'motion' else value + self.scenario[rtype]
+            low, high = VALUE_RANGES[rtype]
+            payload[f'{sid}[{rtype}]'] = round(min(max(value, low), high), 2)
+
+        if self.scenario is not None:
+            self.scenario_left -= 1
+            if self.scenario_left <= 0:
+                self.scenario = None
+        return payload
+
+
+def build_fleet(sensors: int, observations: int, first_sensor_id: int, first_observation_id: int,
+                seed: int) -> List[VirtualDevice]:
+    rng = random.Random(seed)
+    devices = max(sensors // SENSORS_PER_DEVICE, 1)
+    return [VirtualDevice(d, first_observation_id + d % observations, first_sensor_id, rng)
+            for d in range(devices)]
+
+
+def target_rate(args, elapsed: float) -> float:
+    """Aggregate readings/sec at `elapsed` seconds into the run."""
+    if not args.ramp_to:
+        return args.rate
+    step = int(elapsed // args.ramp_step_seconds)
+    steps = max(args.ramp_steps - 1, 1)
+    return min(args.rate + (args.ramp_to - args.rate) * step / steps, args.ramp_to)
+
+
+def create_client(args, client_id: str) -> mqtt.Client:
+    client = mqtt.Client(client_id=client_id)
+    if args.username:
+        client.username_pw_set(args.username, args.password)
+    if args.tls:
+        client.tls_set()
+    client.max_queued_messages_set(args.max_queued)
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+    return client
+
+
+def publisher(worker: int, args, devices: List[VirtualDevice], sent: mp.Value, dropped: mp.Value,
+              events: mp.Queue, stop: mp.Event, started_at: float):
+    """Publish this worker's devices round-robin at its share of the target rate (token bucket)."""
+    rng = random.Random(args.seed * 1000 + worker)
+    client = create_client(args, f'fleet-sim-{worker}-{random.getrandbits(32):08x}')
+    share = len(devices) * SENSORS_PER_DEVICE / (args.sensors_total or 1)
+    event_rate = args.events_per_minute / 60 * share  # Scenarios per second for this worker
+    credit = 0.0
+    last = time.monotonic()
+    cursor = 0
+    local_sent = local_dropped = 0
+
+    try:
+        while not stop.is_set():
+            now_mono = time.monotonic()
+            elapsed_step = now_mono - last
+            last = now_mono
+            messages_per_sec = target_rate(args, time.time() - started_at) * share / SENSORS_PER_DEVICE
+            credit = min(credit + elapsed_step * messages_per_sec, messages_per_sec + 1)  # Cap the burst at 1s
+
+            if event_rate and rng.random() < event_rate * elapsed_step:
+                device = rng.choice(devices)
+                if device.scenario is None:
+                    kind = 'critical_poaching' if rng.random() < args.critical_share else 'poaching'
+                    device.scenario, device.scenario_left = SCENARIOS[kind], SCENARIO_REPORTS
+                    device.event = {'kind': kind, 'observation_id': device.observation_id,
+                                    'sensor_ids': device.sensor_ids}
+
+            if credit < 1:
+                time.sleep(min((1 - credit) / messages_per_sec, 0.01) if messages_per_sec else 0.01)
+                continue
+
+            now = time.time()
+            for _ in range(int(credit)):
+                device = devices[cursor]
+                cursor = (cursor + 1) % len(devices)
+                info = client.publish(args.topic, json.dumps(device.payload(now, rng)), qos=args.qos)
+                if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                    local_sent += 1
+                    if device.event is not None:
+                        events.put({**device.event, 'published_at': now})
+                        device.event = None
+                else:
+                    local_dropped += 1  # Client queue full or disconnected: the broker can't keep up
+            credit -= int(credit)
+
+            with sent.get_lock():
+                sent.value += local_sent
+            with dropped.get_lock():
+                dropped.value += local_dropped
+            local_sent = local_dropped = 0
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+def register_sensors(devices: List[VirtualDevice], sqlite_path: Optional[str]):
+    """Create IoTSensors rows for the virtual sensors (observations must already exist in MySQL)."""
+    from db_pool import connect_db
+
+    db = connect_db(sqlite_path, pool_size=1)
+    if not db:
+        raise SystemExit("❌ Could not connect to the database")
+    try:
+        rows = [(sid, f'sim-{sid}', f'Simulated {rtype} sensor', device.observation_id)
+                for device in devices for sid, rtype in zip(device.sensor_ids, device.types)]
+        # Sensors registered by an earlier run are kept, so --register can be repeated
+        inserted = db.executemany('register_sensors', f"""
+            {'INSERT OR IGNORE' if sqlite_path else 'INSERT IGNORE'} INTO IoTSensors
+                (sensor_id, sensor_name, location_description, observation_id)
+            VALUES (%s, %s, %s, %s)
+        """, rows)
+        logger.info(f"✅ Registered {inserted} virtual sensors ({len(rows) - inserted} already registered)")
+    finally:
+        db.close()
+
+
+def run(args):
+    devices = build_fleet(args.sensors, args.observations, args.first_sensor_id, args.first_observation_id,
+                          args.seed)
+    args.sensors_total = len(devices) * SENSORS_PER_DEVICE
+    if args.register:
+        register_sensors(devices, args.sqlite)
+        return
+
+    workers = min(args.processes, len(devices))
+    sent = mp.Value('q', 0)
+    dropped = mp.Value('q', 0)
+    events: mp.Queue = mp.Queue()
+    stop = mp.Event()
+    started_at = time.time()
+    processes = [mp.Process(target=publisher, args=(w, args, devices[w::workers], sent, dropped, events, stop,
+                                                    started_at), daemon=True)
+                 for w in range(workers)]
+    for process in processes:
+        process.start()
+
+    events_log = open(args.events_log, 'a') if args.events_log else None
+    logger.info(f"🌲 Simulating {args.sensors_total} sensors on {len(devices)} devices, "
+                f"{args.observations} observations, {workers} publisher processes -> {args.broker}:{args.port}")
+    history = []
+    injected = 0
+    last_sent = last_dropped = 0
+    next_stats = time.monotonic() + STATS_INTERVAL
+    try:
+        while time.time() - started_at < args.duration and all(p.is_alive() for p in processes):
+            try:
+                event = events.get(timeout=max(next_stats - time.monotonic(), 0))
+                injected += 1
+                if events_log:
+                    events_log.write(json.dumps(event) + '\n')
+                    events_log.flush()
+                continue
+            except queue.Empty:
+                pass
+
+            next_stats += STATS_INTERVAL
+            elapsed = time.time() - started_at
+            total_sent, total_dropped = sent.value, dropped.value
+            achieved = (total_sent - last_sent) * SENSORS_PER_DEVICE / STATS_INTERVAL
+            target = target_rate(args, elapsed)
+            history.append({'elapsed': round(elapsed, 1), 'target_rate': target, 'achieved_rate': achieved,
+                            'dropped': total_dropped - last_dropped})
+            flag = '' if achieved >= 0.95 * target else '  ⚠️  below target'
+            logger.info(f"📤 target {target:,.0f} readings/s, sent {achieved:,.0f} readings/s, "
+                        f"dropped {total_dropped - last_dropped} msgs, {injected} scenarios injected{flag}")
+            last_sent, last_dropped = total_sent, total_dropped
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Stopping fleet simulator.")
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=5)
+        if events_log:
+            events_log.close()
+
+    peak = max((h['achieved_rate'] for h in history), default=0.0)
+    logger.info(f"✅ Published {sent.value:,} messages ({sent.value * SENSORS_PER_DEVICE:,} readings), "
+                f"{dropped.value} dropped, peak {peak:,.0f} readings/s, {injected} scenarios injected")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'sensors': args.sensors_total, 'devices': len(devices), 'processes': workers,
+                       'messages': sent.value, 'dropped': dropped.value, 'scenarios': injected,
+                       'peak_rate': peak, 'history': history}, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic sensor fleet MQTT load generator")
+    parser.add_argument('--sensors', type=int, default=1000, help="Virtual sensors (grouped 5 per device)")
+    parser.add_argument('--observations', type=int, default=50, help="Observation ids the devices spread over")
+    parser.add_argument('--first-sensor-id', type=int, default=FIRST_SENSOR_ID)
+    parser.add_argument('--first-observation-id', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=500, help="Aggregate readings per second")
+    parser.add_argument('--ramp-to', type=float, help="Raise the rate stepwise up to this many readings/s")
+    parser.add_argument('--ramp-steps', type=int, default=10)
+    parser.add_argument('--ramp-step-seconds', type=float, default=30)
+    parser.add_argument('--duration', type=float, default=float('inf'), help="Seconds to run (default: until ^C)")
+    parser.add_argument('--events-per-minute', type=float, default=1.0, help="Injected poaching scenarios")
+    parser.add_argument('--critical-share', type=float, default=0.2, help="Fraction of scenarios that are critical")
+    parser.add_argument('--events-log', metavar='PATH', help="Append injected scenarios as JSON lines")
+    parser.add_argument('--json', metavar='PATH', help="Write a rate history report")
+    parser.add_argument('--processes', type=int, default=1, help="Publisher processes")
+    parser.add_argument('--broker', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--tls', action='store_true')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--topic', default=MQTT_TOPIC)
+    parser.add_argument('--qos', type=int, choices=[0, 1], default=0)
+    parser.add_argument('--max-queued', type=int, default=10000, help="Client-side publish queue per process")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--register', action='store_true',
+                        help="Insert the virtual sensors into IoTSensors and exit (no publishing)")
+    parser.add_argument('--sqlite', metavar='PATH', help="With --register: use a SQLite stand-in database")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Sharded, multi-process alert monitor.
+
+A coordinator process fetches pages of readings with the reading_id watermark
+(alert_monitor.fetch_recent_readings) and routes each reading to the worker
+process that owns its observation on a consistent-hash ring. Each worker runs
+the normal alert_monitor evaluation (store_batch / evaluate_page /
+flush_alerts) with its own state and database connection, so per-observation
+detection behaves exactly like the single-process monitor.
+
+The watermark is only persisted once every shard has written the page's alerts;
+a shard's part of a page that fails is redelivered before the next page.
+Send SIGUSR1 / SIGUSR2 to the coordinator to add / remove a worker: only the
+observations whose owner changes move, and their new owner is warmed up by
+replaying REBALANCE_REPLAY_MINUTES of history without raising alerts.
+
+Usage:
+    python3 monitor_shards.py --workers 4
+    python3 monitor_shards.py --workers 2 --sqlite /tmp/monitor.db   # local test
+"""
+
+import argparse
+import bisect
+import hashlib
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import alert_monitor as monitor
+
+logger = logging.getLogger(__name__)
+
+# ========== SHARD SETTINGS ==========
+SHARD_REPLICAS = 128  # Virtual nodes per worker on the hash ring
+REBALANCE_REPLAY_MINUTES = 10  # History replayed to warm up moved observations
+ACK_TIMEOUT = 120  # seconds to wait for a shard to process a page
+
+
+class HashRing:
+    """Consistent-hash ring mapping observation ids to worker names."""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = SHARD_REPLICAS):
+        self.nodes = sorted(nodes)
+        self._ring = sorted(
+            (self._hash(f'{node}#{replica}'), node)
+            for node in self.nodes for replica in range(replicas)
+        )
+        self._keys = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def owner(self, observation_id: int) -> str:
+        index = bisect.bisect(self._keys, self._hash(str(observation_id))) % len(self._keys)
+        return self._ring[index][1]
+
+    def partition(self, readings: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        shards: Dict[str, List[Dict[str, Any]]] = {}
+        owners: Dict[int, str] = {}
+        for reading in readings:
+            oid = reading['observation_id']
+            node = owners.get(oid)
+            if node is None:
+                node = owners[oid] = self.owner(oid)
+            shards.setdefault(node, []).append(reading)
+        return shards
+
+
+def release_observations(observation_ids: List[int]) -> Dict[int, Dict[str, list]]:
+    """
+    Drop the state of observations this worker no longer owns and return their
+    debounce / dedup entries, {obs_id: {'last_alert_time': [...], 'recent_alerts': [...]}},
+    for the new owner (see adopt_debounce).
+    """
+    released = {}
+    for oid in observation_ids:
+        sensors = monitor.sensor_state.observation_sensors.get(oid, set())
+        debounce = [(key, t) for key, t in monitor.last_alert_time.items()
+                    if key == (oid, 'poaching_alert') or (key[1] == 'abnormal_sensor' and key[0] in sensors)]
+        dedup = [(key, t) for key, t in monitor.recent_alerts.items() if key[1] == oid]
+        for key, _ in debounce:
+            del monitor.last_alert_time[key]
+        for key, _ in dedup:
+            del monitor.recent_alerts[key]
+        released[oid] = {'last_alert_time': debounce, 'recent_alerts': dedup}
+        monitor.sensor_state.remove_observation(oid)
+        monitor.signal_window.remove_observation(oid)
+    return released
+
+
+def adopt_debounce(released: Dict[int, Dict[str, list]]):
+    """Merge debounce / dedup entries released by another shard, keeping the newest time per key."""
+    for state in released.values():
+        for target, entries in ((monitor.last_alert_time, state['last_alert_time']),
+                                (monitor.recent_alerts, state['recent_alerts'])):
+            for key, t in entries:
+                if key not in target or target[key] < t:
+                    target[key] = t
+
+
+def shard_worker(name: str, inbox: mp.Queue, acks: mp.Queue, sqlite_path: Optional[str]):
+    """
+    Worker process entry point. Messages:
+      ('readings', seq, rows)    evaluate rows and write alerts
+      ('warm', seq, rows)        fold rows into state only (rebalance warm-up)
+      ('ring', seq, nodes)       release observations this worker no longer owns
+                                 (acknowledged with their debounce state)
+      ('debounce', seq, state)   adopt debounce state released by another worker
+      ('stop',)                  flush and exit
+    Every message except stop is acknowledged with (name, seq, ok, result).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Coordinator handles shutdown
+    if sqlite_path:
+        monitor.use_sqlite(sqlite_path)
+    monitor.db = monitor.connect_db(pool_size=1)  # Single-threaded worker
+    applied: Dict[int, int] = {}  # Highest reading_id applied per observation; redelivered rows are skipped
+
+    while True:
+        message = inbox.get()
+        kind = message[0]
+        if kind == 'stop':
+            break
+
+        seq, payload = message[1], message[2]
+        ok = True
+        result = None
+        try:
+            if kind == 'readings':
+                fresh = [row for row in payload if row['reading_id'] > applied.get(row['observation_id'], 0)]
+                ok = monitor.ensure_connection()
+                if ok:
+                    # The rows are stored even if the alert flush fails (the alerts stay queued)
+                    ok = monitor.process_page(monitor.db, fresh)
+                    for row in fresh:
+                        applied[row['observation_id']] = row['reading_id']
+            elif kind == 'warm':
+                monitor.fold_readings(payload)
+            elif kind == 'ring':
+                ring = HashRing(payload)
+                result = release_observations([oid for oid in list(monitor.sensor_state.observation_sensors)
+                                               if ring.owner(oid) != name])
+                for oid in result:
+                    applied.pop(oid, None)
+                if result:
+                    logger.info(f"{name}: released {len(result)} observations after rebalance")
+            elif kind == 'debounce':
+                adopt_debounce(payload)
+        except Exception as e:
+            logger.error(f"{name}: error handling {kind} message: {e}")
+            ok = False
+        acks.put((name, seq, ok, result))
+
+    if monitor.db:
+        monitor.flush_alerts(monitor.db)
+        monitor.db.close()
+
+
+class ShardCoordinator:
+    def __init__(self, workers: int, sqlite_path: Optional[str] = None):
+        self.sqlite_path = sqlite_path
+        self.acks: mp.Queue = mp.Queue()
+        self.inboxes: Dict[str, mp.Queue] = {}
+        self.processes: Dict[str, mp.Process] = {}
+        self.seq = 0
+        self.seen_observations: set = set()
+        self.undelivered: List[Dict[str, Any]] = []  # Readings fetched but not processed by their shard
+        self.target_workers = workers
+        for index in range(workers):
+            self._spawn(f'shard-{index}')
+        self.ring = HashRing(self.inboxes)
+
+    def _spawn(self, name: str):
+        inbox: mp.Queue = mp.Queue()
+        process = mp.Process(target=shard_worker, name=name,
+                             args=(name, inbox, self.acks, self.sqlite_path), daemon=True)
+        process.start()
+        self.inboxes[name] = inbox
+        self.processes[name] = process
+
+    def _send(self, messages: Dict[str, tuple]) -> Dict[str, Any]:
+        """
+        Send one message per shard and wait for the acknowledgements. Returns
+        {shard: result} for the shards that succeeded; failed or silent shards are missing.
+        """
+        self.seq += 1
+        for name, (kind, payload) in messages.items():
+            self.inboxes[name].put((kind, self.seq, payload))
+
+        waiting = set(messages)
+        results = {}
+        deadline = time.monotonic() + ACK_TIMEOUT
+        while waiting:
+            try:
+                name, seq, shard_ok, result = self.acks.get(timeout=max(deadline - time.monotonic(), 0.1))
+            except queue.Empty:
+                logger.error(f"Shards {sorted(waiting)} did not acknowledge within {ACK_TIMEOUT}s")
+                break
+            if seq != self.seq:
+                continue  # Late ack from a timed-out earlier message
+            waiting.discard(name)
+            if shard_ok:
+                results[name] = result
+        return results
+
+    def dispatch(self, readings: List[Dict[str, Any]]) -> bool:
+        """
+        Route a page to its owning shards; True once every shard has processed its
+        part. Parts of shards that failed or timed out stay in `undelivered` and
+        are sent again by redeliver() before the next page is fetched, since the
+        fetch watermark has already moved past them.
+        """
+        self.seen_observations.update(r['observation_id'] for r in readings)
+        self.undelivered.extend(readings)
+        return self.redeliver()
+
+    def redeliver(self) -> bool:
+        """Send undelivered readings to their current owners; True once none are left."""
+        if not self.undelivered:
+            return True
+        shards = self.ring.partition(self.undelivered)
+        done = self._send({name: ('readings', rows) for name, rows in shards.items()})
+        self.undelivered = [row for name, rows in shards.items() if name not in done for row in rows]
+        return not self.undelivered
+
+    def poll(self, db) -> bool:
+        """
+        Deliver every new page, after any readings still undelivered. Returns
+        False if a shard failed; the persisted watermark then stays at the last
+        page every shard has processed.
+        """
+        if not self.redeliver():
+            logger.error(f"{len(self.undelivered)} readings still undelivered; watermark not persisted")
+            return False
+        has_more = True
+        while has_more:
+            readings, has_more = monitor.fetch_recent_readings(db)
+            if not self.dispatch(readings):
+                logger.error(f"A shard failed to process its page; {len(self.undelivered)} readings kept "
+                             f"for redelivery, watermark not persisted")
+                return False
+            monitor.save_watermark()
+        return True
+
+    def resize(self, workers: int, db) -> None:
+        """Change the worker count, moving only the observations whose ring owner changes."""
+        workers = max(workers, 1)
+        old_ring = self.ring
+        new_names = [f'shard-{index}' for index in range(workers)]
+        for name in new_names:
+            if name not in self.inboxes:
+                self._spawn(name)
+        new_ring = HashRing(new_names)
+        moved = {oid for oid in self.seen_observations if old_ring.owner(oid) != new_ring.owner(oid)}
+
+        # Every shard (removed ones included) releases the observations it lost, with
+        # their debounce state, which moves to the new owner; removed shards then stop
+        released = self._send({name: ('ring', new_names) for name in self.inboxes})
+        for name in [n for n in self.inboxes if n not in new_names]:
+            self.inboxes.pop(name).put(('stop',))
+            self.processes.pop(name).join(timeout=30)
+        self.ring = new_ring
+
+        adopted: Dict[str, Dict[int, Dict[str, list]]] = {}
+        for state in released.values():
+            for oid, debounce in (state or {}).items():
+                adopted.setdefault(new_ring.owner(oid), {})[oid] = debounce
+        if adopted:
+            self._send({name: ('debounce', state) for name, state in adopted.items()})
+
+        if moved:
+            # Undelivered readings are evaluated by redeliver(), not folded in here
+            undelivered = {row['reading_id'] for row in self.undelivered}
+            history = [row for row in fetch_history(db, moved, REBALANCE_REPLAY_MINUTES)
+                       if row['reading_id'] not in undelivered]
+            shards = new_ring.partition(history)
+            if shards:
+                self._send({name: ('warm', rows) for name, rows in shards.items()})
+        logger.info(f"⚖️  Rebalanced to {workers} shards, moved {len(moved)} observations")
+
+    def stop(self):
+        for inbox in self.inboxes.values():
+            inbox.put(('stop',))
+        for process in self.processes.values():
+            process.join(timeout=30)
+
+
+def fetch_history(db, observation_ids: set, minutes: int) -> List[Dict[str, Any]]:
+    """Readings of the given observations from the last `minutes`, up to the current watermark."""
+    rows = db.query('rebalance_history', """
+        SELECT r.reading_id, r.sensor_id, r.reading_type, r.reading_value, r.reading_time,
+               s.observation_id
+        FROM SensorReadings r
+        JOIN IoTSensors s ON r.sensor_id = s.sensor_id
+        WHERE r.reading_time > %s AND r.reading_id <= %s
+        ORDER BY r.reading_id ASC
+    """, (datetime.now() - timedelta(minutes=minutes), monitor.last_reading_id or 0), dictionary=True)
+    return [row for row in rows if row['observation_id'] in observation_ids and monitor.validate_reading(row)]
+
+
+def run(workers: int, sqlite_path: Optional[str] = None):
+    logger.info(f"🔍 Starting sharded monitoring with {workers} workers...")
+    if sqlite_path:
+        monitor.use_sqlite(sqlite_path)
+    monitor.db = monitor.connect_db()
+    if not monitor.db:
+        logger.error("Failed to establish initial database connection. Exiting.")
+        exit(1)
+
+    coordinator = ShardCoordinator(workers, sqlite_path)
+
+    def grow(signum, frame):
+        coordinator.target_workers += 1
+
+    def shrink(signum, frame):
+        coordinator.target_workers = max(coordinator.target_workers - 1, 1)
+
+    signal.signal(signal.SIGUSR1, grow)
+    signal.signal(signal.SIGUSR2, shrink)
+
+    try:
+        while True:
+            if not monitor.ensure_connection():
+                logger.error("Database connection lost and could not be re-established. Retrying in 30 seconds...")
+                time.sleep(30)
+                continue
+
+            try:
+                if coordinator.target_workers != len(coordinator.inboxes):
+                    coordinator.resize(coordinator.target_workers, monitor.db)
+
+                coordinator.poll(monitor.db)
+            except Exception as e:
+                logger.error(f"Error in coordinator loop: {e}")
+                time.sleep(5)
+
+            time.sleep(monitor.SCAN_INTERVAL)
+
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Stopping sharded monitor gracefully.")
+    finally:
+        coordinator.stop()
+        if monitor.db:
+            monitor.db.log_stats()
+            monitor.db.close()
+            logger.info("Database connection closed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded multi-process alert monitor")
+    parser.add_argument('--workers', type=int, default=mp.cpu_count(), help="Number of shard processes")
+    parser.add_argument('--sqlite', metavar='PATH',
+                        help="Use a local SQLite stand-in database (see sqlite_standin.py) instead of MySQL")
+    args = parser.parse_args()
+    run(args.workers, args.sqlite)
@@ -1,3 +1,4 @@
+import argparse
 import json
 import re
 import mysql.connector
@@ -5,6 +6,8 @@ import paho.mqtt.client as mqtt
 import ssl
 from datetime import datetime
 
+import sqlite_standin
+
 # ====== MySQL Configuration ======
 db_config = {
     "host": "srv1758.hstgr.io",
@@ -19,9 +22,30 @@ MQTT_PORT = 8883
 MQTT_TOPIC = "sensors"
 MQTT_USER = "client"
 MQTT_PASSWORD = "Qwerty123"
+MQTT_TLS = True  # HiveMQ Cloud requires TLS; local test brokers usually listen without it
+
+# Callbacks notified with every stored reading, e.g. alert_monitor's stream queue
+reading_listeners = []
+
+# When set, readings go to a sqlite_standin database instead of MySQL (local tests / benchmarks)
+sqlite_path = None
+
+# Errors of either database backend (MySQL, or the SQLite stand-in with --sqlite)
+DB_ERRORS = (mysql.connector.Error, sqlite_standin.Error)
+
+def use_broker(host, port, tls=True):
+    """Point the bridge at a different MQTT broker (e.g. a local one for load tests)."""
+    global MQTT_BROKER, MQTT_PORT, MQTT_TLS
+    MQTT_BROKER, MQTT_PORT, MQTT_TLS = host, port, tls
+
+def use_sqlite(path):
+    global sqlite_path
+    sqlite_path = path
 
 # ====== MySQL Connection ======
 def get_db_connection():
+    if sqlite_path:
+        return sqlite_standin.connect(sqlite_path)
     return mysql.connector.connect(**db_config)
 
 # ====== Insert Reading into Database ======
@@ -33,18 +57,51 @@ def insert_sensor_reading(sensor_id, reading_type, reading_value):
         INSERT INTO SensorReadings (sensor_id, reading_type, reading_value, reading_time)
         VALUES (%s, %s, %s, %s)
     """
-    values = (sensor_id, reading_type, reading_value, datetime.now())
+    reading_time = datetime.now()
+    values = (sensor_id, reading_type, reading_value, reading_time)
     
     try:
         cursor.execute(sql, values)
         conn.commit()
         print(f"✅ Inserted: Sensor {sensor_id}, Type {reading_type}, Value {reading_value}")
-    except mysql.connector.Error as err:
+        return {
+            'reading_id': cursor.lastrowid,
+            'sensor_id': sensor_id,
+            'reading_type': reading_type,
+            'reading_value': reading_value,
+            'reading_time': reading_time
+        }
+    except DB_ERRORS as err:
         print(f"❌ Database Error: {err}")
+        return None
     finally:
         cursor.close()
         conn.close()
 
+# ====== Payload Parsing ======
+def parse_payload(payload):
+    """Parse an ESP32 JSON payload into (sensor_id, reading_type, reading_value) tuples."""
+    data = json.loads(payload)
+    readings = []
+
+    # Loop through key-value pairs in the JSON
+    for key, value in data.items():
+        # Match pattern like: 1[temperature]
+        match = re.match(r"(\d+)\[(\w+)\]", key)
+        if match:
+            readings.append((int(match.group(1)), match.group(2), float(value)))
+        else:
+            print(f"⚠️ Skipping invalid key format: {key}")
+
+    return readings
+
+def notify_listeners(reading):
+    for listener in reading_listeners:
+        try:
+            listener(reading)
+        except Exception as e:
+            print(f"❌ Reading listener error: {e}")
+
 # ====== MQTT Handlers ======
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
@@ -57,35 +114,43 @@ def on_message(client, userdata, msg):
     try:
         payload = msg.payload.decode()
         print(f"📥 Received MQTT Message: {payload}")
-        data = json.loads(payload)
-
-        # Loop through key-value pairs in the JSON
-        for key, value in data.items():
-            # Match pattern like: 1[temperature]
-            match = re.match(r"(\d+)\[(\w+)\]", key)
-            if match:
-                sensor_id = int(match.group(1))
-                reading_type = match.group(2)
-                reading_value = float(value)
-                
-                insert_sensor_reading(sensor_id, reading_type, reading_value)
-            else:
-                print(f"⚠️ Skipping invalid key format: {key}")
+
+        for sensor_id, reading_type, reading_value in parse_payload(payload):
+            reading = insert_sensor_reading(sensor_id, reading_type, reading_value)
+            if reading:
+                notify_listeners(reading)
 
     except Exception as e:
         print(f"❌ Error processing message: {e}")
 
-# ====== Main ======
-if __name__ == "__main__":
+# ====== MQTT Client ======
+def create_client(on_message_handler=on_message):
     client = mqtt.Client()
     client.username_pw_set(MQTT_USER, MQTT_PASSWORD)  # <---- credentials added here
     
     # Enable TLS for secure connection to HiveMQ Cloud
-    client.tls_set(ca_certs=None, certfile=None, keyfile=None, cert_reqs=ssl.CERT_REQUIRED,
-                   tls_version=ssl.PROTOCOL_TLS, ciphers=None)
+    if MQTT_TLS:
+        client.tls_set(ca_certs=None, certfile=None, keyfile=None, cert_reqs=ssl.CERT_REQUIRED,
+                       tls_version=ssl.PROTOCOL_TLS, ciphers=None)
     
     client.on_connect = on_connect
-    client.on_message = on_message
+    client.on_message = on_message_handler
 
     client.connect(MQTT_BROKER, MQTT_PORT, 60)
+    return client
+
+# ====== Main ======
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MQTT-to-MySQL bridge for sensor readings")
+    parser.add_argument('--broker', default=MQTT_BROKER, help="MQTT broker host (e.g. localhost for load tests)")
+    parser.add_argument('--port', type=int, default=MQTT_PORT)
+    parser.add_argument('--no-tls', action='store_true', help="Connect without TLS (local brokers)")
+    parser.add_argument('--sqlite', metavar='PATH',
+                        help="Store readings in a local SQLite stand-in database (see sqlite_standin.py)")
+    args = parser.parse_args()
+    use_broker(args.broker, args.port, not args.no_tls)
+    if args.sqlite:
+        use_sqlite(args.sqlite)
+
+    client = create_client()
     client.loop_forever()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Columnar archive of SensorReadings (Parquet or Arrow IPC) for offline analysis.
+
+The exporter pages through SensorReadings by primary key after its own
+reading_id watermark, so each run only appends new readings and memory is
+bounded by EXPORT_PAGE_SIZE. Every page is split into hive-style partitions
+
+    <archive>/date=2026-03-14/sensor_group=0003/part-000001250001.parquet
+
+(sensor_group = sensor_id // SENSOR_GROUP_SIZE), so a day or a sensor's
+history can be read without touching the rest. File names carry the first
+reading_id of their page: re-exporting a page after a crash overwrites the
+same files instead of duplicating rows.
+
+The reader (iter_pages / read_table) serves offline replays of the
+alert_monitor logic: iter_pages yields rows in reading_id order, shaped like
+alert_monitor.fetch_recent_readings() pages, one archived page at a time.
+
+Usage:
+    python3 reading_archive.py export --out /data/archive
+    python3 reading_archive.py export --out /data/archive --format arrow --sqlite /tmp/monitor.db
+    python3 reading_archive.py info --out /data/archive
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# ========== ARCHIVE SETTINGS ==========
+EXPORT_PAGE_SIZE = 50000  # Readings fetched and written per step (bounds exporter memory)
+SENSOR_GROUP_SIZE = 100  # Sensors per sensor_group partition
+STATE_FILE = '_export_state.json'  # Exporter watermark, kept inside the archive directory
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+COMPRESSION = 'zstd'
+
+SCHEMA = pa.schema([
+    ('reading_id', pa.int64()),
+    ('sensor_id', pa.int32()),
+    ('observation_id', pa.int32()),  # IoTSensors mapping at export time (null for deleted sensors)
+    ('reading_type', pa.string()),
+    ('reading_value', pa.float64()),
+    ('reading_time', pa.timestamp('us')),
+])
+COLUMNS = SCHEMA.names
+PART_PATTERN = re.compile(r'part-(\d+)\.(parquet|arrow)$')
+
+
+# ========== EXPORT ==========
+
+def load_state(out_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'last_reading_id': 0}
+
+
+def save_state(out_dir: str, state: Dict[str, Any]):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({**state, 'saved_at': datetime.now().isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+def partition_dir(out_dir: str, day: date, sensor_id: int) -> str:
+    return os.path.join(out_dir, f'date={day.isoformat()}', f'sensor_group={sensor_id // SENSOR_GROUP_SIZE:04d}')
+
+
+def write_table(table: pa.Table, path: str, fmt: str):
+    """Write atomically, so readers never see a half-written file."""
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        pq.write_table(table, tmp_path, compression=COMPRESSION)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def write_page(out_dir: str, rows: List[tuple], fmt: str) -> int:
+    """Split one fetched page into its partitions. Returns the number of files written."""
+    columns = list(zip(*rows))
+    table = pa.table([
+        pa.array(columns[0], pa.int64()),
+        pa.array(columns[1], pa.int32()),
+        pa.array(columns[2], pa.int32()),
+        pa.array(columns[3], pa.string()),
+        pa.array([float(v) for v in columns[4]], pa.float64()),
+        pa.array(columns[5], pa.timestamp('us')),
+    ], schema=SCHEMA)
+
+    partitions: Dict[str, List[int]] = defaultdict(list)
+    for index, (sensor_id, reading_time) in enumerate(zip(columns[1], columns[5])):
+        partitions[partition_dir(out_dir, reading_time.date(), sensor_id)].append(index)
+
+    name = f'part-{rows[0][0]:012d}{FORMATS[fmt]}'
+    for directory, indices in partitions.items():
+        os.makedirs(directory, exist_ok=True)
+        write_table(table.take(indices), os.path.join(directory, name), fmt)
+    return len(partitions)
+
+
+def export(db, out_dir: str, fmt: str = 'parquet', until: Optional[int] = None) -> int:
+    """
+    Append every reading after the archive's watermark (up to reading_id `until`).
+    Returns the number of readings exported.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state = load_state(out_dir)
+    if state.get('format', fmt) != fmt:
+        raise ValueError(f"Archive {out_dir} is in {state['format']} format, not {fmt}")
+
+    watermark = state['last_reading_id']
+    total = 0
+    while True:
+        rows = db.query('archive_page', """
+            SELECT r.reading_id, r.sensor_id, s.observation_id, r.reading_type, r.reading_value, r.reading_time
+            FROM SensorReadings r
+            LEFT JOIN IoTSensors s ON r.sensor_id = s.sensor_id
+            WHERE r.reading_id > %s AND r.reading_id <= %s
+            ORDER BY r.reading_id ASC
+            LIMIT %s
+        """, (watermark, until if until is not None else 2**63 - 1, EXPORT_PAGE_SIZE), prepared=True)
+        if not rows:
+            break
+
+        files = write_page(out_dir, rows, fmt)
+        watermark = rows[-1][0]
+        save_state(out_dir, {'last_reading_id': watermark, 'format': fmt})
+        total += len(rows)
+        logger.info(f"📦 Archived {len(rows)} readings into {files} files (watermark {watermark})")
+        if len(rows) < EXPORT_PAGE_SIZE:
+            break
+    return total
+
+
+# ========== READ ==========
+
+def _read_file(path: str) -> pa.Table:
+    if path.endswith('.parquet'):
+        return pq.read_table(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def list_parts(archive_dir: str, since: Optional[date] = None, until: Optional[date] = None,
+               sensor_ids: Optional[Iterable[int]] = None) -> Dict[int, List[str]]:
+    """{first reading_id of page: [files]} for the partitions matching the filters."""
+    groups = {sid // SENSOR_GROUP_SIZE for sid in sensor_ids} if sensor_ids is not None else None
+    pages: Dict[int, List[str]] = defaultdict(list)
+    for date_dir in sorted(os.listdir(archive_dir)):
+        if not date_dir.startswith('date='):
+            continue
+        day = date.fromisoformat(date_dir[len('date='):])
+        if (since and day < since) or (until and day > until):
+            continue
+        for group_dir in sorted(os.listdir(os.path.join(archive_dir, date_dir))):
+            if groups is not None and int(group_dir[len('sensor_group='):]) not in groups:
+                continue
+            directory = os.path.join(archive_dir, date_dir, group_dir)
+            for name in os.listdir(directory):
+                match = PART_PATTERN.match(name)
+                if match:
+                    pages[int(match.group(1))].append(os.path.join(directory, name))
+    return pages
+
+
+def iter_pages(archive_dir: str, start_id: int = 0, end_id: Optional[int] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               sensor_ids: Optional[Iterable[int]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield archived readings in reading_id order, one exported page at a time,
+    as lists of dicts with the fetch_recent_readings() keys. Only the partitions
+    matching the date / sensor filters are read.
+    """
+    sensor_ids = set(sensor_ids) if sensor_ids is not None else None
+    pages = list_parts(archive_dir, since.date() if since else None, until.date() if until else None, sensor_ids)
+    first_ids = sorted(pages)
+    for index, first_id in enumerate(first_ids):
+        if end_id is not None and first_id > end_id:
+            break
+        if index + 1 < len(first_ids) and first_ids[index + 1] <= start_id:
+            continue  # Whole page is before start_id
+
+        table = pa.concat_tables(_read_file(path) for path in pages[first_id]).sort_by('reading_id')
+        rows = table.to_pylist()
+        rows = [row for row in rows
+                if row['reading_id'] > start_id
+                and (end_id is None or row['reading_id'] <= end_id)
+                and (since is None or row['reading_time'] >= since)
+                and (until is None or row['reading_time'] <= until)
+                and (sensor_ids is None or row['sensor_id'] in sensor_ids)]
+        if rows:
+            yield rows
+
+
+def read_table(archive_dir: str, columns: Optional[List[str]] = None, filter=None) -> pa.Table:
+    """
+    Load (part of) the archive as one Arrow table for analytics, e.g.
+    read_table(path, filter=ds.field('date') == '2026-03-14').
+    Partition columns 'date' and 'sensor_group' are available for filtering.
+    """
+    fmt = 'parquet' if load_state(archive_dir).get('format', 'parquet') == 'parquet' else 'ipc'
+    dataset = ds.dataset(archive_dir, format=fmt, partitioning='hive',
+                         exclude_invalid_files=True, ignore_prefixes=['_', '.'])
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def info(archive_dir: str):
+    state = load_state(archive_dir)
+    pages = list_parts(archive_dir)
+    files = [path for paths in pages.values() for path in paths]
+    dates = sorted({os.path.basename(os.path.dirname(os.path.dirname(path))) for path in files})
+    size = sum(os.path.getsize(path) for path in files)
+    rows = sum(pq.ParquetFile(path).metadata.num_rows if path.endswith('.parquet') else _read_file(path).num_rows
+               for path in files)
+    print(f"📦 {archive_dir}: {rows:,} readings, {len(files)} files, {size / 1e6:.1f} MB "
+          f"({state.get('format', 'parquet')}, watermark {state['last_reading_id']})")
+    if dates:
+        print(f"   {dates[0][len('date='):]} .. {dates[-1][len('date='):]} ({len(dates)} days)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar archive of sensor readings")
+    parser.add_argument('command', choices=['export', 'info'])
+    parser.add_argument('--out', required=True, metavar='DIR', help="Archive directory")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet')
+    parser.add_argument('--until', type=int, metavar='READING_ID', help="Stop exporting at this reading_id")
+    parser.add_argument('--sqlite', metavar='PATH',
+                        help="Export from a local SQLite stand-in database (see sqlite_standin.py) instead of MySQL")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'info':
+        info(args.out)
+    else:
+        from db_pool import connect_db
+
+        db = connect_db(args.sqlite, pool_size=1)
+        if not db:
+            logger.error("Failed to establish database connection. Exiting.")
+            exit(1)
+        try:
+            exported = export(db, args.out, args.format, args.until)
+            logger.info(f"✅ Exported {exported} readings to {args.out}")
+        finally:
+            db.log_stats()
+            db.close()
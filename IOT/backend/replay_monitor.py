@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Offline replay harness for the alert monitor.
+
+Feeds a recorded (reading_archive.py) or synthetic reading stream through the
+real alert_monitor evaluation as fast as possible, against a SQLite stand-in
+database (in memory by default), and reports throughput, alerts raised and
+time spent per stage.
+
+Debounce, dedup and cleanup run on virtual time: alert_monitor.clock follows
+the newest reading_time replayed, so a day of history replays in seconds and
+still debounces exactly like it did live.
+
+  --mode page    fetch-loop path: validate_page / store_batch /
+                 evaluate_page / flush_alerts per page.
+                 Pages are cut every --scan-interval seconds of virtual time,
+                 as the live loop would see them; 0 replays full
+                 FETCH_PAGE_SIZE pages, like a monitor catching up a backlog
+  --mode stream  event-driven path: check_and_store / evaluate_stored_reading
+                 per reading, alerts flushed once per page
+
+The synthetic stream injects poaching events (motion + sound spike) into a
+random subset of observations and reports how many were detected. A report
+saved with --json can be passed back as --baseline: the run fails if the
+alerts differ, which makes the harness usable as a regression test.
+
+Usage:
+    python3 replay_monitor.py --synthetic --observations 200 --hours 24
+    python3 replay_monitor.py --synthetic --mode stream --json baseline.json
+    python3 replay_monitor.py --synthetic --baseline baseline.json
+    python3 replay_monitor.py --archive /data/archive --since 2026-03-01 --until 2026-03-08
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+import alert_monitor as monitor
+from alert_rules import RULES_FILE
+from batch_eval import load_page, validate_page
+from sensor_state import READING_TYPES, SensorStateStore
+from signal_window import SignalWindow
+
+logger = logging.getLogger(__name__)
+
+# ========== REPLAY SETTINGS ==========
+REPLAY_PAGE_SIZE = monitor.FETCH_PAGE_SIZE
+CLEANUP_INTERVAL_SECONDS = 3600  # Virtual time between cleanup_old_data() calls, like the live loop
+
+# ========== SYNTHETIC STREAM ==========
+# Every observation has one sensor per reading type, reporting every SYNTHETIC_INTERVAL seconds
+SYNTHETIC_INTERVAL = 10
+SYNTHETIC_BASELINE = {  # (mean, noise std)
+    'temperature': (24.0, 0.3),
+    'humidity': (60.0, 1.0),
+    'motion': (0.0, 0.0),
+    'soil_moisture': (40.0, 0.5),
+    'sound': (45.0, 2.0),
+}
+SYNTHETIC_SOUND_SPIKE = 35.0  # dB added to the sound sensor during a poaching event
+
+
+class VirtualClock:
+    """Stands in for datetime.now in alert_monitor; follows the newest replayed reading_time."""
+
+    def __init__(self):
+        self.now = datetime.min
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, timestamp: datetime):
+        if timestamp > self.now:
+            self.now = timestamp
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+
+def synthetic_pages(observations: int, hours: float, events: int, seed: int = 0,
+                    start: Optional[datetime] = None):
+    """
+    Returns (pages iterator, injected observation ids). Readings are emitted in
+    time order, one round of every sensor per SYNTHETIC_INTERVAL.
+    """
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2026, 1, 1)
+    steps = int(hours * 3600 / SYNTHETIC_INTERVAL)
+    injected = rng.choice(np.arange(1, observations + 1), size=min(events, observations), replace=False)
+    event_step = dict(zip(injected.tolist(), rng.integers(steps // 10, max(steps - 1, steps // 10 + 1),
+                                                         len(injected)).tolist()))
+
+    types = READING_TYPES
+    means = np.array([SYNTHETIC_BASELINE[t][0] for t in types])
+    stds = np.array([SYNTHETIC_BASELINE[t][1] for t in types])
+    motion, sound = types.index('motion'), types.index('sound')
+
+    def pages() -> Iterator[List[Dict[str, Any]]]:
+        reading_id = 0
+        page: List[Dict[str, Any]] = []
+        for step in range(steps):
+            reading_time = start + timedelta(seconds=step * SYNTHETIC_INTERVAL)
+            values = np.round(means + rng.normal(0, 1, (observations, len(types))) * stds, 2)
+            for oid, event in event_step.items():
+                if step == event:
+                    values[oid - 1, motion] = 1
+                    values[oid - 1, sound] += SYNTHETIC_SOUND_SPIKE
+            for oid in range(1, observations + 1):
+                for code, rtype in enumerate(types):
+                    reading_id += 1
+                    page.append({
+                        'reading_id': reading_id,
+                        'sensor_id': (oid - 1) * len(types) + code + 1,
+                        'reading_type': rtype,
+                        'reading_value': float(values[oid - 1, code]),
+                        'reading_time': reading_time,
+                        'observation_id': oid,
+                    })
+                    if len(page) == REPLAY_PAGE_SIZE:
+                        yield page
+                        page = []
+        if page:
+            yield page
+
+    return pages(), set(event_step)
+
+
+def archive_pages(archive_dir: str, since: Optional[datetime], until: Optional[datetime]):
+    """Pages of a reading_archive.py export, re-split to REPLAY_PAGE_SIZE."""
+    from reading_archive import iter_pages
+
+    page: List[Dict[str, Any]] = []
+    for archived in iter_pages(archive_dir, since=since, until=until):
+        page.extend(archived)
+        while len(page) >= REPLAY_PAGE_SIZE:
+            yield page[:REPLAY_PAGE_SIZE]
+            page = page[REPLAY_PAGE_SIZE:]
+    if page:
+        yield page
+
+
+def scan_pages(pages: Iterable[List[Dict[str, Any]]], interval: float) -> Iterator[List[Dict[str, Any]]]:
+    """Re-cut pages into what each live fetch would return when polling every `interval` seconds."""
+    batch: List[Dict[str, Any]] = []
+    cutoff = None
+    for page in pages:
+        for reading in page:
+            if cutoff is None:
+                cutoff = reading['reading_time'] + timedelta(seconds=interval)
+            elif reading['reading_time'] >= cutoff or len(batch) == REPLAY_PAGE_SIZE:
+                yield batch
+                batch = []
+                cutoff = reading['reading_time'] + timedelta(seconds=interval)
+            batch.append(reading)
+    if batch:
+        yield batch
+
+
+def reset_monitor(clock: VirtualClock):
+    monitor.sensor_state = SensorStateStore()
+    monitor.signal_window = SignalWindow()
+    monitor.last_alert_time = {}
+    monitor.recent_alerts = {}
+    monitor.pending_alerts = []
+    monitor.last_reading_id = None
+    monitor.clock = clock
+
+
+def replay_page(db, page: List[Dict[str, Any]], mode: str, timer: StageTimer, clock: VirtualClock) -> int:
+    """Run one page through the monitor. Returns the number of valid readings."""
+    if mode == 'page':
+        with timer.stage('validate'):
+            valid = [row for row, ok in zip(page, validate_page(load_page(page)).tolist()) if ok]
+        if valid:
+            clock.advance(max(row['reading_time'] for row in valid))
+        with timer.stage('store'):
+            rows = monitor.store_batch(valid)
+        with timer.stage('evaluate'):
+            monitor.evaluate_page(rows)
+    else:
+        valid = []
+        store_seconds = evaluate_seconds = 0.0
+        for reading in page:
+            started = time.perf_counter()
+            stored = monitor.check_and_store(reading)
+            stored_at = time.perf_counter()
+            store_seconds += stored_at - started
+            if stored:
+                valid.append(reading)
+                clock.advance(reading['reading_time'])
+                monitor.evaluate_stored_reading(reading['sensor_id'])
+                evaluate_seconds += time.perf_counter() - stored_at
+        timer.seconds['store'] += store_seconds
+        timer.seconds['evaluate'] += evaluate_seconds
+
+    with timer.stage('flush'):
+        if not monitor.flush_alerts(db):
+            raise RuntimeError("Alert flush failed during replay")
+    return len(valid)
+
+
+def replay(db, pages: Iterable[List[Dict[str, Any]]], mode: str = 'page') -> Dict[str, Any]:
+    clock = VirtualClock()
+    reset_monitor(clock)
+    timer = StageTimer()
+    readings = valid = 0
+    last_cleanup: Optional[datetime] = None
+    first_alert_id = db.query('replay_alerts_start', "SELECT MAX(alert_id) FROM Alerts")[0][0] or 0
+
+    pages = iter(pages)
+    while True:
+        with timer.stage('source'):
+            page = next(pages, None)
+        if page is None:
+            break
+        readings += len(page)
+        valid += replay_page(db, page, mode, timer, clock)
+
+        if last_cleanup is None:
+            last_cleanup = clock.now
+        elif (clock.now - last_cleanup).total_seconds() >= CLEANUP_INTERVAL_SECONDS:
+            with timer.stage('cleanup'):
+                monitor.cleanup_old_data()
+            last_cleanup = clock.now
+
+    processing = sum(seconds for stage, seconds in timer.seconds.items() if stage != 'source')
+    alerts = db.query('replay_alerts', """
+        SELECT sensor_id, observation_id, alert_type, severity, description FROM Alerts
+        WHERE alert_id > %s ORDER BY alert_id
+    """, (first_alert_id,))
+    digest = hashlib.sha256(json.dumps(sorted(list(alert) for alert in alerts)).encode()).hexdigest()
+    return {
+        'mode': mode,
+        'readings': readings,
+        'valid_readings': valid,
+        'seconds': processing,
+        'readings_per_sec': readings / processing if processing else 0.0,
+        'alerts': dict(Counter(alert[2] for alert in alerts)),
+        'alerts_by_severity': dict(Counter(alert[3] for alert in alerts)),
+        'alert_digest': digest,
+        'poaching_observations': sorted({alert[1] for alert in alerts if alert[2] == 'poaching_alert'}),
+        'stages': {stage: {'seconds': seconds, 'share': seconds / processing if processing else 0.0}
+                   for stage, seconds in sorted(timer.seconds.items())},
+    }
+
+
+def print_report(report: Dict[str, Any], injected: Optional[Set[int]]):
+    print(f"▶️  Replayed {report['readings']:,} readings ({report['valid_readings']:,} valid) "
+          f"in {report['seconds']:.2f}s [{report['mode']} mode]: {report['readings_per_sec']:,.0f} readings/sec")
+    print(f"🚨 Alerts: {report['alerts'] or 'none'}  severities: {report['alerts_by_severity'] or 'none'}")
+    if injected is not None:
+        detected = injected & set(report['poaching_observations'])
+        unexpected = set(report['poaching_observations']) - injected
+        print(f"🎯 Injected poaching events detected: {len(detected)}/{len(injected)}, "
+              f"observations alerted without an event: {len(unexpected)}")
+    print(f"{'stage':<10}{'seconds':>10}{'share':>8}")
+    for stage, timing in report['stages'].items():
+        share = f"{timing['share']:.0%}" if stage != 'source' else '-'
+        print(f"{stage:<10}{timing['seconds']:>10.3f}{share:>8}")
+
+
+def compare_baseline(report: Dict[str, Any], path: str) -> bool:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline['alert_digest'] == report['alert_digest']:
+        print(f"✅ Alerts identical to baseline {path}")
+        return True
+    print(f"❌ Alerts differ from baseline {path}: {baseline['alerts']} -> {report['alerts']}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay reading streams through the alert monitor offline")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--synthetic', action='store_true', help="Generate a synthetic fleet stream")
+    source.add_argument('--archive', metavar='DIR', help="Replay a reading_archive.py export")
+    parser.add_argument('--mode', choices=['page', 'stream'], default='page')
+    parser.add_argument('--scan-interval', type=float, default=monitor.SCAN_INTERVAL,
+                        help="Page mode: virtual seconds per fetch (0 = full pages, backlog catch-up)")
+    parser.add_argument('--observations', type=int, default=100, help="Synthetic observations (5 sensors each)")
+    parser.add_argument('--hours', type=float, default=6, help="Synthetic stream length in virtual hours")
+    parser.add_argument('--events', type=int, default=10, help="Synthetic poaching events to inject")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Archive replay start (ISO date/time)")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="Archive replay end (ISO date/time)")
+    parser.add_argument('--rules', metavar='PATH', default=RULES_FILE, help="Detection rules file")
+    parser.add_argument('--db', metavar='PATH', default=':memory:',
+                        help="SQLite stand-in database receiving the alerts (default: in memory)")
+    parser.add_argument('--json', metavar='PATH', help="Write the report as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="Fail if alerts differ from this JSON report")
+    parser.add_argument('--verbose', action='store_true', help="Keep the monitor's per-alert logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        monitor.logger.setLevel(logging.WARNING)
+    monitor.use_rules_file(args.rules)
+    monitor.use_sqlite(args.db)
+    db = monitor.connect_db(pool_size=1)
+    if not db:
+        raise SystemExit("❌ Could not open the SQLite stand-in database")
+
+    injected = None
+    if args.synthetic:
+        pages, injected = synthetic_pages(args.observations, args.hours, args.events, args.seed)
+    else:
+        pages = archive_pages(args.archive, args.since, args.until)
+    if args.mode == 'page' and args.scan_interval > 0:
+        pages = scan_pages(pages, args.scan_interval)
+
+    try:
+        report = replay(db, pages, args.mode)
+    finally:
+        db.close()
+    if injected is not None:
+        report['injected_observations'] = sorted(injected)
+
+    print_report(report, injected)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline and not compare_baseline(report, args.baseline):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
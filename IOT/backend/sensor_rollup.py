@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Incremental downsampling of SensorReadings into SensorReadingRollups.
+
+Each run folds the readings after the job's reading_id watermark (RollupState)
+into per-sensor min / max / sum / count buckets at 1-minute and 1-hour
+resolution. Buckets are merged into existing rows with an upsert, so late
+readings for an already rolled-up bucket are simply added in. The rollups and
+the new watermark are written in one transaction: a crash never double-counts.
+
+Retention then compacts the history: raw readings older than RAW_RETENTION_DAYS
+(and already rolled up) and 1-minute rollups older than
+MINUTE_ROLLUP_RETENTION_DAYS are deleted in bounded reading_id / time chunks.
+Hourly rollups are kept. Dashboard history queries read the rollups instead
+of aggregating raw rows (GET /api/iot/sensors/:id/data/aggregate).
+
+Requires backend/sql/migrations/003_sensor_reading_rollups.sql.
+
+Usage:
+    python3 sensor_rollup.py                           # roll up every ROLLUP_INTERVAL seconds
+    python3 sensor_rollup.py --once                    # single pass (e.g. from cron)
+    python3 sensor_rollup.py --once --sqlite /tmp/monitor.db
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from db_pool import ConnectionPool, connect_db
+
+logger = logging.getLogger(__name__)
+
+# ========== ROLLUP SETTINGS ==========
+ROLLUP_JOB = 'sensor_rollup'  # RollupState.job_name
+ROLLUP_INTERVAL = 60  # seconds between passes
+ROLLUP_PAGE_SIZE = 20000  # Raw readings folded per transaction
+RESOLUTIONS = {
+    '1m': lambda t: t.replace(second=0, microsecond=0),
+    '1h': lambda t: t.replace(minute=0, second=0, microsecond=0),
+}
+
+# ========== RETENTION SETTINGS ==========
+RAW_RETENTION_DAYS = 30  # Raw readings older than this are deleted once rolled up
+MINUTE_ROLLUP_RETENTION_DAYS = 90  # '1m' buckets older than this are deleted; '1h' buckets are kept
+DELETE_CHUNK_SIZE = 10000  # reading_id span per raw DELETE, keeps each statement's locks short
+
+sqlite_path: Optional[str] = None  # When set, roll up a sqlite_standin database instead of MySQL
+
+UPSERT_MYSQL = """
+    INSERT INTO SensorReadingRollups
+        (sensor_id, resolution, bucket_start, reading_type, min_value, max_value, sum_value, reading_count)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        min_value = LEAST(min_value, VALUES(min_value)),
+        max_value = GREATEST(max_value, VALUES(max_value)),
+        sum_value = sum_value + VALUES(sum_value),
+        reading_count = reading_count + VALUES(reading_count)
+"""
+UPSERT_SQLITE = """
+    INSERT INTO SensorReadingRollups
+        (sensor_id, resolution, bucket_start, reading_type, min_value, max_value, sum_value, reading_count)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (sensor_id, resolution, bucket_start, reading_type) DO UPDATE SET
+        min_value = MIN(min_value, excluded.min_value),
+        max_value = MAX(max_value, excluded.max_value),
+        sum_value = sum_value + excluded.sum_value,
+        reading_count = reading_count + excluded.reading_count
+"""
+SAVE_STATE_MYSQL = """
+    INSERT INTO RollupState (job_name, last_reading_id) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE last_reading_id = VALUES(last_reading_id)
+"""
+SAVE_STATE_SQLITE = """
+    INSERT INTO RollupState (job_name, last_reading_id) VALUES (%s, %s)
+    ON CONFLICT (job_name) DO UPDATE SET last_reading_id = excluded.last_reading_id,
+        updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
+"""
+
+BucketKey = Tuple[int, str, datetime, str]  # (sensor_id, resolution, bucket_start, reading_type)
+
+
+def use_sqlite(path: str):
+    """Roll up a local SQLite stand-in database (testing / offline runs)."""
+    global sqlite_path
+    sqlite_path = path
+
+
+def open_db() -> Optional[ConnectionPool]:
+    return connect_db(sqlite_path, pool_size=1)
+
+
+def load_rollup_watermark(db: ConnectionPool) -> int:
+    rows = db.query('rollup_state', "SELECT last_reading_id FROM RollupState WHERE job_name = %s", (ROLLUP_JOB,))
+    return rows[0][0] if rows else 0
+
+
+def aggregate(readings: List[tuple]) -> Dict[BucketKey, List[float]]:
+    """Fold (sensor_id, reading_type, value, reading_time) rows into {bucket: [min, max, sum, count]}."""
+    buckets: Dict[BucketKey, List[float]] = {}
+    for sensor_id, rtype, value, reading_time in readings:
+        value = float(value)
+        for resolution, truncate in RESOLUTIONS.items():
+            key = (sensor_id, resolution, truncate(reading_time), rtype)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [value, value, value, 1]
+            else:
+                if value < bucket[0]:
+                    bucket[0] = value
+                if value > bucket[1]:
+                    bucket[1] = value
+                bucket[2] += value
+                bucket[3] += 1
+    return buckets
+
+
+def rollup_page(db: ConnectionPool, watermark: int) -> Tuple[int, int]:
+    """Roll up the next page after the watermark. Returns (readings folded, new watermark)."""
+    readings = db.query(
+        'rollup_fetch',
+        """
+        SELECT reading_id, sensor_id, reading_type, reading_value, reading_time
+        FROM SensorReadings
+        WHERE reading_id > %s
+        ORDER BY reading_id ASC
+        LIMIT %s
+        """,
+        (watermark, ROLLUP_PAGE_SIZE)
+    )
+    if not readings:
+        return 0, watermark
+
+    buckets = aggregate([row[1:] for row in readings])
+    new_watermark = readings[-1][0]
+    sqlite = bool(sqlite_path)
+    with db.transaction('rollup_upsert') as cursor:
+        cursor.executemany(UPSERT_SQLITE if sqlite else UPSERT_MYSQL,
+                           [(*key, *bucket) for key, bucket in buckets.items()])
+        cursor.execute(SAVE_STATE_SQLITE if sqlite else SAVE_STATE_MYSQL, (ROLLUP_JOB, new_watermark))
+    return len(readings), new_watermark
+
+
+def rollup(db: ConnectionPool) -> int:
+    """Fold every reading after the watermark into the rollups. Returns the number of readings folded."""
+    watermark = load_rollup_watermark(db)
+    total = 0
+    while True:
+        count, watermark = rollup_page(db, watermark)
+        total += count
+        if count < ROLLUP_PAGE_SIZE:
+            break
+    if total:
+        logger.info(f"📊 Rolled up {total} readings (watermark {watermark})")
+    return total
+
+
+def apply_retention(db: ConnectionPool) -> Tuple[int, int]:
+    """
+    Delete raw readings past RAW_RETENTION_DAYS that are already rolled up, and
+    1-minute rollups past MINUTE_ROLLUP_RETENTION_DAYS. Returns (raw, rollup) rows deleted.
+    """
+    watermark = load_rollup_watermark(db)
+    raw_cutoff = datetime.now() - timedelta(days=RAW_RETENTION_DAYS)
+    first_id, last_old_id = db.query(
+        'retention_range',
+        "SELECT MIN(reading_id), MAX(reading_id) FROM SensorReadings WHERE reading_time < %s",
+        (raw_cutoff,)
+    )[0]
+
+    raw_deleted = 0
+    if first_id is not None:
+        # Never delete readings the rollups haven't seen yet
+        end_id = min(last_old_id, watermark)
+        start_id = first_id - 1
+        while start_id < end_id:
+            chunk_end = min(start_id + DELETE_CHUNK_SIZE, end_id)
+            raw_deleted += db.executemany(
+                'retention_raw',
+                "DELETE FROM SensorReadings WHERE reading_id > %s AND reading_id <= %s AND reading_time < %s",
+                [(start_id, chunk_end, raw_cutoff)]
+            )
+            start_id = chunk_end
+
+    rollup_deleted = db.executemany(
+        'retention_rollup',
+        "DELETE FROM SensorReadingRollups WHERE resolution = '1m' AND bucket_start < %s",
+        [(datetime.now() - timedelta(days=MINUTE_ROLLUP_RETENTION_DAYS),)]
+    )
+    if raw_deleted or rollup_deleted:
+        logger.info(f"🧹 Retention: deleted {raw_deleted} raw readings, {rollup_deleted} 1-minute rollups")
+    return raw_deleted, rollup_deleted
+
+
+def run(once: bool = False, sqlite_path: str = None):
+    logger.info("📊 Starting sensor reading rollups...")
+    if sqlite_path:
+        use_sqlite(sqlite_path)
+    db = open_db()
+    if not db:
+        logger.error("Failed to establish initial database connection. Exiting.")
+        exit(1)
+
+    try:
+        while True:
+            if db is None or not db.check_health():
+                logger.warning("Database connection lost, attempting to reconnect...")
+                if db:
+                    db.close()
+                db = open_db()
+                if db is None:
+                    logger.error("Database connection lost and could not be re-established. Retrying in 30 seconds...")
+                    time.sleep(30)
+                    continue
+
+            try:
+                rollup(db)
+                apply_retention(db)
+            except Exception as e:
+                logger.error(f"Error in rollup pass: {e}")
+                if once:
+                    raise
+
+            if once:
+                break
+            time.sleep(ROLLUP_INTERVAL)
+
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Stopping rollups gracefully.")
+    finally:
+        if db:
+            db.log_stats()
+            db.close()
+            logger.info("Database connection closed.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Incremental sensor reading rollups and raw data retention")
+    parser.add_argument('--once', action='store_true', help="Run a single rollup + retention pass and exit")
+    parser.add_argument('--sqlite', metavar='PATH',
+                        help="Use a local SQLite stand-in database (see sqlite_standin.py) instead of MySQL")
+    args = parser.parse_args()
+    run(args.once, args.sqlite)
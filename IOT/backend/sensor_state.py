@@ -0,0 +1,231 @@
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Reading types are stored as small integer codes; order is part of the state layout
+READING_TYPES = ['temperature', 'humidity', 'motion', 'soil_moisture', 'sound']
+TYPE_CODES = {name: code for code, name in enumerate(READING_TYPES)}
+
+# ========== ROLLING STATISTICS ==========
+# Exponentially weighted mean/variance per sensor: O(1) memory and O(1) per update
+EWMA_ALPHA = 0.05  # Weight of the newest reading (~20-reading memory)
+STATS_WARMUP = 10  # Readings needed before z-scores are trusted
+STATS_MIN_STD = 0.5  # Std floor so perfectly flat sensors don't produce infinite z-scores
+
+
+class SensorSnapshot(NamedTuple):
+    """Read-only view of one sensor's latest state."""
+    sid: int
+    obs_id: int
+    type: str
+    value: float
+    time: float  # epoch seconds
+    delta: float
+    zscore: float  # Deviation of the latest value from the sensor's rolling mean, in std units
+    samples: int  # Readings folded into the rolling statistics (capped)
+
+
+class SensorStateStore:
+    """
+    Columnar store of the latest reading per sensor, indexed directly by sensor_id.
+
+    Sensor ids are dense AUTO_INCREMENT keys, so each field is a NumPy array slot
+    instead of a per-sensor dict, and TTL cleanup is a single vectorized mask.
+    Each sensor also carries an EWMA mean/variance; the z-score of every new
+    value is taken against the statistics *before* it is folded in.
+    observation_sensors is a secondary index from observation_id to its sensors.
+    """
+
+    __slots__ = ('_present', '_obs_id', '_type', '_value', '_time', '_delta',
+                 '_mean', '_var', '_zscore', '_samples', '_count', 'observation_sensors')
+    _COLUMNS = ('_present', '_obs_id', '_type', '_value', '_time', '_delta',
+                '_mean', '_var', '_zscore', '_samples')
+
+    def __init__(self, capacity: int = 1024):
+        self._present = np.zeros(capacity, dtype=bool)
+        self._obs_id = np.zeros(capacity, dtype=np.int32)
+        self._type = np.zeros(capacity, dtype=np.int8)
+        self._value = np.zeros(capacity, dtype=np.float64)
+        self._time = np.zeros(capacity, dtype=np.float64)
+        self._delta = np.zeros(capacity, dtype=np.float64)
+        self._mean = np.zeros(capacity, dtype=np.float64)
+        self._var = np.zeros(capacity, dtype=np.float64)
+        self._zscore = np.zeros(capacity, dtype=np.float64)
+        self._samples = np.zeros(capacity, dtype=np.int32)
+        self._count = 0
+        self.observation_sensors: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, sensor_id: int) -> bool:
+        return 0 <= sensor_id < len(self._present) and bool(self._present[sensor_id])
+
+    def _ensure_capacity(self, max_sensor_id: int):
+        capacity = len(self._present)
+        if max_sensor_id < capacity:
+            return
+        while capacity <= max_sensor_id:
+            capacity *= 2
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _index(self, sensor_id: int, obs_id: int, prev_obs_id: Optional[int]):
+        if prev_obs_id is not None and prev_obs_id != obs_id:
+            self._unindex(sensor_id, prev_obs_id)
+        self.observation_sensors.setdefault(obs_id, set()).add(sensor_id)
+
+    def _unindex(self, sensor_id: int, obs_id: int):
+        sensors = self.observation_sensors.get(obs_id)
+        if sensors is not None:
+            sensors.discard(sensor_id)
+            if not sensors:
+                del self.observation_sensors[obs_id]
+
+    def get(self, sensor_id: int) -> Optional[SensorSnapshot]:
+        if sensor_id not in self:
+            return None
+        return SensorSnapshot(
+            sensor_id,
+            int(self._obs_id[sensor_id]),
+            READING_TYPES[self._type[sensor_id]],
+            float(self._value[sensor_id]),
+            float(self._time[sensor_id]),
+            float(self._delta[sensor_id]),
+            float(self._zscore[sensor_id]),
+            int(self._samples[sensor_id])
+        )
+
+    def group(self, obs_id: int) -> List[SensorSnapshot]:
+        """Latest state of every sensor in an observation, ordered by sensor_id."""
+        return [self.get(sid) for sid in sorted(self.observation_sensors.get(obs_id, ()))]
+
+    def columns(self, sensor_ids: np.ndarray):
+        """(obs_id, type_code, value, delta, zscore, samples, time) arrays for the given present sensors."""
+        return (self._obs_id[sensor_ids], self._type[sensor_ids], self._value[sensor_ids],
+                self._delta[sensor_ids], self._zscore[sensor_ids], self._samples[sensor_ids],
+                self._time[sensor_ids])
+
+    @staticmethod
+    def _fold(present, value, mean, var, samples):
+        """One EWMA step (works on scalars and arrays): returns (zscore, mean, var, samples)."""
+        std = np.maximum(np.sqrt(var), STATS_MIN_STD)
+        diff = value - mean
+        zscore = np.where(present, diff / std, 0.0)
+        new_mean = np.where(present, mean + EWMA_ALPHA * diff, value)
+        new_var = np.where(present, (1 - EWMA_ALPHA) * (var + EWMA_ALPHA * diff * diff), 0.0)
+        new_samples = np.where(present, np.minimum(samples + 1, np.iinfo(np.int32).max), 1)
+        return zscore, new_mean, new_var, new_samples
+
+    def update(self, sensor_id: int, obs_id: int, reading_type: str, value: float, timestamp: float) -> float:
+        """Store one reading and return its delta against the sensor's previous value."""
+        self._ensure_capacity(sensor_id)
+        present = bool(self._present[sensor_id])
+        delta = abs(value - self._value[sensor_id]) if present else 0.0
+
+        self._index(sensor_id, obs_id, int(self._obs_id[sensor_id]) if present else None)
+        if not present:
+            self._present[sensor_id] = True
+            self._count += 1
+        self._obs_id[sensor_id] = obs_id
+        (self._zscore[sensor_id], self._mean[sensor_id],
+         self._var[sensor_id], self._samples[sensor_id]) = self._fold(
+            present, value, self._mean[sensor_id], self._var[sensor_id], self._samples[sensor_id])
+        self._type[sensor_id] = TYPE_CODES[reading_type]
+        self._value[sensor_id] = value
+        self._time[sensor_id] = timestamp
+        self._delta[sensor_id] = delta
+        return float(delta)
+
+    def update_batch(self, sensor_ids: np.ndarray, obs_ids: np.ndarray, type_codes: np.ndarray,
+                     values: np.ndarray, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Apply a batch of readings (in arrival order) and return per-row (delta, zscore, samples),
+        i.e. what get() would have reported right after each row's update().
+
+        Equivalent to calling update() row by row: a sensor appearing k times in the
+        batch is applied in k vectorized rounds, one occurrence per round.
+        """
+        row_delta = np.zeros(len(sensor_ids), dtype=np.float64)
+        row_zscore = np.zeros(len(sensor_ids), dtype=np.float64)
+        row_samples = np.zeros(len(sensor_ids), dtype=np.int32)
+        if len(sensor_ids) == 0:
+            return row_delta, row_zscore, row_samples
+        self._ensure_capacity(int(sensor_ids.max()))
+
+        # Occurrence rank of each row within its sensor, preserving arrival order
+        order = np.argsort(sensor_ids, kind='stable')
+        sorted_ids = sensor_ids[order]
+        starts = np.r_[0, np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1]
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(sorted_ids)]))
+        rank = np.empty(len(sensor_ids), dtype=np.int64)
+        rank[order] = np.arange(len(sorted_ids)) - group_start
+
+        for r in range(int(rank.max()) + 1):
+            rows = np.flatnonzero(rank == r)
+            sids = sensor_ids[rows]
+            new_obs = obs_ids[rows]
+            present = self._present[sids]
+
+            # Index maintenance only for new sensors or sensors that moved observation
+            moved = ~present | (self._obs_id[sids] != new_obs)
+            for sid, obs_id, was_present in zip(sids[moved].tolist(), new_obs[moved].tolist(),
+                                                present[moved].tolist()):
+                self._index(sid, obs_id, int(self._obs_id[sid]) if was_present else None)
+
+            self._delta[sids] = np.where(present, np.abs(values[rows] - self._value[sids]), 0.0)
+            (self._zscore[sids], self._mean[sids],
+             self._var[sids], self._samples[sids]) = self._fold(
+                present, values[rows], self._mean[sids], self._var[sids], self._samples[sids])
+            self._count += int((~present).sum())
+            self._present[sids] = True
+            self._obs_id[sids] = new_obs
+            self._type[sids] = type_codes[rows]
+            self._value[sids] = values[rows]
+            self._time[sids] = timestamps[rows]
+            row_delta[rows] = self._delta[sids]
+            row_zscore[rows] = self._zscore[sids]
+            row_samples[rows] = self._samples[sids]
+
+        return row_delta, row_zscore, row_samples
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Compact copy of every present sensor's columns, keyed by column name (for snapshots)."""
+        sids = np.flatnonzero(self._present)
+        arrays = {name.lstrip('_'): getattr(self, name)[sids] for name in self._COLUMNS if name != '_present'}
+        arrays['sid'] = sids
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'SensorStateStore':
+        """Rebuild a store (and its observation index) from to_arrays() output."""
+        sids = np.asarray(arrays['sid'], dtype=np.int64)
+        store = cls()
+        if len(sids):
+            store._ensure_capacity(int(sids.max()))
+        for name in cls._COLUMNS:
+            if name != '_present':
+                getattr(store, name)[sids] = arrays[name.lstrip('_')]
+        store._present[sids] = True
+        store._count = len(sids)
+        for sid, obs_id in zip(sids.tolist(), store._obs_id[sids].tolist()):
+            store.observation_sensors.setdefault(obs_id, set()).add(sid)
+        return store
+
+    def remove_observation(self, obs_id: int) -> int:
+        """Drop every sensor of an observation (e.g. when it moves to another shard)."""
+        sids = np.fromiter(self.observation_sensors.pop(obs_id, ()), dtype=np.int64)
+        self._present[sids] = False
+        self._count -= len(sids)
+        return len(sids)
+
+    def remove_older_than(self, cutoff: float) -> int:
+        """Drop sensors whose latest reading is older than cutoff (epoch seconds)."""
+        stale = np.flatnonzero(self._present & (self._time < cutoff))
+        for sid, obs_id in zip(stale.tolist(), self._obs_id[stale].tolist()):
+            self._unindex(sid, obs_id)
+        self._present[stale] = False
+        self._count -= len(stale)
+        return len(stale)
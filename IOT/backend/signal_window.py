@@ -0,0 +1,73 @@
+import heapq
+from typing import Dict, List, Tuple
+
+
+class SignalWindow:
+    """
+    Suspicious signals per observation inside a sliding event-time window.
+
+    Each sensor contributes at most its newest signal. Signals expire once the
+    clock (newest reading time seen) passes their time + window; expiry pops a
+    min-heap ordered by expiry time, so it costs O(log n) per signal instead of
+    rescanning every observation. Superseded heap entries are skipped lazily.
+    """
+
+    __slots__ = ('_signals', '_heap', 'clock')
+
+    def __init__(self):
+        self._signals: Dict[int, Dict[int, Tuple[float, str]]] = {}  # {obs_id: {sensor_id: (time, description)}}
+        self._heap: List[Tuple[float, int, int, float]] = []  # (expires_at, obs_id, sensor_id, time)
+        self.clock = float('-inf')
+
+    def __len__(self) -> int:
+        return sum(len(signals) for signals in self._signals.values())
+
+    def advance(self, timestamp: float):
+        """Move the clock forward to a newly seen reading time and expire old signals."""
+        if timestamp <= self.clock:
+            return
+        self.clock = timestamp
+        heap = self._heap
+        while heap and heap[0][0] <= timestamp:
+            _, obs_id, sensor_id, signal_time = heapq.heappop(heap)
+            signals = self._signals.get(obs_id)
+            if signals is not None and signals.get(sensor_id, (None,))[0] == signal_time:
+                del signals[sensor_id]
+                if not signals:
+                    del self._signals[obs_id]
+
+    def record(self, obs_id: int, sensor_id: int, timestamp: float, window: float, description: str) -> bool:
+        """Add a sensor's signal; ignored if already outside the window or older than its current one."""
+        if timestamp + window <= self.clock:
+            return False
+        signals = self._signals.setdefault(obs_id, {})
+        current = signals.get(sensor_id)
+        if current is not None and current[0] >= timestamp:
+            return False
+        signals[sensor_id] = (timestamp, description)
+        heapq.heappush(self._heap, (timestamp + window, obs_id, sensor_id, timestamp))
+        return True
+
+    def active(self, obs_id: int) -> List[str]:
+        """Descriptions of the observation's signals still in the window, ordered by sensor_id."""
+        signals = self._signals.get(obs_id, {})
+        return [signals[sid][1] for sid in sorted(signals)]
+
+    def remove_observation(self, obs_id: int) -> int:
+        """Drop an observation's signals (their heap entries are skipped when popped)."""
+        return len(self._signals.pop(obs_id, {}))
+
+    def to_list(self) -> List[list]:
+        """[[obs_id, sensor_id, time, expires_at, description], ...] for snapshots."""
+        expiry = {(obs_id, sid, t): expires_at for expires_at, obs_id, sid, t in self._heap}
+        return [[obs_id, sid, t, expiry[(obs_id, sid, t)], description]
+                for obs_id, signals in self._signals.items()
+                for sid, (t, description) in signals.items()]
+
+    @classmethod
+    def from_list(cls, entries: List[list], clock: float) -> 'SignalWindow':
+        window = cls()
+        window.clock = clock
+        for obs_id, sid, t, expires_at, description in entries:
+            window.record(obs_id, sid, t, expires_at - t, description)
+        return window
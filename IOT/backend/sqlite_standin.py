@@ -0,0 +1,159 @@
+"""
+SQLite stand-in for the MySQL database used by the IoT backend.
+
+Exposes the small subset of the mysql.connector connection/cursor API that
+alert_monitor.py and mqtt_to_mysql.py use (cursor(dictionary=...), %s
+placeholders, executemany, lastrowid, commit/rollback, is_connected), with
+the IoTSensors / SensorReadings / Alerts (and rollup) tables from backend/sql/init.sql.
+Intended for local testing, sharding experiments and offline replays only.
+"""
+
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+Error = sqlite3.Error  # Base class of the stand-in's database errors (cf. mysql.connector.Error)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS IoTSensors (
+    sensor_id INTEGER PRIMARY KEY,
+    sensor_name TEXT NOT NULL DEFAULT '',
+    location_description TEXT,
+    observation_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'active'
+);
+
+CREATE TABLE IF NOT EXISTS SensorReadings (
+    reading_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sensor_id INTEGER NOT NULL,
+    reading_type TEXT NOT NULL,
+    reading_value REAL NOT NULL,
+    reading_time DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sensor_readings_time ON SensorReadings(reading_time);
+CREATE INDEX IF NOT EXISTS idx_sensor_readings_sensor_time ON SensorReadings(sensor_id, reading_time);
+
+CREATE TABLE IF NOT EXISTS Alerts (
+    alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sensor_id INTEGER,
+    observation_id INTEGER,
+    alert_type TEXT NOT NULL,
+    severity TEXT DEFAULT 'low',
+    score REAL,
+    description TEXT,
+    resolved INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_observation_type_created ON Alerts(observation_id, alert_type, created_at);
+
+CREATE TABLE IF NOT EXISTS SensorReadingRollups (
+    sensor_id INTEGER NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    reading_type TEXT NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    sum_value REAL NOT NULL,
+    reading_count INTEGER NOT NULL,
+    PRIMARY KEY (sensor_id, resolution, bucket_start, reading_type)
+);
+
+CREATE TABLE IF NOT EXISTS RollupState (
+    job_name TEXT PRIMARY KEY,
+    last_reading_id INTEGER NOT NULL,
+    updated_at DATETIME DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+"""
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+class StandinCursor:
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @staticmethod
+    def _translate(sql: str) -> str:
+        return sql.replace('%s', '?')
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._translate(sql), [tuple(p) for p in seq_of_params])
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandinConnection:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._open = True
+
+    def cursor(self, dictionary: bool = False, prepared: bool = False) -> StandinCursor:
+        return StandinCursor(self._conn.cursor(), dictionary)
+
+    def start_transaction(self):
+        self._conn.execute('BEGIN')
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self) -> bool:
+        return self._open
+
+    def ping(self, reconnect: bool = False, attempts: int = 1, delay: int = 0):
+        self._conn.execute('SELECT 1')
+
+    def close(self):
+        self._open = False
+        self._conn.close()
+
+
+def connect(path: str = ':memory:') -> StandinConnection:
+    """Open (and initialise the schema of) a SQLite stand-in database."""
+    return StandinConnection(path)
+
+
+def register_sensors(conn: StandinConnection, sensor_observations: dict):
+    """Create IoTSensors rows for {sensor_id: observation_id}."""
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT OR REPLACE INTO IoTSensors (sensor_id, sensor_name, observation_id) VALUES (%s, %s, %s)",
+        [(sid, f'sensor-{sid}', oid) for sid, oid in sensor_observations.items()]
+    )
+    conn.commit()
+    cursor.close()
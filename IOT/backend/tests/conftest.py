@@ -0,0 +1,44 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Configure logging first, so the scripts' basicConfig doesn't append to their tracked log files
+logging.basicConfig(level=logging.INFO)
+
+import alert_monitor  # noqa: E402
+from alert_rules import RuleLoader  # noqa: E402
+from sensor_state import SensorStateStore  # noqa: E402
+from signal_window import SignalWindow  # noqa: E402
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """alert_monitor with fresh module state, the built-in rules and files under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        'sensor_state': SensorStateStore(),
+        'signal_window': SignalWindow(),
+        'last_alert_time': {},
+        'recent_alerts': {},
+        'pending_alerts': [],
+        'last_reading_id': None,
+        'db': None,
+        'sqlite_path': str(tmp_path / 'monitor.db'),
+        'rule_loader': RuleLoader(str(tmp_path / 'alert_rules.json')),
+        'clock': alert_monitor.clock,
+        'WATERMARK_FILE': str(tmp_path / 'alert_monitor.watermark'),
+        'SNAPSHOT_FILE': str(tmp_path / 'alert_monitor.snapshot.npz'),
+    }.items():
+        monkeypatch.setattr(alert_monitor, name, value)
+    return alert_monitor
+
+
+@pytest.fixture
+def db(monitor):
+    pool = monitor.connect_db(pool_size=1)
+    assert pool is not None
+    yield pool
+    pool.close()
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+import sqlite_standin
+
+
+def test_sqlite_database_error_is_handled_like_a_mysql_one(monitor, db, monkeypatch):
+    monkeypatch.setattr(monitor, 'sensor_observations', {})
+    monkeypatch.setattr(monitor, 'sensor_map_loaded_at', None)
+    conn = sqlite_standin.connect(monitor.sqlite_path)
+    conn.cursor().execute("DROP TABLE IoTSensors")
+    conn.close()
+
+    assert monitor.load_sensor_observations(db) is False
+    assert monitor.resolve_observation(db, 1) is None
+
+
+def test_quiet_sensor_does_not_re_alert_when_its_neighbours_report(monitor, db, monkeypatch):
+    now = [datetime(2025, 6, 1, 12, 0)]
+    monkeypatch.setattr(monitor, 'clock', lambda: now[0])
+
+    def stream(sensor_id, rtype, value):
+        monitor.process_stream_reading(db, {'sensor_id': sensor_id, 'observation_id': 1, 'reading_type': rtype,
+                                            'reading_value': value, 'reading_time': now[0]})
+
+    stream(1, 'humidity', 50.0)
+    stream(1, 'humidity', 90.0)  # One spike, then the humidity sensor goes quiet
+    # The temperature sensor keeps reporting well past the abnormal debounce and dedup windows
+    for _ in range(2 * (monitor.DEDUP_WINDOW_MINUTES + monitor.ABNORMAL_DEBOUNCE_MINUTES)):
+        now[0] += timedelta(minutes=1)
+        stream(2, 'temperature', 24.0)
+
+    assert [alert[:3] for alert in monitor.pending_alerts] == [(1, 1, 'abnormal_sensor')]
@@ -0,0 +1,16 @@
+import db_pool
+import fleet_simulator
+
+
+def test_register_can_be_repeated(tmp_path):
+    path = str(tmp_path / 'fleet.db')
+    devices = fleet_simulator.build_fleet(10, 2, 1, 1, 0)
+
+    fleet_simulator.register_sensors(devices, path)
+    fleet_simulator.register_sensors(devices, path)
+
+    db = db_pool.connect_db(path, pool_size=1)
+    try:
+        assert db.query('test_sensors', "SELECT COUNT(*) FROM IoTSensors")[0][0] == 10
+    finally:
+        db.close()
@@ -0,0 +1,133 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import monitor_shards
+import sqlite_standin
+from monitor_shards import HashRing, ShardCoordinator
+from sensor_state import READING_TYPES
+
+OBSERVATIONS = 8
+
+
+def insert_readings(path, rows):
+    conn = sqlite_standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO SensorReadings (sensor_id, reading_type, reading_value, reading_time) VALUES (%s, %s, %s, %s)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def sensor_id(oid, rtype):
+    return (oid - 1) * len(READING_TYPES) + READING_TYPES.index(rtype) + 1
+
+
+def baseline(oids, at):
+    return [(sensor_id(oid, rtype), rtype, value, at)
+            for oid in oids for rtype, value in (('motion', 0), ('sound', 45.0))]
+
+
+def poaching_event(oids, at):
+    return [(sensor_id(oid, rtype), rtype, value, at)
+            for oid in oids for rtype, value in (('motion', 1), ('sound', 80.0))]
+
+
+def poaching_alerts(db):
+    return [tuple(row) for row in db.query('test_alerts', """
+        SELECT observation_id, alert_id FROM Alerts WHERE alert_type = 'poaching_alert' ORDER BY alert_id
+    """)]
+
+
+@pytest.fixture
+def fleet(monitor, db):
+    conn = sqlite_standin.connect(monitor.sqlite_path)
+    sqlite_standin.register_sensors(conn, {sensor_id(oid, rtype): oid for oid in range(1, OBSERVATIONS + 1)
+                                           for rtype in READING_TYPES})
+    conn.close()
+    return monitor.sqlite_path
+
+
+@pytest.fixture
+def coordinator_factory(monitor):
+    coordinators = []
+
+    def create(workers):
+        coordinator = ShardCoordinator(workers, monitor.sqlite_path)
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield create
+    for coordinator in coordinators:
+        coordinator.stop()
+
+
+def test_failed_shard_page_is_redelivered_not_skipped(monitor, db, fleet, coordinator_factory, monkeypatch,
+                                                      tmp_path):
+    now = datetime.now()
+    oids = range(1, OBSERVATIONS + 1)
+    insert_readings(fleet, baseline(oids, now - timedelta(seconds=20)) + poaching_event(oids, now))
+
+    # The first shard to handle a page cannot reach the database (shard processes are forked after this)
+    fail_flag = tmp_path / 'fail-once'
+    fail_flag.touch()
+    ensure_connection = monitor.ensure_connection
+
+    def flaky_connection():
+        try:
+            os.remove(fail_flag)
+            return False
+        except FileNotFoundError:
+            return ensure_connection()
+
+    monkeypatch.setattr(monitor, 'ensure_connection', flaky_connection)
+    coordinator = coordinator_factory(2)
+
+    assert not coordinator.poll(db)
+    assert coordinator.undelivered
+    assert monitor.load_watermark() is None
+    alerted = {oid for oid, _ in poaching_alerts(db)}
+    assert alerted and alerted != set(oids)
+
+    assert coordinator.poll(db)
+    assert not coordinator.undelivered
+    assert monitor.load_watermark() == monitor.last_reading_id
+    assert sorted(oid for oid, _ in poaching_alerts(db)) == list(oids)  # Each observation alerted exactly once
+
+
+def test_redelivered_page_is_not_applied_twice(monitor, db, fleet, coordinator_factory, monkeypatch):
+    # No debounce / dedup, so re-evaluating the readings would raise the alert again
+    monkeypatch.setattr(monitor, 'DEBOUNCE_MINUTES', 0)
+    monkeypatch.setattr(monitor, 'DEDUP_WINDOW_MINUTES', 0)
+    now = datetime.now()
+    insert_readings(fleet, baseline([1], now - timedelta(seconds=20)) + poaching_event([1], now))
+    coordinator = coordinator_factory(1)
+
+    assert coordinator.poll(db)
+    alerts = len(poaching_alerts(db))
+    assert alerts
+
+    # A shard that acknowledged too late: the coordinator sends the same readings again
+    assert coordinator.dispatch(monitor_shards.fetch_history(db, {1}, 10))
+    assert len(poaching_alerts(db)) == alerts
+
+
+def test_resize_moves_debounce_state_with_the_observation(monitor, db, fleet, coordinator_factory):
+    moving = next(oid for oid in range(1, OBSERVATIONS + 1)
+                  if HashRing(['shard-0', 'shard-1']).owner(oid) == 'shard-1')
+    now = datetime.now()
+    insert_readings(fleet, baseline([moving], now - timedelta(seconds=40)) +
+                    poaching_event([moving], now - timedelta(seconds=30)))
+    coordinator = coordinator_factory(1)
+    assert coordinator.poll(db)
+    assert len(poaching_alerts(db)) == 1
+
+    coordinator.resize(2, db)
+    assert coordinator.ring.owner(moving) == 'shard-1'
+
+    # Calm, then a second event well inside DEBOUNCE_MINUTES: the new owner must stay quiet
+    insert_readings(fleet, baseline([moving], now - timedelta(seconds=20)) + poaching_event([moving], now))
+    assert coordinator.poll(db)
+    assert len(poaching_alerts(db)) == 1
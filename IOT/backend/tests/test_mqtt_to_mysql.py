@@ -0,0 +1,27 @@
+import pytest
+
+import mqtt_to_mysql
+import sqlite_standin
+
+
+@pytest.fixture
+def bridge_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bridge.db')
+    monkeypatch.setattr(mqtt_to_mysql, 'sqlite_path', path)
+    return path
+
+
+def test_sqlite_insert_returns_the_stored_reading(bridge_db):
+    reading = mqtt_to_mysql.insert_sensor_reading(3, 'sound', 61.5)
+    assert reading['reading_id'] == 1
+    assert reading['reading_value'] == 61.5
+
+
+def test_sqlite_database_error_is_handled_like_a_mysql_one(bridge_db):
+    conn = sqlite_standin.connect(bridge_db)
+    conn.cursor().execute("""
+        CREATE TRIGGER reject_readings BEFORE INSERT ON SensorReadings BEGIN SELECT RAISE(ABORT, 'disk full'); END
+    """)
+    conn.close()
+
+    assert mqtt_to_mysql.insert_sensor_reading(3, 'sound', 61.5) is None
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import reading_archive
+import sqlite_standin
+
+BACKEND = Path(reading_archive.__file__).parent
+
+
+def test_export_cli_keeps_out_of_the_monitor_log(tmp_path):
+    conn = sqlite_standin.connect(str(tmp_path / 'readings.db'))
+    conn.cursor().executemany("""
+        INSERT INTO SensorReadings (sensor_id, reading_type, reading_value, reading_time) VALUES (%s, %s, %s, %s)
+    """, [(1, 'sound', 40.0 + i, datetime(2025, 6, 1, 12) + timedelta(minutes=i)) for i in range(5)])
+    conn.commit()
+    conn.close()
+
+    subprocess.run([sys.executable, str(BACKEND / 'reading_archive.py'), 'export', '--out', 'archive',
+                    '--sqlite', 'readings.db'], cwd=tmp_path, check=True, capture_output=True)
+
+    assert sum(len(page) for page in reading_archive.iter_pages(str(tmp_path / 'archive'))) == 5
+    assert not (tmp_path / 'alert_monitor.log').exists()
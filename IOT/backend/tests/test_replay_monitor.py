@@ -0,0 +1,49 @@
+import pytest
+
+import replay_monitor
+from replay_monitor import scan_pages, synthetic_pages
+
+OBSERVATIONS = 50
+HOURS = 2
+EVENTS = 10
+
+
+def replay_synthetic(db, seed, scan_interval=0):
+    pages, injected = synthetic_pages(OBSERVATIONS, HOURS, EVENTS, seed)
+    if scan_interval:
+        pages = scan_pages(pages, scan_interval)
+    return replay_monitor.replay(db, pages), injected
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_backlog_page_detects_every_injected_event(monitor, db, seed):
+    report, injected = replay_synthetic(db, seed)
+
+    assert set(report['poaching_observations']) == injected
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_one_large_page_alerts_like_small_scan_pages(monitor, db, seed):
+    backlog, _ = replay_synthetic(db, seed)
+    live, _ = replay_synthetic(db, seed, scan_interval=monitor.SCAN_INTERVAL)
+
+    assert backlog['readings'] == live['readings']
+    assert backlog['alert_digest'] == live['alert_digest']
+
+
+def test_scalar_and_vectorized_page_evaluation_agree(monitor, db, monkeypatch):
+    vectorized, _ = replay_synthetic(db, seed=1)
+    monkeypatch.setattr(monitor, 'BATCH_EVAL_MIN_ROWS', replay_monitor.REPLAY_PAGE_SIZE + 1)
+    scalar, _ = replay_synthetic(db, seed=1)
+
+    assert scalar['alerts'] == vectorized['alerts']
+    assert scalar['alert_digest'] == vectorized['alert_digest']
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_stream_mode_alerts_like_page_mode(monitor, db, seed):
+    pages, _ = synthetic_pages(OBSERVATIONS, HOURS, EVENTS, seed)
+    stream = replay_monitor.replay(db, pages, mode='stream')
+    page, _ = replay_synthetic(db, seed)
+
+    assert stream['alert_digest'] == page['alert_digest']
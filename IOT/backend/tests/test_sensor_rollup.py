@@ -0,0 +1,62 @@
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+import db_pool
+import sensor_rollup
+import sqlite_standin
+
+START = datetime(2025, 6, 1, 12, 0)
+
+
+def insert_readings(path, rows):
+    conn = sqlite_standin.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO SensorReadings (sensor_id, reading_type, reading_value, reading_time) VALUES (%s, %s, %s, %s)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def rollups(db, resolution):
+    return [tuple(row) for row in db.query('test_rollups', """
+        SELECT sensor_id, bucket_start, reading_type, min_value, max_value, sum_value, reading_count
+        FROM SensorReadingRollups WHERE resolution = %s ORDER BY sensor_id, bucket_start
+    """, (resolution,))]
+
+
+@pytest.fixture
+def rollup_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'rollup.db')
+    monkeypatch.setattr(sensor_rollup, 'sqlite_path', path)
+    pool = db_pool.connect_db(path, pool_size=1)
+    yield path, pool
+    pool.close()
+
+
+def test_rollup_is_incremental_and_idempotent(rollup_db):
+    path, db = rollup_db
+    insert_readings(path, [(1, 'temperature', 20.0 + i, START + timedelta(seconds=20 * i)) for i in range(6)])
+
+    assert sensor_rollup.rollup(db) == 6
+    first = rollups(db, '1m')
+    assert [row[-1] for row in first] == [3, 3]
+    assert sensor_rollup.rollup(db) == 0  # Nothing past the watermark: no double counting
+    assert rollups(db, '1m') == first
+
+    # A late reading for an already rolled-up bucket is merged in
+    insert_readings(path, [(1, 'temperature', 5.0, START + timedelta(seconds=30))])
+    assert sensor_rollup.rollup(db) == 1
+    assert rollups(db, '1m')[0][3:] == (5.0, 22.0, 68.0, 4)
+    assert rollups(db, '1h')[0][3:] == (5.0, 25.0, 140.0, 7)
+
+
+def test_rollup_does_not_load_the_alert_monitor():
+    # alert_monitor configures logging to its own log file and holds the monitor's global state
+    backend = Path(sensor_rollup.__file__).parent
+    subprocess.run([sys.executable, '-c', "import sys, sensor_rollup; assert 'alert_monitor' not in sys.modules"],
+                   cwd=backend, check=True)
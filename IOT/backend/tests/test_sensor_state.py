@@ -0,0 +1,41 @@
+import numpy as np
+
+from sensor_state import READING_TYPES, SensorStateStore
+
+
+def random_batch(rng, rows, sensors=20):
+    sensor_ids = rng.integers(1, sensors + 1, rows)
+    return (sensor_ids, sensor_ids // 5 + 1, (sensor_ids % len(READING_TYPES)).astype(np.int8),
+            np.round(rng.normal(40, 10, rows), 2), np.arange(rows, dtype=np.float64))
+
+
+def test_update_batch_matches_row_by_row_updates():
+    rng = np.random.default_rng(0)
+    batched, scalar = SensorStateStore(), SensorStateStore()
+
+    for _ in range(3):
+        sensor_ids, obs_ids, type_codes, values, times = random_batch(rng, 500)
+        delta, zscore, samples = batched.update_batch(sensor_ids, obs_ids.astype(np.int32), type_codes,
+                                                      values, times)
+        for i, sid in enumerate(sensor_ids.tolist()):
+            expected_delta = scalar.update(sid, int(obs_ids[i]), READING_TYPES[type_codes[i]],
+                                           float(values[i]), float(times[i]))
+            snapshot = scalar.get(sid)
+            assert delta[i] == expected_delta
+            assert zscore[i] == snapshot.zscore
+            assert samples[i] == snapshot.samples
+
+    for sid in range(1, 21):
+        assert batched.get(sid) == scalar.get(sid)
+
+
+def test_update_batch_reports_each_occurrence_of_a_sensor():
+    store = SensorStateStore()
+    store.update(1, 1, 'sound', 45.0, 0.0)
+    delta, _, samples = store.update_batch(np.array([1, 1, 1]), np.array([1, 1, 1], dtype=np.int32),
+                                           np.full(3, READING_TYPES.index('sound'), dtype=np.int8),
+                                           np.array([80.0, 45.0, 46.0]), np.array([10.0, 20.0, 30.0]))
+    # The spike is visible on its own row even though the page ends calm
+    assert delta.tolist() == [35.0, 35.0, 1.0]
+    assert samples.tolist() == [2, 3, 4]
+    assert store.get(1).delta == 1.0
@@ -0,0 +1,222 @@
+"""
+Async (ASGI) front-end for the AI server:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+POST /api/predict is served natively: the multipart upload is parsed as it
+streams in (spooled to disk past 1 MB, cut off with 413 once the bytes
+received exceed MAX_CONTENT_LENGTH, whatever Content-Length claims), then
+decoding and inference run on a bounded thread pool, so the event loop never
+blocks and a slow client only costs a coroutine instead of a thread. Requests that would push the number of
+queued + running inferences past AI_MAX_QUEUE are rejected immediately with
+503 and a Retry-After estimate, and every prediction has a deadline
+(AI_REQUEST_TIMEOUT, 504 when exceeded), so overload degrades gracefully
+instead of piling up threads and memory.
+
+All other routes (training, models, health) are the existing Flask handlers,
+mounted through a WSGI adapter.
+
+Settings (environment):
+    AI_INFERENCE_WORKERS  inference threads (default: CPU count)
+    AI_MAX_QUEUE          queued + running inferences before 503 (default: 4 x workers)
+    AI_REQUEST_TIMEOUT    per-request deadline in seconds, upload included (default: 30)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+
+import torch
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from server import app as flask_app
+from scripts.inference import predict_bytes
+
+logger = logging.getLogger(__name__)
+
+# ========== INFERENCE SETTINGS ==========
+INFERENCE_WORKERS = int(os.getenv('AI_INFERENCE_WORKERS', os.cpu_count() or 1))
+MAX_QUEUE = int(os.getenv('AI_MAX_QUEUE', 4 * INFERENCE_WORKERS))
+REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', 30))
+MAX_UPLOAD_BYTES = flask_app.config['MAX_CONTENT_LENGTH']
+TOP_K = 5
+
+
+class InferenceQueue:
+    """Bounded thread pool for decoding + inference, with admission control."""
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='inference')
+        self.pending = 0  # Submitted and not finished (queued or running)
+        self.avg_seconds = 0.1  # EWMA of inference time, for Retry-After
+        self.stats = {'completed': 0, 'rejected': 0, 'timed_out': 0, 'failed': 0}
+
+    def is_full(self):
+        return self.pending >= self.max_pending
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        return max(1, math.ceil(self.pending * self.avg_seconds / self.workers))
+
+    def _finished(self, future, started):
+        # Runs on the event loop thread (via call_soon_threadsafe), like every other counter update
+        self.pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.avg_seconds = 0.9 * self.avg_seconds + 0.1 * (time.monotonic() - started)
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        started = time.monotonic()
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._finished, f, started))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()  # Drops it if still queued; a running inference finishes in the background
+            raise
+
+    def status(self):
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'avg_inference_ms': round(self.avg_seconds * 1000, 1),
+            'request_timeout_s': REQUEST_TIMEOUT,
+            **self.stats
+        }
+
+
+inference_queue = InferenceQueue(INFERENCE_WORKERS, MAX_QUEUE)
+
+
+def error(message, status_code, headers=None, **extra):
+    return JSONResponse({'success': False, 'error': message, **extra}, status_code=status_code, headers=headers)
+
+
+def has_api_key(request):
+    """Same X-API-Key check as the Flask routes' require_api_key"""
+    api_key = request.headers.get('X-API-Key')
+    return bool(api_key) and api_key == os.getenv('API_KEY')
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def limited_stream(request, limit):
+    """Request body chunks, failing as soon as more than limit bytes have arrived."""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLarge(f'Upload exceeds {limit} bytes')
+        yield chunk
+
+
+async def read_upload(request):
+    if not request.headers.get('content-type', '').startswith('multipart/form-data'):
+        return None
+    async with aclosing(limited_stream(request, MAX_UPLOAD_BYTES)) as stream:
+        form = await MultiPartParser(request.headers, stream, max_files=1).parse()
+    try:
+        upload = form.get('image')
+        if upload is None or isinstance(upload, str):
+            return None
+        return await upload.read()
+    finally:
+        await form.close()
+
+
+async def predict(request):
+    """Predict plant species from image (async, bounded, with deadline)"""
+    if not has_api_key(request):
+        return error('Invalid or missing API key', 401)
+
+    # Reject before reading the upload: shedding load must be cheap
+    if inference_queue.is_full():
+        inference_queue.stats['rejected'] += 1
+        retry_after = inference_queue.retry_after()
+        logger.warning(f"⚠️ Inference queue full ({inference_queue.pending}/{inference_queue.max_pending}), "
+                       f"retry after {retry_after}s")
+        return error('Server busy, retry later', 503, headers={'Retry-After': str(retry_after)},
+                     queue=inference_queue.status())
+
+    # Declared size is only a shortcut; read_upload enforces the limit on the bytes actually received
+    try:
+        content_length = int(request.headers.get('content-length', 0))
+    except ValueError:
+        return error('Invalid Content-Length header', 400)
+    if content_length < 0:
+        return error('Invalid Content-Length header', 400)
+    if content_length > MAX_UPLOAD_BYTES:
+        return error('Image too large', 413)
+
+    model_path = os.getenv('MODEL_PATH')
+    labels_path = os.getenv('LABELS_PATH')
+
+    try:
+        async def handle():
+            data = await read_upload(request)
+            if not data:
+                return error('No image file provided', 400)
+            predictions = await inference_queue.run(predict_bytes, data, model_path, labels_path, TOP_K)
+            inference_queue.stats['completed'] += 1
+            return JSONResponse({
+                'success': True,
+                'predictions': predictions,
+                'source': 'ai-server',
+                'model': 'mobilenetv2'
+            })
+
+        return await asyncio.wait_for(handle(), timeout=REQUEST_TIMEOUT)
+
+    except UploadTooLarge:
+        return error('Image too large', 413)
+    except MultiPartException as e:
+        return error(e.message, 400)
+    except asyncio.TimeoutError:
+        inference_queue.stats['timed_out'] += 1
+        logger.error(f"❌ Prediction exceeded {REQUEST_TIMEOUT}s deadline")
+        return error('Prediction timed out', 504)
+    except Exception as e:
+        inference_queue.stats['failed'] += 1
+        logger.error(f"❌ Prediction failed: {str(e)}")
+        return error(str(e), 500)
+
+
+async def inference_status(request):
+    """Inference queue status (admission control and deadline counters)"""
+    if not has_api_key(request):
+        return error('Invalid or missing API key', 401)
+    return JSONResponse({'success': True, 'inference': inference_queue.status()})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Split the cores between the inference threads instead of oversubscribing them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS))
+    logger.info(f"🚦 Async inference: {INFERENCE_WORKERS} workers, queue limit {MAX_QUEUE}, "
+                f"deadline {REQUEST_TIMEOUT}s")
+    yield
+    inference_queue.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/predict', predict, methods=['POST']),
+        Route('/api/inference/status', inference_status, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan
+)
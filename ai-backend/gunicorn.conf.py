@@ -0,0 +1,53 @@
+"""
+Production serving for the AI server (instead of Flask's development server):
+
+    gunicorn -c gunicorn.conf.py server:app
+
+preload_app imports server.py - and with it the MODEL_PATH model - once in the
+master process, then forks the workers. The weight tensors live in memory the
+workers only ever read, so they stay shared copy-on-write: N workers cost about
+one model's worth of memory plus a small per-process overhead. Each worker runs
+one request at a time with CPU_COUNT // WORKERS torch threads, so inference
+throughput scales with the number of cores instead of contending for one GIL.
+
+Settings (environment):
+    AI_WORKERS            number of worker processes (default: CPU count)
+    AI_THREADS_PER_WORKER torch intra-op threads per worker (default: CPU count // workers)
+    AI_TIMEOUT            worker timeout in seconds (default: 120)
+    HOST / PORT           bind address, as for the development server
+"""
+
+import gc
+import multiprocessing
+import os
+
+# ========== SERVER SETTINGS ==========
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv('AI_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'sync'  # One request per worker at a time: inference is CPU bound
+threads = 1
+preload_app = True
+timeout = int(os.getenv('AI_TIMEOUT', 120))
+graceful_timeout = 30
+
+THREADS_PER_WORKER = int(os.getenv('AI_THREADS_PER_WORKER', max(1, multiprocessing.cpu_count() // workers)))
+
+
+def on_starting(server):
+    from server import publish_training_state
+
+    publish_training_state()  # Clear any state left by a previous run
+
+
+def pre_fork(server, worker):
+    # Move everything the master allocated (model included) out of the garbage
+    # collector's reach, so collections in the workers don't write to - and
+    # un-share - those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+
+    torch.set_num_threads(THREADS_PER_WORKER)
+    server.log.info(f"🧵 Worker {worker.pid}: {THREADS_PER_WORKER} torch threads")
@@ -0,0 +1,182 @@
+"""
+Benchmark image decoding for the classifier input: full-resolution decode +
+Resize (torchvision's default loader) vs the reduced-size JPEG decode in
+scripts/preprocessing.py.
+
+Each loader runs in a fresh process, so the reported peak memory (max RSS
+growth while decoding) belongs to that loader alone. Also reports how far the
+final 224x224 pixels of the two paths differ.
+
+Usage (from ai-backend/):
+    python -m scripts.benchmark_preprocessing --images datasets/plants
+    python -m scripts.benchmark_preprocessing --synthetic 30 --json logs/preprocessing_benchmark.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import random
+import resource
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from scripts.preprocessing import IMAGE_SIZE, decode_image, load_image
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+SYNTHETIC_SIZE = (4000, 3000)  # 12MP phone photo
+COMPARE_IMAGES = 20  # Images used for the pixel difference
+
+
+def load_full(path):
+    """Baseline: torchvision's default loader, full-resolution decode"""
+    with open(path, 'rb') as f:
+        return Image.open(f).convert('RGB')
+
+
+LOADERS = {
+    'full_decode': load_full,
+    'draft_decode': load_image,
+}
+
+
+def peak_rss_mb():
+    """Peak RSS of this process (VmHWM; ru_maxrss can carry over the parent's peak across fork/exec)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def to_input(loader, path):
+    """Decoded + resized like train_model's Resize((224, 224))"""
+    return loader(path).resize((IMAGE_SIZE, IMAGE_SIZE), Image.BILINEAR)
+
+
+def run_loader(name, paths, results):
+    """Runs in its own process: time and peak memory of one loader"""
+    loader = LOADERS[name]
+    warm_up = io.BytesIO()
+    Image.new('RGB', (64, 64)).save(warm_up, format='JPEG')
+    decode_image(warm_up)  # Codec initialisation, without raising the peak
+    baseline_mb = peak_rss_mb()
+
+    timings = []
+    decoded_pixels = []
+    for path in paths:
+        start = time.perf_counter()
+        image = loader(path)
+        width, height = image.size
+        image.resize((IMAGE_SIZE, IMAGE_SIZE), Image.BILINEAR)
+        timings.append((time.perf_counter() - start) * 1000)
+        decoded_pixels.append(width * height)
+
+    timings.sort()
+    results.put({
+        'loader': name,
+        'images': len(paths),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p50_ms': round(timings[len(timings) // 2], 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'mean_decoded_megapixels': round(statistics.mean(decoded_pixels) / 1e6, 3),
+        'peak_rss_growth_mb': round(peak_rss_mb() - baseline_mb, 1),
+    })
+
+
+def make_synthetic(count, directory, seed=42):
+    """12MP JPEGs with smooth gradients and noise, like camera photos"""
+    rng = np.random.default_rng(seed)
+    width, height = SYNTHETIC_SIZE
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    paths = []
+    for index in range(count):
+        phase = rng.uniform(0, 2 * np.pi, 3)
+        channels = [127 + 100 * np.sin(x / rng.uniform(80, 400) + y / rng.uniform(80, 400) + p) for p in phase]
+        pixels = np.stack(channels, axis=-1) + rng.normal(0, 12, (height, width, 3))
+        path = Path(directory) / f'synthetic_{index:03d}.jpg'
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def pixel_difference(paths):
+    """Mean / max absolute difference (0-255) between the two paths' 224x224 inputs"""
+    diffs = []
+    for path in paths[:COMPARE_IMAGES]:
+        full = np.asarray(to_input(load_full, path), dtype=np.int16)
+        draft = np.asarray(to_input(load_image, path), dtype=np.int16)
+        diffs.append(np.abs(full - draft))
+    diffs = np.stack(diffs)
+    return {'mean_abs': round(float(diffs.mean()), 2), 'max_abs': int(diffs.max())}
+
+
+def benchmark(paths):
+    context = multiprocessing.get_context('spawn')
+    report = {}
+    for name in LOADERS:
+        results = context.Queue()
+        process = context.Process(target=run_loader, args=(name, [str(p) for p in paths], results))
+        process.start()
+        report[name] = results.get()
+        process.join()
+    report['pixel_difference'] = pixel_difference(paths)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full vs reduced-size JPEG decoding")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--images', help="Folder of images (searched recursively, e.g. a training dataset)")
+    source.add_argument('--synthetic', type=int, metavar='N', help="Generate N synthetic 12MP JPEGs")
+    parser.add_argument('--limit', type=int, default=200, help="Max images sampled from --images")
+    parser.add_argument('--json', metavar='PATH', help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.synthetic:
+            logger.info(f"🖼️  Generating {args.synthetic} synthetic {SYNTHETIC_SIZE[0]}x{SYNTHETIC_SIZE[1]} JPEGs...")
+            paths = make_synthetic(args.synthetic, tmp_dir)
+        else:
+            paths = sorted(p for p in Path(args.images).rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+            random.Random(42).shuffle(paths)
+            paths = paths[:args.limit]
+        if not paths:
+            parser.error('No images found')
+
+        report = benchmark(paths)
+
+    report['created_at'] = datetime.now().isoformat()
+    full, draft = report['full_decode'], report['draft_decode']
+    logger.info("=" * 60)
+    logger.info(f"PREPROCESSING BENCHMARK ({full['images']} images)")
+    for name in LOADERS:
+        r = report[name]
+        logger.info(f"  {name:<13} {r['mean_ms']:8.2f} ms/image (p95 {r['p95_ms']:.2f}) | "
+                    f"decoded {r['mean_decoded_megapixels']:.2f} MP | peak +{r['peak_rss_growth_mb']:.1f} MB")
+    logger.info(f"  Speed-up: {full['mean_ms'] / draft['mean_ms']:.1f}x | "
+                f"pixel difference at {IMAGE_SIZE}px: mean {report['pixel_difference']['mean_abs']}, "
+                f"max {report['pixel_difference']['max_abs']}")
+    logger.info("=" * 60)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"✅ Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,567 @@
+"""
+Nearest-neighbour species lookup over classifier embeddings.
+
+Reference images are embedded with a trained model's penultimate layer
+(scripts/inference.py extract_embeddings) and stored in an on-disk index:
+
+    <index>/meta.json       dim, count, species names, model, IVF / PQ settings
+    <index>/vectors.f32     count x dim float32, L2-normalized (memory-mapped)
+    <index>/labels.i32      species index per vector
+    <index>/refs.txt        reference name per vector (e.g. image path)
+    <index>/centroids.npy   IVF coarse centroids  + assign.i32 (list per vector)
+    <index>/codebooks.npy   PQ codebooks          + codes.u8   (count x m codes)
+
+Search is exact brute force (cosine similarity) by default. After `train`,
+IVF restricts it to the `nprobe` lists closest to the query, and PQ scores
+the candidates from compact codes, re-ranking only the best ones against the
+exact vectors, so 100k+ references answer in milliseconds without holding
+the full vectors in memory. Appends are crash-safe: data files are appended
+first and meta.json (holding the count) is replaced last.
+
+A new species is onboarded by indexing a few labelled images - no retraining.
+
+Usage (from ai-backend/):
+    python -m scripts.embedding_index build --model models/plants_v3/plants_v3.pth --dataset datasets/plants \\
+        --index models/plants_v3/embedding_index --ivf-lists 256 --pq-subvectors 32
+    python -m scripts.embedding_index add --index models/plants_v3/embedding_index --species "nepenthes lowii" img1.jpg img2.jpg
+    python -m scripts.embedding_index search --index models/plants_v3/embedding_index photo.jpg
+    python -m scripts.embedding_index benchmark --synthetic 100000
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ========== INDEX SETTINGS ==========
+DEFAULT_NPROBE = 8  # IVF lists searched per query
+RERANK_FACTOR = 10  # PQ candidates re-ranked exactly per requested neighbour
+PQ_CENTROIDS = 256  # Codes per PQ subvector (one byte)
+TRAIN_SAMPLE = 50000  # Vectors used to train IVF / PQ
+KMEANS_ITERATIONS = 20
+KMEANS_CHUNK = 65536
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# ========== K-MEANS ==========
+
+def _nearest(data, centroids, spherical):
+    """Index of the nearest centroid per row (max inner product if spherical, else L2)"""
+    result = np.empty(len(data), dtype=np.int32)
+    norms = None if spherical else (centroids ** 2).sum(1)
+    for start in range(0, len(data), KMEANS_CHUNK):
+        scores = data[start:start + KMEANS_CHUNK] @ centroids.T
+        if spherical:
+            result[start:start + KMEANS_CHUNK] = scores.argmax(1)
+        else:
+            result[start:start + KMEANS_CHUNK] = (norms - 2 * scores).argmin(1)
+    return result
+
+
+def kmeans(data, k, spherical=False, iterations=KMEANS_ITERATIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = _nearest(data, centroids, spherical)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = counts > 0
+        sums = np.add.reduceat(data[order], starts[filled], axis=0)
+        centroids[filled] = sums / counts[filled, None]
+        # Re-seed empty clusters from random points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        if spherical:
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
+
+# ========== INDEX ==========
+
+class EmbeddingIndex:
+    """Memory-mapped embedding index with optional IVF partitioning and PQ codes."""
+
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self._meta_mtime = None
+        self._load()
+
+    # ----- storage -----
+
+    @classmethod
+    def create(cls, index_dir, dim, model_path=None):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        if (index_dir / 'meta.json').exists():
+            raise FileExistsError(f'Index already exists: {index_dir}')
+        for name in ('vectors.f32', 'labels.i32', 'refs.txt', 'assign.i32', 'codes.u8'):
+            (index_dir / name).write_bytes(b'')
+        _write_json(index_dir / 'meta.json', {
+            'dim': dim,
+            'count': 0,
+            'species': [],
+            'model_path': str(Path(model_path).absolute()) if model_path else None,
+            'ivf': None,
+            'pq': None,
+            'created_at': datetime.now().isoformat()
+        })
+        return cls(index_dir)
+
+    def _path(self, name):
+        return self.index_dir / name
+
+    def _memmap(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode='r', shape=shape)
+
+    def _load(self):
+        meta_path = self._path('meta.json')
+        self._meta_mtime = meta_path.stat().st_mtime_ns
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+
+        count, dim = self.meta['count'], self.meta['dim']
+        self.species = self.meta['species']
+        self.vectors = self._memmap('vectors.f32', np.float32, (count, dim))
+        self.labels = np.array(self._memmap('labels.i32', np.int32, (count,)))
+        with open(self._path('refs.txt'), encoding='utf-8') as f:
+            self.refs = [line.rstrip('\n') for _, line in zip(range(count), f)]
+
+        self.centroids = None
+        self.lists = None
+        if self.meta['ivf']:
+            self.centroids = np.load(self._path('centroids.npy'))
+            assign = np.array(self._memmap('assign.i32', np.int32, (count,)))
+            # Inverted lists: vector ids per centroid
+            order = np.argsort(assign, kind='stable')
+            bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+        self.codebooks = None
+        self.codes = None
+        if self.meta['pq']:
+            self.codebooks = np.load(self._path('codebooks.npy'))
+            self.codes = self._memmap('codes.u8', np.uint8, (count, self.meta['pq']['m']))
+
+    def refresh(self):
+        """Pick up references added by other processes"""
+        if self._path('meta.json').stat().st_mtime_ns != self._meta_mtime:
+            self._load()
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self._path('.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _truncate(self, count):
+        """Drop data appended after the last committed count (crashed writer)"""
+        dim = self.meta['dim']
+        sizes = {'vectors.f32': count * dim * 4, 'labels.i32': count * 4,
+                 'assign.i32': count * 4 if self.meta['ivf'] else 0,
+                 'codes.u8': count * self.meta['pq']['m'] if self.meta['pq'] else 0}
+        for name, size in sizes.items():
+            if self._path(name).stat().st_size != size:
+                os.truncate(self._path(name), size)
+        if len(self.refs) != count or self._path('refs.txt').stat().st_size != sum(
+                len(ref.encode('utf-8')) + 1 for ref in self.refs):
+            with open(self._path('refs.txt'), 'w', encoding='utf-8') as f:
+                f.writelines(f'{ref}\n' for ref in self.refs[:count])
+
+    # ----- encoding -----
+
+    def _assign(self, vectors):
+        return _nearest(vectors, self.centroids, spherical=True)
+
+    def _encode(self, vectors):
+        m = self.meta['pq']['m']
+        sub_vectors = vectors.reshape(len(vectors), m, -1)
+        codes = np.empty((len(vectors), m), dtype=np.uint8)
+        for i in range(m):
+            codes[:, i] = _nearest(np.ascontiguousarray(sub_vectors[:, i]), self.codebooks[i], spherical=False)
+        return codes
+
+    # ----- writes -----
+
+    def add(self, vectors, species, refs):
+        """Append L2-normalized vectors with their species names and reference names"""
+        vectors = normalize(vectors).reshape(-1, self.meta['dim'])
+        if not (len(vectors) == len(species) == len(refs)):
+            raise ValueError('vectors, species and refs must have the same length')
+
+        with self._write_lock():
+            self.refresh()
+            count = self.meta['count']
+            self._truncate(count)
+
+            species_names = list(self.meta['species'])
+            species_ids = {name: index for index, name in enumerate(species_names)}
+            labels = []
+            for name in species:
+                if name not in species_ids:
+                    species_ids[name] = len(species_names)
+                    species_names.append(name)
+                labels.append(species_ids[name])
+
+            with open(self._path('vectors.f32'), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._path('labels.i32'), 'ab') as f:
+                f.write(np.asarray(labels, dtype=np.int32).tobytes())
+            with open(self._path('refs.txt'), 'a', encoding='utf-8') as f:
+                f.writelines(f"{str(ref).replace(chr(10), ' ')}\n" for ref in refs)
+            if self.meta['ivf']:
+                with open(self._path('assign.i32'), 'ab') as f:
+                    f.write(self._assign(vectors).tobytes())
+            if self.meta['pq']:
+                with open(self._path('codes.u8'), 'ab') as f:
+                    f.write(self._encode(vectors).tobytes())
+
+            # Commit: the new count makes the appended rows visible
+            _write_json(self._path('meta.json'), {
+                **self.meta,
+                'count': count + len(vectors),
+                'species': species_names,
+                'updated_at': datetime.now().isoformat()
+            })
+            self._load()
+        return len(vectors)
+
+    def train(self, ivf_lists=None, pq_subvectors=None, nprobe=DEFAULT_NPROBE, sample=TRAIN_SAMPLE):
+        """Train IVF centroids and/or PQ codebooks on the indexed vectors, then encode all of them"""
+        count, dim = self.meta['count'], self.meta['dim']
+        if count == 0:
+            raise ValueError('Index is empty: add references before training')
+        if pq_subvectors and dim % pq_subvectors:
+            raise ValueError(f'Embedding dim {dim} is not divisible by {pq_subvectors} PQ subvectors')
+
+        with self._write_lock():
+            self.refresh()
+            rng = np.random.default_rng(0)
+            training = np.asarray(self.vectors[np.sort(rng.choice(count, min(sample, count), replace=False))])
+
+            meta = dict(self.meta)
+            if ivf_lists:
+                logger.info(f"🧭 Training IVF: {ivf_lists} lists on {len(training)} vectors")
+                self.centroids = kmeans(training, ivf_lists, spherical=True)
+                np.save(self._path('centroids.npy'), self.centroids)
+                meta['ivf'] = {'lists': len(self.centroids), 'nprobe': nprobe}
+            if pq_subvectors:
+                logger.info(f"🧮 Training PQ: {pq_subvectors} subvectors x {PQ_CENTROIDS} codes")
+                sub_vectors = training.reshape(len(training), pq_subvectors, -1)
+                self.codebooks = np.stack([
+                    kmeans(np.ascontiguousarray(sub_vectors[:, i]), PQ_CENTROIDS) for i in range(pq_subvectors)
+                ])
+                # Fewer training vectors than codes: repeat the first code (argmin never picks the copies)
+                if self.codebooks.shape[1] < PQ_CENTROIDS:
+                    pad = np.repeat(self.codebooks[:, :1], PQ_CENTROIDS - self.codebooks.shape[1], axis=1)
+                    self.codebooks = np.concatenate([self.codebooks, pad], axis=1)
+                np.save(self._path('codebooks.npy'), self.codebooks)
+                meta['pq'] = {'m': pq_subvectors}
+            self.meta = meta
+
+            # Re-encode every vector, chunk by chunk
+            with open(self._path('assign.i32'), 'wb') as assign_file, open(self._path('codes.u8'), 'wb') as codes_file:
+                for start in range(0, count, KMEANS_CHUNK):
+                    chunk = np.asarray(self.vectors[start:start + KMEANS_CHUNK])
+                    if meta['ivf']:
+                        assign_file.write(self._assign(chunk).tobytes())
+                    if meta['pq']:
+                        codes_file.write(self._encode(chunk).tobytes())
+
+            _write_json(self._path('meta.json'), {**meta, 'updated_at': datetime.now().isoformat()})
+            self._load()
+
+    # ----- queries -----
+
+    def search(self, query, k=10, nprobe=None):
+        """[(vector id, cosine similarity)] of the k nearest references"""
+        self.refresh()
+        if self.meta['count'] == 0:
+            return []
+        query = normalize(query).reshape(-1)
+
+        candidates = None
+        if self.lists is not None:
+            nprobe = nprobe or self.meta['ivf']['nprobe']
+            probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+            candidates = np.sort(np.concatenate([self.lists[c] for c in probe]))
+            if len(candidates) == 0:
+                return []
+
+        if self.codes is not None:
+            # Asymmetric distance: query subvector . every code of its codebook, summed over subvectors
+            m = self.meta['pq']['m']
+            table = np.einsum('mkd,md->mk', self.codebooks, query.reshape(m, -1))
+            codes = self.codes if candidates is None else self.codes[candidates]
+            approx = table[np.arange(m), codes].sum(axis=1)
+            shortlist = _top(approx, k * RERANK_FACTOR)
+            ids = shortlist if candidates is None else candidates[shortlist]
+            ids = np.sort(ids)
+        else:
+            ids = candidates
+
+        vectors = self.vectors if ids is None else self.vectors[ids]
+        scores = np.asarray(vectors) @ query
+        best = _top(scores, k)
+        best_ids = best if ids is None else ids[best]
+        return [(int(i), float(s)) for i, s in zip(best_ids, scores[best])]
+
+    def neighbours(self, query, k=10, nprobe=None):
+        return [
+            {
+                'species': self.species[self.labels[index]],
+                'similarity': round(similarity, 4),
+                'reference': self.refs[index]
+            }
+            for index, similarity in self.search(query, k, nprobe)
+        ]
+
+    def knn_classify(self, query, k=10, nprobe=None, top_k=5):
+        """Similarity-weighted vote of the k nearest references, as /api/predict-style predictions"""
+        neighbours = self.neighbours(query, k, nprobe)
+        votes = {}
+        for neighbour in neighbours:
+            votes[neighbour['species']] = votes.get(neighbour['species'], 0.0) + max(neighbour['similarity'], 0.0)
+        total = sum(votes.values()) or 1.0
+        ranked = sorted(votes.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        predictions = [
+            {'species': species, 'confidence': round(100 * score / total, 2)}
+            for species, score in ranked
+        ]
+        return predictions, neighbours
+
+    def info(self):
+        return {
+            'count': self.meta['count'],
+            'dim': self.meta['dim'],
+            'species': len(self.species),
+            'model_path': self.meta.get('model_path'),
+            'ivf': self.meta['ivf'],
+            'pq': self.meta['pq'],
+            'size_bytes': sum(p.stat().st_size for p in self.index_dir.iterdir() if p.is_file())
+        }
+
+
+def _top(scores, k):
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _write_json(path, data):
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ========== MODEL ==========
+
+def load_index_model(index, fallback_model_path=None):
+    """(model, model_path) embedding queries for an index: the model it was built with, else the fallback"""
+    from scripts.inference import load_classifier
+
+    model_path = index.meta.get('model_path') or fallback_model_path
+    if not model_path:
+        raise ValueError(f'Index {index.index_dir} records no model and none was given to embed with')
+    model, _ = load_classifier(model_path)
+    width = model.classifier[-1].in_features  # Penultimate layer width
+    if width != index.meta['dim']:
+        raise ValueError(f"Index {index.index_dir} holds {index.meta['dim']}-d embeddings, "
+                         f"but {model_path} produces {width}-d embeddings")
+    return model, model_path
+
+
+# ========== CLI ==========
+
+def _image_paths(dataset_path):
+    """(path, species) for every image in a class-per-folder dataset"""
+    for class_dir in sorted(p for p in Path(dataset_path).iterdir() if p.is_dir()):
+        for path in sorted(class_dir.iterdir()):
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                yield path, class_dir.name
+
+
+def embed_files(model, paths, batch_size=32):
+    import torch
+
+    from scripts.inference import extract_embeddings, preprocess
+    from scripts.preprocessing import load_image
+
+    for start in range(0, len(paths), batch_size):
+        batch = torch.stack([preprocess(load_image(path)) for path in paths[start:start + batch_size]])
+        yield start, extract_embeddings(model, batch)
+
+
+def build(args):
+    from scripts.inference import load_classifier
+
+    model, _ = load_classifier(args.model)
+    items = list(_image_paths(args.dataset))
+    if not items:
+        raise SystemExit(f'No images found in {args.dataset}')
+
+    dim = model.classifier[-1].in_features  # Penultimate layer width
+    index = EmbeddingIndex.create(args.index, dim, args.model)
+    logger.info(f"📚 Indexing {len(items)} reference images ({dim}-d embeddings)")
+    paths = [path for path, _ in items]
+    for start, embeddings in embed_files(model, paths, args.batch_size):
+        batch = items[start:start + len(embeddings)]
+        index.add(embeddings, [species for _, species in batch], [str(path) for path, _ in batch])
+        logger.info(f"   {start + len(embeddings)}/{len(items)}")
+
+    if args.ivf_lists or args.pq_subvectors:
+        index.train(args.ivf_lists, args.pq_subvectors, args.nprobe)
+    logger.info(f"✅ Index built: {index.info()}")
+
+
+def add(args):
+    index = EmbeddingIndex(args.index)
+    model, _ = load_index_model(index, args.model)
+    paths = [Path(p) for p in args.images]
+    for start, embeddings in embed_files(model, paths):
+        batch = paths[start:start + len(embeddings)]
+        index.add(embeddings, [args.species] * len(batch), [str(p) for p in batch])
+    logger.info(f"✅ Added {len(paths)} references for '{args.species}' ({index.meta['count']} total)")
+
+
+def search(args):
+    index = EmbeddingIndex(args.index)
+    model, _ = load_index_model(index, args.model)
+    for path in args.images:
+        _, embeddings = next(embed_files(model, [Path(path)]))
+        start = time.perf_counter()
+        predictions, neighbours = index.knn_classify(embeddings[0], args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"🔍 {path} ({elapsed_ms:.2f} ms)")
+        for prediction in predictions:
+            print(f"   {prediction['species']:<30} {prediction['confidence']:6.2f}%")
+        for neighbour in neighbours[:3]:
+            print(f"     ~ {neighbour['similarity']:.3f} {neighbour['reference']}")
+
+
+def benchmark(args):
+    """Query latency and recall@k of brute force vs IVF vs IVF-PQ on synthetic clustered vectors"""
+    rng = np.random.default_rng(0)
+    species_centres = normalize(rng.normal(size=(args.species, args.dim)))
+    labels = rng.integers(0, args.species, args.synthetic)
+    vectors = normalize(species_centres[labels] + 0.6 * normalize(rng.normal(size=(args.synthetic, args.dim))))
+    queries = normalize(species_centres[rng.integers(0, args.species, args.queries)]
+                        + 0.6 * normalize(rng.normal(size=(args.queries, args.dim))))
+
+    report = {'references': args.synthetic, 'dim': args.dim, 'k': args.k}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = EmbeddingIndex.create(Path(tmp_dir) / 'index', args.dim)
+        for start in range(0, args.synthetic, 100000):
+            index.add(vectors[start:start + 100000], [f'species_{l}' for l in labels[start:start + 100000]],
+                      [str(i) for i in range(start, min(start + 100000, args.synthetic))])
+        del vectors
+
+        exact = None
+        for mode, ivf_lists, pq_subvectors in (('brute_force', None, None),
+                                               ('ivf', args.ivf_lists, None),
+                                               ('ivf_pq', None, args.pq_subvectors)):
+            if ivf_lists or pq_subvectors:
+                index.train(ivf_lists, pq_subvectors, args.nprobe)
+            index.search(queries[0], args.k)  # Warm-up (page cache)
+            timings, results = [], []
+            for query in queries:
+                start = time.perf_counter()
+                results.append({i for i, _ in index.search(query, args.k)})
+                timings.append((time.perf_counter() - start) * 1000)
+            exact = exact or results
+            recall = np.mean([len(r & e) / len(e) for r, e in zip(results, exact)])
+            timings.sort()
+            report[mode] = {
+                'mean_ms': round(float(np.mean(timings)), 3),
+                'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+                f'recall@{args.k}': round(float(recall), 4),
+            }
+            logger.info(f"⏱️  {mode:<12} {report[mode]['mean_ms']:8.3f} ms/query (p95 {report[mode]['p95_ms']:.3f}) | "
+                        f"recall@{args.k} {recall:.3f}")
+        report['size_bytes'] = index.info()['size_bytes']
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"✅ Report written to {args.json}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Embedding index for nearest-neighbour species lookup")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="Index a class-per-folder dataset")
+    build_parser.add_argument('--model', required=True, help="Trained <model>.pth used for embeddings")
+    build_parser.add_argument('--dataset', required=True, help="Reference images, one folder per species")
+    build_parser.add_argument('--index', required=True, help="Index directory to create")
+    build_parser.add_argument('--batch-size', type=int, default=32)
+    build_parser.add_argument('--ivf-lists', type=int, help="Train IVF with this many lists (~sqrt(references))")
+    build_parser.add_argument('--pq-subvectors', type=int, help="Train PQ with this many subvectors (divides dim)")
+    build_parser.add_argument('--nprobe', type=int, default=DEFAULT_NPROBE)
+
+    add_parser = commands.add_parser('add', help="Index reference images of one species")
+    add_parser.add_argument('--index', required=True)
+    add_parser.add_argument('--species', required=True)
+    add_parser.add_argument('--model', help="Model for embeddings, if the index records none")
+    add_parser.add_argument('images', nargs='+')
+
+    search_parser = commands.add_parser('search', help="kNN-classify images")
+    search_parser.add_argument('--index', required=True)
+    search_parser.add_argument('--k', type=int, default=10)
+    search_parser.add_argument('--model', help="Model for embeddings, if the index records none")
+    search_parser.add_argument('images', nargs='+')
+
+    info_parser = commands.add_parser('info')
+    info_parser.add_argument('--index', required=True)
+
+    bench_parser = commands.add_parser('benchmark', help="Latency / recall on synthetic vectors")
+    bench_parser.add_argument('--synthetic', type=int, default=100000, metavar='N')
+    bench_parser.add_argument('--dim', type=int, default=1280)
+    bench_parser.add_argument('--species', type=int, default=500)
+    bench_parser.add_argument('--queries', type=int, default=200)
+    bench_parser.add_argument('--k', type=int, default=10)
+    bench_parser.add_argument('--ivf-lists', type=int, default=256)
+    bench_parser.add_argument('--pq-subvectors', type=int, default=64)
+    bench_parser.add_argument('--nprobe', type=int, default=DEFAULT_NPROBE)
+    bench_parser.add_argument('--json', metavar='PATH')
+
+    args = parser.parse_args()
+    if args.command == 'info':
+        print(json.dumps(EmbeddingIndex(args.index).info(), indent=2))
+    else:
+        {'build': build, 'add': add, 'search': search, 'benchmark': benchmark}[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
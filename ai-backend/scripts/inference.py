@@ -0,0 +1,224 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torchvision import transforms
+
+from scripts.preprocessing import IMAGE_SIZE, load_image, load_image_bytes
+from scripts.train import load_model
+
+logger = logging.getLogger(__name__)
+
+CASCADE_LATENCY_WINDOW = 1000  # Recent requests kept for the cascade latency percentiles
+
+
+def build_preprocess(size=IMAGE_SIZE):
+    """Same preprocessing as train_model's validation transform, at `size` px"""
+    return transforms.Compose([
+        transforms.Resize((size, size)),
+        transforms.ToTensor(),
+        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+    ])
+
+
+preprocess = build_preprocess()
+
+# Loaded classifiers by (model_path, labels_path). Inference always runs on CPU:
+# under the pre-fork server the weights are loaded once in the master process
+# and shared copy-on-write by the workers (see gunicorn.conf.py).
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def load_classifier(model_path, labels_path=None):
+    """Load (model, labels) once per process"""
+    key = (str(model_path), str(labels_path))
+    with _classifiers_lock:
+        if key not in _classifiers:
+            model, checkpoint = load_model(model_path, device='cpu')
+            for param in model.parameters():
+                param.requires_grad = False
+
+            if labels_path:
+                with open(labels_path) as f:
+                    labels = json.load(f)
+            else:
+                labels = checkpoint.get('class_names') or json.loads(
+                    (Path(model_path).parent / 'label_map.json').read_text()
+                )
+
+            _classifiers[key] = (model, labels)
+            logger.info(f"✅ Loaded model {model_path} ({len(labels)} classes)")
+    return _classifiers[key]
+
+
+def predict_tensor(model, labels, tensor, top_k=5):
+    """Top-k predictions for one preprocessed image tensor"""
+    with torch.inference_mode():
+        probabilities = torch.softmax(model(tensor.unsqueeze(0)), dim=1)[0]
+    confidences, indices = probabilities.topk(min(top_k, len(labels)))
+    return [
+        {
+            'species': labels[index],
+            'confidence': round(confidence * 100, 2),
+            'class_index': index
+        }
+        for confidence, index in zip(confidences.tolist(), indices.tolist())
+    ]
+
+
+def _latency_stats(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return {
+        'mean': round(sum(samples) / len(samples), 2),
+        'p50': round(samples[len(samples) // 2], 2),
+        'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2)
+    }
+
+
+class CascadeClassifier:
+    """
+    Confidence-gated two-stage inference. Every image goes through a cheap
+    first stage (a smaller model such as a distilled student, and/or a lower
+    input resolution); only when its top-1 confidence is below `threshold` is
+    the full model run and its answer returned. A small random share of the
+    accepted (not escalated) requests is also run through the full model, to
+    measure how often the first stage agrees with it where it matters.
+    """
+
+    def __init__(self, model_path, fast_model, fast_image_size, full_model, labels, threshold, audit_rate):
+        self.model_path = str(model_path)
+        self.fast_model = fast_model
+        self.fast_image_size = fast_image_size
+        self.fast_preprocess = build_preprocess(fast_image_size)
+        self.full_model = full_model
+        self.labels = labels
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._counts = {'requests': 0, 'escalated': 0, 'escalated_agreed': 0, 'audited': 0, 'audited_agreed': 0}
+        self._latency = {stage: deque(maxlen=CASCADE_LATENCY_WINDOW) for stage in ('fast', 'full', 'total')}
+
+    def predict(self, image, top_k=5):
+        start = time.perf_counter()
+        fast = predict_tensor(self.fast_model, self.labels, self.fast_preprocess(image), top_k)
+        fast_ms = (time.perf_counter() - start) * 1000
+
+        escalate = fast[0]['confidence'] < self.threshold * 100
+        audit = not escalate and self._random.random() < self.audit_rate
+        full = None
+        if escalate or audit:
+            full_start = time.perf_counter()
+            full = predict_tensor(self.full_model, self.labels, preprocess(image), top_k)
+            full_ms = (time.perf_counter() - full_start) * 1000
+        total_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._counts['requests'] += 1
+            self._latency['fast'].append(fast_ms)
+            self._latency['total'].append(total_ms)
+            if full is not None:
+                self._latency['full'].append(full_ms)
+                kind = 'escalated' if escalate else 'audited'
+                self._counts[kind] += 1
+                self._counts[f'{kind}_agreed'] += fast[0]['class_index'] == full[0]['class_index']
+
+        return full if escalate else fast
+
+    def metrics(self):
+        with self._lock:
+            counts = dict(self._counts)
+            latency = {stage: _latency_stats(samples) for stage, samples in self._latency.items()}
+
+        requests = counts['requests']
+        full_ms = latency['full']['mean'] if latency['full'] else None
+        return {
+            'threshold': self.threshold,
+            'fast_image_size': self.fast_image_size,
+            'audit_rate': self.audit_rate,
+            'requests': requests,
+            'escalated': counts['escalated'],
+            'escalation_rate': round(counts['escalated'] / requests, 4) if requests else None,
+            # Share of first-stage top-1 answers the full model agreed with
+            'agreement_rate': {
+                'escalated': round(counts['escalated_agreed'] / counts['escalated'], 4) if counts['escalated'] else None,
+                'accepted_audit': round(counts['audited_agreed'] / counts['audited'], 4) if counts['audited'] else None,
+                'audited': counts['audited']
+            },
+            'latency_ms': latency,
+            # Average cost per request relative to always running the full model
+            'relative_cost': round(latency['total']['mean'] / full_ms, 3) if full_ms else None
+        }
+
+
+_cascade = None
+
+
+def configure_cascade(model_path, labels_path=None, fast_model_path=None, fast_image_size=IMAGE_SIZE,
+                      threshold=0.8, audit_rate=0.05):
+    """Serve model_path through a confidence-gated cascade (see CascadeClassifier)"""
+    global _cascade
+
+    full_model, labels = load_classifier(model_path, labels_path)
+    fast_model = full_model
+    if fast_model_path:
+        fast_model, fast_labels = load_classifier(fast_model_path)
+        if fast_labels != labels:
+            raise ValueError(f'Cascade model {fast_model_path} has different classes than {model_path}')
+    if not fast_model_path and fast_image_size >= IMAGE_SIZE:
+        raise ValueError('Cascade needs a cheaper first stage: a fast model and/or an image size below 224')
+
+    _cascade = CascadeClassifier(model_path, fast_model, fast_image_size, full_model, labels,
+                                 threshold, audit_rate)
+    logger.info(f"🪜 Inference cascade: {fast_model_path or model_path} @ {fast_image_size}px first, "
+                f"full model below {threshold:.0%} confidence")
+    return _cascade
+
+
+def get_cascade():
+    return _cascade
+
+
+def _predict(image, model_path, labels_path, top_k):
+    if _cascade is not None and _cascade.model_path == str(model_path):
+        return _cascade.predict(image, top_k)
+    model, labels = load_classifier(model_path, labels_path)
+    return predict_tensor(model, labels, preprocess(image), top_k)
+
+
+def extract_embeddings(model, tensors):
+    """
+    Penultimate-layer embeddings (the classifier's input to its last Linear),
+    L2-normalized, as a float32 array of shape (batch, dim)
+    """
+    with torch.inference_mode():
+        features = F.adaptive_avg_pool2d(model.features(tensors), 1).flatten(1)
+        embeddings = F.normalize(model.classifier[:-1](features), dim=1)
+    return embeddings.numpy().astype(np.float32)
+
+
+def embed_bytes(data, model_path):
+    """Embedding of an uploaded image's bytes"""
+    model, _ = load_classifier(model_path)
+    return extract_embeddings(model, preprocess(load_image_bytes(data)).unsqueeze(0))[0]
+
+
+def predict_image(image_path, model_path, labels_path=None, top_k=5):
+    """Predict plant species from an image file"""
+    return _predict(load_image(image_path), model_path, labels_path, top_k)
+
+
+def predict_bytes(data, model_path, labels_path=None, top_k=5):
+    """Predict plant species from an uploaded image's bytes (no temporary file)"""
+    return _predict(load_image_bytes(data), model_path, labels_path, top_k)
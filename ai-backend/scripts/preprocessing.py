@@ -0,0 +1,37 @@
+import io
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Input resolution of the classifiers (train_model's Resize((224, 224)))
+IMAGE_SIZE = 224
+
+
+def decode_image(fp, size=IMAGE_SIZE):
+    """
+    Decode an image file object to RGB, at reduced size for JPEGs.
+
+    JPEG decoding can scale by 1/2, 1/4 or 1/8 inside the IDCT (libjpeg-turbo
+    DCT scaling, through Pillow's draft mode), which skips most of the work and
+    memory of a full-resolution decode. The largest reduction that keeps both
+    sides >= size is used, so the following Resize((size, size)) still only
+    ever scales down. A 12MP phone photo decodes to ~500x375 instead of
+    4000x3000. Other formats are decoded normally.
+    """
+    image = Image.open(fp)
+    if image.format == 'JPEG':
+        image.draft('RGB', (size, size))
+    return image.convert('RGB')
+
+
+def load_image(path, size=IMAGE_SIZE):
+    """Image loader for files (drop-in for torchvision's default ImageFolder loader)"""
+    with open(path, 'rb') as f:
+        return decode_image(f, size)
+
+
+def load_image_bytes(data, size=IMAGE_SIZE):
+    """Image loader for uploaded bytes"""
+    return decode_image(io.BytesIO(data), size)
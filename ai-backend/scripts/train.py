@@ -1,7 +1,10 @@
 import os
+import copy
 import json
+import time
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
 from torch.utils.data import DataLoader
 from torchvision import datasets, transforms, models
@@ -9,8 +12,18 @@ from pathlib import Path
 import logging
 from datetime import datetime
 
+from scripts.preprocessing import load_image
+
 logger = logging.getLogger(__name__)
 
+# Supported classifier architectures (the teacher default is MobileNetV2; the others are
+# compact students for on-device inference)
+ARCHITECTURES = ('mobilenet_v2', 'mobilenet_v3_small')
+
+# Train/validation split seed, recorded in the checkpoint. A distilled student reuses
+# its teacher's seed, so both are scored on the same held-out images.
+SPLIT_SEED = 42
+
 
 def validate_training_data(dataset_path):
     """Validate training dataset structure"""
@@ -58,6 +71,96 @@ def validate_training_data(dataset_path):
         }
 
 
+def build_model(architecture='mobilenet_v2', num_classes=1000, width_mult=1.0, pretrained=True):
+    """Build a classifier with a new num_classes head"""
+    if architecture == 'mobilenet_v2':
+        if width_mult == 1.0:
+            model = models.mobilenet_v2(pretrained=pretrained)
+        else:
+            # ImageNet weights only exist for the full-width model
+            model = models.mobilenet_v2(width_mult=width_mult)
+        model.classifier[1] = nn.Linear(model.last_channel, num_classes)
+    elif architecture == 'mobilenet_v3_small':
+        if width_mult != 1.0:
+            raise ValueError('width_mult is only supported for mobilenet_v2')
+        model = models.mobilenet_v3_small(pretrained=pretrained)
+        model.classifier[3] = nn.Linear(model.classifier[3].in_features, num_classes)
+    else:
+        raise ValueError(f'Unknown architecture: {architecture}')
+    return model
+
+
+def load_model(model_path, device='cpu'):
+    """Load a trained checkpoint (any architecture) in eval mode"""
+    checkpoint = torch.load(model_path, map_location=device)
+    model = build_model(
+        checkpoint.get('architecture', 'mobilenet_v2'),
+        checkpoint['num_classes'],
+        checkpoint.get('width_mult', 1.0),
+        pretrained=False
+    )
+    model.load_state_dict(checkpoint['model_state_dict'])
+    return model.to(device).eval(), checkpoint
+
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature, alpha):
+    """Soft-label KL divergence to the teacher (scaled by T^2) blended with hard-label cross entropy"""
+    soft_loss = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.softmax(teacher_logits / temperature, dim=1),
+        reduction='batchmean'
+    ) * temperature ** 2
+    hard_loss = F.cross_entropy(student_logits, labels)
+    return alpha * soft_loss + (1 - alpha) * hard_loss
+
+
+def evaluate_accuracy(model, loader, device):
+    """Top-1 accuracy (%) of a model on a data loader"""
+    model.eval()
+    correct = 0
+    total = 0
+    with torch.no_grad():
+        for inputs, labels in loader:
+            inputs, labels = inputs.to(device), labels.to(device)
+            correct += model(inputs).argmax(1).eq(labels).sum().item()
+            total += labels.size(0)
+    return 100. * correct / total if total else 0.0
+
+
+def measure_latency(model, runs=50, image_size=224):
+    """Single-image, single-thread CPU latency in ms (close to one phone core)"""
+    model = copy.deepcopy(model).cpu().eval()
+    inputs = torch.randn(1, 3, image_size, image_size)
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        with torch.no_grad():
+            for _ in range(5):
+                model(inputs)
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                model(inputs)
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        torch.set_num_threads(threads)
+    samples.sort()
+    return {
+        'mean_ms': round(sum(samples) / len(samples), 2),
+        'p50_ms': round(samples[len(samples) // 2], 2)
+    }
+
+
+def model_summary(model, architecture, width_mult, val_loader, device):
+    return {
+        'architecture': architecture,
+        'width_mult': width_mult,
+        'parameters': sum(p.numel() for p in model.parameters()),
+        'val_accuracy': round(evaluate_accuracy(model, val_loader, device), 2),
+        'latency': measure_latency(model)
+    }
+
+
 def train_model(
     dataset_path,
     model_name,
@@ -65,9 +168,23 @@ def train_model(
     batch_size=32,
     learning_rate=0.001,
     output_dir='./models',
-    callback=None
+    callback=None,
+    architecture='mobilenet_v2',
+    width_mult=1.0,
+    teacher_path=None,
+    temperature=4.0,
+    alpha=0.7,
+    split_seed=None
 ):
-    """Train MobileNetV2 model"""
+    """
+    Train a classifier (MobileNetV2 by default).
+
+    With teacher_path (a previously trained <model>.pth), runs in distillation
+    mode: the model is trained as a student against the teacher's temperature-
+    softened predictions (weight alpha) plus the true labels (weight 1 - alpha),
+    and the results include a teacher vs student accuracy / latency comparison.
+    The validation split then uses the teacher's split_seed (SPLIT_SEED otherwise).
+    """
     
     logger.info("=" * 60)
     logger.info("STARTING MODEL TRAINING")
@@ -76,6 +193,7 @@ def train_model(
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     logger.info(f"Device: {device}")
     logger.info(f"Model name: {model_name}")
+    logger.info(f"Architecture: {architecture} (width {width_mult})")
     logger.info(f"Output directory: {output_dir}")
     
     # Transforms
@@ -96,13 +214,36 @@ def train_model(
     
     # Load dataset
     logger.info(f"Loading dataset: {dataset_path}")
-    full_dataset = datasets.ImageFolder(root=dataset_path, transform=train_transform)
+    # Reduced-size JPEG decode: phone photos are decoded close to 224px instead of full resolution
+    full_dataset = datasets.ImageFolder(root=dataset_path, transform=train_transform, loader=load_image)
+    
+    # Teacher (distillation mode), loaded first so the student reuses its validation split
+    teacher = None
+    if teacher_path:
+        teacher, teacher_checkpoint = load_model(teacher_path, device)
+        if teacher_checkpoint.get('class_names') != full_dataset.classes:
+            raise ValueError(f'Teacher {teacher_path} was trained on different classes than {dataset_path}')
+        for param in teacher.parameters():
+            param.requires_grad = False
+        logger.info(f"🎓 Distilling from teacher: {teacher_path} (T={temperature}, alpha={alpha})")
+
+        if split_seed is None:
+            split_seed = teacher_checkpoint.get('split_seed')
+        if teacher_checkpoint.get('split_seed') is None:
+            logger.warning("⚠️ Teacher has no recorded split seed: its validation accuracy may include "
+                           "images it was trained on")
+        elif (teacher_checkpoint['split_seed'] != split_seed or
+              teacher_checkpoint.get('dataset_size') != len(full_dataset)):
+            logger.warning("⚠️ Validation split differs from the teacher's (seed or dataset size): its "
+                           "validation accuracy may include images it was trained on")
+    if split_seed is None:
+        split_seed = SPLIT_SEED
     
-    # Split
+    # Split (seeded, so it can be reproduced for the comparison above and by later students)
     train_size = int(0.8 * len(full_dataset))
     val_size = len(full_dataset) - train_size
     train_dataset, val_dataset = torch.utils.data.random_split(
-        full_dataset, [train_size, val_size]
+        full_dataset, [train_size, val_size], generator=torch.Generator().manual_seed(split_seed)
     )
     val_dataset.dataset.transform = val_transform
     
@@ -111,12 +252,11 @@ def train_model(
     
     num_classes = len(full_dataset.classes)
     total_images = len(full_dataset)
-    logger.info(f"Classes: {num_classes}, Train: {train_size}, Val: {val_size}")
+    logger.info(f"Classes: {num_classes}, Train: {train_size}, Val: {val_size} (split seed {split_seed})")
     logger.info(f"Total images: {total_images}")
     
     # Model
-    model = models.mobilenet_v2(pretrained=True)
-    model.classifier[1] = nn.Linear(model.last_channel, num_classes)
+    model = build_model(architecture, num_classes, width_mult)
     model = model.to(device)
     
     criterion = nn.CrossEntropyLoss()
@@ -153,7 +293,12 @@ def train_model(
             
             optimizer.zero_grad()
             outputs = model(inputs)
-            loss = criterion(outputs, labels)
+            if teacher is not None:
+                with torch.no_grad():
+                    teacher_outputs = teacher(inputs)
+                loss = distillation_loss(outputs, teacher_outputs, labels, temperature, alpha)
+            else:
+                loss = criterion(outputs, labels)
             loss.backward()
             optimizer.step()
             
@@ -231,13 +376,44 @@ def train_model(
                 'val_accuracy': val_accuracy,
                 'best_accuracy': best_accuracy,
                 'num_classes': num_classes,
-                'class_names': full_dataset.classes
+                'class_names': full_dataset.classes,
+                'architecture': architecture,
+                'width_mult': width_mult,
+                'teacher_path': str(teacher_path) if teacher_path else None,
+                'split_seed': split_seed,
+                'dataset_size': total_images
             }, model_path)
             
             logger.info(f"✅ Saved best model: {model_path}")
         
         scheduler.step()
     
+    # Teacher vs student, side by side (best student checkpoint, on the teacher's held-out split)
+    distillation = None
+    if teacher is not None:
+        model.load_state_dict(torch.load(model_path, map_location=device)['model_state_dict'])
+        distillation = {
+            'teacher_path': str(teacher_path),
+            'temperature': temperature,
+            'alpha': alpha,
+            'teacher': model_summary(
+                teacher,
+                teacher_checkpoint.get('architecture', 'mobilenet_v2'),
+                teacher_checkpoint.get('width_mult', 1.0),
+                val_loader,
+                device
+            ),
+            'student': model_summary(model, architecture, width_mult, val_loader, device)
+        }
+        for role in ('teacher', 'student'):
+            summary = distillation[role]
+            logger.info(
+                f"🎓 {role.capitalize():<8} {summary['architecture']} x{summary['width_mult']}: "
+                f"{summary['parameters'] / 1e6:.2f}M params | "
+                f"Val Acc: {summary['val_accuracy']:.2f}% | "
+                f"CPU latency: {summary['latency']['p50_ms']:.1f} ms"
+            )
+    
     # ✅ Save final files in the model folder
     
     # 1. Save label_map.json
@@ -251,6 +427,7 @@ def train_model(
     with open(result_path, 'w') as f:
         json.dump({
             'model_name': model_name,
+            'dataset_path': str(Path(dataset_path).absolute()),
             'epochs': epochs,
             'best_epoch': best_epoch,
             'best_accuracy': best_accuracy,
@@ -260,7 +437,11 @@ def train_model(
             'total_images': total_images,
             'train_images': train_size,
             'val_images': val_size,
+            'split_seed': split_seed,
             'class_names': full_dataset.classes,
+            'architecture': architecture,
+            'width_mult': width_mult,
+            'distillation': distillation,
             'history': history,
             'hyperparameters': {
                 'epochs': epochs,
@@ -291,6 +472,9 @@ def train_model(
         'val_accuracy': final_val_accuracy,
         'num_classes': num_classes,
         'total_images': total_images,
+        'split_seed': split_seed,
         'history': history,
+        'architecture': architecture,
+        'distillation': distillation,
         'model_dir': str(model_dir.absolute())
     }
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import math
 import threading
 from datetime import datetime
 from pathlib import Path
@@ -15,8 +16,9 @@ import requests
 load_dotenv()
 
 # Import scripts
-from scripts.train import train_model, validate_training_data
-# from scripts.inference import predict_image
+from scripts.train import train_model, validate_training_data, ARCHITECTURES
+from scripts.inference import configure_cascade, embed_bytes, get_cascade, load_classifier, predict_image
+from scripts.embedding_index import EmbeddingIndex, load_index_model
 # from scripts.plotting import generate_training_plot
 
 # Initialize Flask
@@ -66,6 +68,80 @@ training_state = {
 
 training_thread = None
 
+# Training state is mirrored to this file, so every worker of the pre-fork
+# server (gunicorn.conf.py) reports the same status whichever one is training
+TRAINING_STATE_FILE = Path('logs') / 'training_state.json'
+
+
+def publish_training_state():
+    """Write training_state for the other worker processes"""
+    tmp_path = TRAINING_STATE_FILE.with_name(f'{TRAINING_STATE_FILE.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(training_state, f, default=str)
+    os.replace(tmp_path, TRAINING_STATE_FILE)
+
+
+def current_training_state():
+    """Training state as last published by any worker"""
+    try:
+        with open(TRAINING_STATE_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return training_state
+
+
+# Load the inference model at import time. Under gunicorn with preload_app
+# (gunicorn.conf.py) this runs once in the master process, before the workers
+# are forked, so they all share one copy of the weights.
+if os.getenv('MODEL_PATH'):
+    try:
+        load_classifier(os.getenv('MODEL_PATH'), os.getenv('LABELS_PATH'))
+    except Exception as e:
+        logger.error(f"❌ Failed to preload model: {str(e)}")
+
+# Optional inference cascade: a cheap first stage (CASCADE_MODEL_PATH, e.g. a
+# distilled student, and/or a lower CASCADE_IMAGE_SIZE), escalating to MODEL_PATH
+# only below CASCADE_THRESHOLD top-1 confidence
+if os.getenv('MODEL_PATH') and (os.getenv('CASCADE_MODEL_PATH') or os.getenv('CASCADE_IMAGE_SIZE')):
+    try:
+        configure_cascade(
+            os.getenv('MODEL_PATH'),
+            os.getenv('LABELS_PATH'),
+            fast_model_path=os.getenv('CASCADE_MODEL_PATH'),
+            fast_image_size=int(os.getenv('CASCADE_IMAGE_SIZE', 224)),
+            threshold=float(os.getenv('CASCADE_THRESHOLD', 0.8)),
+            audit_rate=float(os.getenv('CASCADE_AUDIT_RATE', 0.05))
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to configure inference cascade: {str(e)}")
+
+# Optional nearest-neighbour index of labelled reference embeddings
+# (scripts/embedding_index.py). The vectors are memory-mapped, so the workers
+# share them through the page cache; references added by one worker are picked
+# up by the others on their next query. Queries are embedded with the model
+# the index was built with (MODEL_PATH if it records none), which must match
+# the index's embedding dim.
+EMBEDDING_INDEX_DIR = os.getenv('EMBEDDING_INDEX_DIR')
+embedding_index = None
+embedding_model_path = None
+
+
+def get_embedding_index():
+    global embedding_index, embedding_model_path
+    if embedding_index is None and EMBEDDING_INDEX_DIR and (Path(EMBEDDING_INDEX_DIR) / 'meta.json').exists():
+        index = EmbeddingIndex(EMBEDDING_INDEX_DIR)
+        _, embedding_model_path = load_index_model(index, os.getenv('MODEL_PATH'))
+        embedding_index = index
+        logger.info(f"📚 Embedding index: {embedding_index.meta['count']} references, "
+                    f"{len(embedding_index.species)} species")
+    return embedding_index
+
+
+try:
+    get_embedding_index()
+except Exception as e:
+    logger.error(f"❌ Failed to load embedding index: {str(e)}")
+
 
 # ============================================
 # Authentication Middleware
@@ -101,7 +177,9 @@ def health_check():
         'timestamp': datetime.now().isoformat(),
         'gpu_available': torch.cuda.is_available(),
         'device': str(torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'CPU'),
-        'is_training': training_state['is_training']
+        'is_training': current_training_state()['is_training'],
+        'worker_pid': os.getpid(),
+        'torch_threads': torch.get_num_threads()
     })
 
 
@@ -115,11 +193,12 @@ def start_training():
     global training_state, training_thread
     
     try:
-        if training_state['is_training']:
+        current_state = current_training_state()
+        if current_state['is_training']:
             return jsonify({
                 'success': False,
                 'error': 'Training already in progress',
-                'status': training_state
+                'status': current_state
             }), 409
         
         data = request.get_json()
@@ -129,10 +208,53 @@ def start_training():
         batch_size = data.get('batch_size', int(os.getenv('BATCH_SIZE', 32)))
         learning_rate = data.get('learning_rate', float(os.getenv('LEARNING_RATE', 0.001)))
         model_name = data.get('model_name', f'model_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+        architecture = data.get('architecture', 'mobilenet_v2')
+        teacher_model = data.get('teacher_model')
+        try:
+            width_mult = float(data.get('width_mult', 1.0))
+            temperature = float(data.get('temperature', 4.0))
+            alpha = float(data.get('alpha', 0.7))
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'width_mult, temperature and alpha must be numbers'
+            }), 400
+        
+        if architecture not in ARCHITECTURES:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown architecture: {architecture}',
+                'architectures': list(ARCHITECTURES)
+            }), 400
+        
+        if (not all(map(math.isfinite, (width_mult, temperature, alpha)))
+                or width_mult <= 0 or temperature <= 0 or not 0 <= alpha <= 1):
+            return jsonify({
+                'success': False,
+                'error': 'width_mult and temperature must be > 0 and alpha in [0, 1]'
+            }), 400
+        if architecture != 'mobilenet_v2' and width_mult != 1.0:
+            return jsonify({
+                'success': False,
+                'error': f'width_mult is only supported for mobilenet_v2, not {architecture}'
+            }), 400
         
         logger.info(f"📚 Training request: {model_name}")
         logger.info(f"   Dataset: {dataset_path}")
         logger.info(f"   Epochs: {epochs}, Batch: {batch_size}, LR: {learning_rate}")
+        logger.info(f"   Architecture: {architecture} (width {width_mult})")
+        
+        # Distillation mode: student trained against an existing model's soft labels
+        teacher_path = None
+        if teacher_model:
+            teacher_name = secure_filename(teacher_model)
+            teacher_path = Path(app.config['MODEL_FOLDER']) / teacher_name / f'{teacher_name}.pth'
+            if not teacher_path.exists():
+                return jsonify({
+                    'success': False,
+                    'error': f'Teacher model not found: {teacher_model}'
+                }), 404
+            logger.info(f"   Teacher: {teacher_name} (T={temperature}, alpha={alpha})")
         
         # Validate dataset
         validation = validate_training_data(dataset_path)
@@ -162,6 +284,7 @@ def start_training():
                 'val_accuracy': []
             }
         })
+        publish_training_state()
         
         # Start training in background
         def train_background():
@@ -174,7 +297,12 @@ def start_training():
                     batch_size=batch_size,
                     learning_rate=learning_rate,
                     output_dir=app.config['MODEL_FOLDER'],
-                    callback=update_training_progress
+                    callback=update_training_progress,
+                    architecture=architecture,
+                    width_mult=width_mult,
+                    teacher_path=teacher_path,
+                    temperature=temperature,
+                    alpha=alpha
                 )
                 
                 training_state.update({
@@ -183,6 +311,7 @@ def start_training():
                     'message': 'Training completed',
                     'result': result
                 })
+                publish_training_state()
                 
                 logger.info(f"✅ Training completed: {model_name}")
 
@@ -195,6 +324,7 @@ def start_training():
                     'message': f'Training failed: {str(e)}',
                     'error': str(e)
                 })
+                publish_training_state()
         
                 try:
                     backend_url = os.getenv('BACKEND_URL', 'http://localhost:5000')
@@ -252,6 +382,7 @@ def update_training_progress(epoch, total_epochs, train_loss, train_acc, val_los
     training_state['history']['train_accuracy'].append(float(train_acc))
     training_state['history']['val_loss'].append(float(val_loss))
     training_state['history']['val_accuracy'].append(float(val_acc))
+    publish_training_state()
 
 def notify_backend_training_complete(result, model_name):
     """Notify backend when training is complete"""
@@ -305,7 +436,7 @@ def get_training_status():
     """Get current training status"""
     return jsonify({
         'success': True,
-        'status': training_state
+        'status': current_training_state()
     })
 
 
@@ -315,15 +446,17 @@ def stop_training():
     """Stop ongoing training"""
     global training_state
     
-    if not training_state['is_training']:
+    if not current_training_state()['is_training']:
         return jsonify({
             'success': False,
             'error': 'No training in progress'
         }), 400
     
     # TODO: Implement proper training cancellation
+    training_state.update(current_training_state())
     training_state['is_training'] = False
     training_state['message'] = 'Training stopped by user'
+    publish_training_state()
     
     logger.info("🛑 Training stopped")
     
@@ -391,6 +524,137 @@ def predict():
         }), 500
 
 
+@app.route('/api/inference/cascade', methods=['GET'])
+@require_api_key
+def get_cascade_metrics():
+    """Inference cascade metrics (escalation rate, per-stage latency, agreement) of this worker"""
+    cascade = get_cascade()
+    return jsonify({
+        'success': True,
+        'enabled': cascade is not None,
+        'worker_pid': os.getpid(),
+        'cascade': cascade.metrics() if cascade else None
+    })
+
+
+# ============================================
+# Embedding Index Endpoints
+# ============================================
+@app.route('/api/embeddings/search', methods=['POST'])
+@require_api_key
+def search_embeddings():
+    """Nearest reference images of an uploaded image (mode=knn adds kNN species predictions)"""
+    try:
+        index = get_embedding_index()
+        if index is None:
+            return jsonify({
+                'success': False,
+                'error': 'Embedding index not configured'
+            }), 404
+
+        if 'image' not in request.files or request.files['image'].filename == '':
+            return jsonify({
+                'success': False,
+                'error': 'No image file provided'
+            }), 400
+
+        k = min(int(request.form.get('k', 10)), 100)
+        mode = request.form.get('mode', 'neighbours')
+        if mode not in ('neighbours', 'knn'):
+            return jsonify({
+                'success': False,
+                'error': "mode must be 'neighbours' or 'knn'"
+            }), 400
+
+        embedding = embed_bytes(request.files['image'].read(), embedding_model_path)
+        if mode == 'knn':
+            predictions, neighbours = index.knn_classify(embedding, k)
+        else:
+            predictions, neighbours = None, index.neighbours(embedding, k)
+
+        return jsonify({
+            'success': True,
+            'mode': mode,
+            'predictions': predictions,
+            'neighbours': neighbours,
+            'source': 'ai-server'
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Embedding search failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/embeddings/references', methods=['POST'])
+@require_api_key
+def add_embedding_reference():
+    """Index a labelled reference image (onboards new species without retraining)"""
+    try:
+        index = get_embedding_index()
+        if index is None:
+            return jsonify({
+                'success': False,
+                'error': 'Embedding index not configured'
+            }), 404
+
+        species = request.form.get('species', '').strip()
+        if not species:
+            return jsonify({
+                'success': False,
+                'error': 'species is required'
+            }), 400
+
+        files = [f for f in request.files.getlist('image') if f.filename]
+        if not files:
+            return jsonify({
+                'success': False,
+                'error': 'No image file provided'
+            }), 400
+
+        embeddings = [embed_bytes(f.read(), embedding_model_path) for f in files]
+        index.add(embeddings, [species] * len(files), [secure_filename(f.filename) for f in files])
+        logger.info(f"📚 Indexed {len(files)} reference(s) for '{species}'")
+
+        return jsonify({
+            'success': True,
+            'species': species,
+            'added': len(files),
+            'index': index.info()
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Failed to add reference: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/embeddings/index', methods=['GET'])
+@require_api_key
+def get_embedding_index_info():
+    """Embedding index size, species count and IVF / PQ settings"""
+    try:
+        index = get_embedding_index()
+    except Exception as e:
+        logger.error(f"❌ Failed to load embedding index: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+    if index is not None:
+        index.refresh()
+    return jsonify({
+        'success': True,
+        'enabled': index is not None,
+        'index': index.info() if index else None
+    })
+
+
 # ============================================
 # Model Management
 # ============================================
@@ -423,7 +687,8 @@ def list_models():
                         'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
                         'accuracy': results.get('best_accuracy'),
                         'epochs': results.get('epochs'),
-                        'num_classes': results.get('num_classes')
+                        'num_classes': results.get('num_classes'),
+                        'architecture': results.get('architecture', 'mobilenet_v2')
                     })
         
         return jsonify({
@@ -540,4 +805,5 @@ if __name__ == '__main__':
     logger.info(f"🖥️  Device: {'GPU - ' + torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'CPU'}")
     logger.info("=" * 60)
     
+    publish_training_state()  # Clear any state left by a previous run
     app.run(host=host, port=port, debug=debug, threaded=True)
\ No newline at end of file
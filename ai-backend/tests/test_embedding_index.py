@@ -0,0 +1,37 @@
+import numpy as np
+
+from scripts.embedding_index import EmbeddingIndex
+
+DIM = 8
+
+
+def unit(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+def test_append_after_a_crashed_writer_drops_the_uncommitted_rows(tmp_path):
+    index = EmbeddingIndex.create(tmp_path / 'index', DIM)
+    index.add(np.stack([unit(0), unit(1)]), ['fern', 'moss'], ['a.jpg', 'b.jpg'])
+
+    # A writer died after appending data but before committing the new count in meta.json
+    with open(index.index_dir / 'vectors.f32', 'ab') as f:
+        f.write(np.stack([unit(2), unit(3)]).tobytes()[:DIM * 6])
+    with open(index.index_dir / 'labels.i32', 'ab') as f:
+        f.write(np.asarray([0, 1], dtype=np.int32).tobytes())
+    with open(index.index_dir / 'refs.txt', 'a', encoding='utf-8') as f:
+        f.write('lost-1.jpg\nlost-2')
+
+    reader = EmbeddingIndex(index.index_dir)
+    assert reader.meta['count'] == 2
+    assert reader.neighbours(unit(1), k=1)[0]['reference'] == 'b.jpg'
+
+    index.add(unit(4)[None], ['orchid'], ['c.jpg'])
+    assert (index.index_dir / 'vectors.f32').stat().st_size == 3 * DIM * 4
+    assert (index.index_dir / 'labels.i32').stat().st_size == 3 * 4
+    assert (index.index_dir / 'refs.txt').read_text(encoding='utf-8') == 'a.jpg\nb.jpg\nc.jpg\n'
+
+    reader.refresh()  # Another process picks up the committed append
+    assert reader.species == ['fern', 'moss', 'orchid']
+    assert reader.neighbours(unit(4), k=1)[0] == {'species': 'orchid', 'similarity': 1.0, 'reference': 'c.jpg'}
@@ -1,6 +1,8 @@
 -- Drop tables if they exist (in reverse order of dependencies)
 DROP TABLE IF EXISTS Alerts;
 DROP TABLE IF EXISTS AuditLogs;
+DROP TABLE IF EXISTS RollupState;
+DROP TABLE IF EXISTS SensorReadingRollups;
 DROP TABLE IF EXISTS SensorReadings;
 DROP TABLE IF EXISTS PlantObservations;
 DROP TABLE IF EXISTS IoTSensors;
@@ -73,6 +75,26 @@ CREATE TABLE SensorReadings (
     FOREIGN KEY (sensor_id) REFERENCES IoTSensors(sensor_id) ON DELETE CASCADE
 );
 
+-- Create SensorReadingRollups table (1-minute / 1-hour aggregates, see migrations/003)
+CREATE TABLE SensorReadingRollups (
+    sensor_id INT NOT NULL,
+    resolution ENUM('1m', '1h') NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    reading_type ENUM('temperature', 'humidity', 'soil_moisture', 'sound', 'motion') NOT NULL,
+    min_value DECIMAL(10,2) NOT NULL,
+    max_value DECIMAL(10,2) NOT NULL,
+    sum_value DECIMAL(16,2) NOT NULL,
+    reading_count INT NOT NULL,
+    PRIMARY KEY (sensor_id, resolution, bucket_start, reading_type)
+);
+
+-- Create RollupState table (rollup job watermarks)
+CREATE TABLE RollupState (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_reading_id INT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 -- Create AuditLogs table
 CREATE TABLE AuditLogs (
     log_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -112,7 +134,7 @@ CREATE TABLE refresh_tokens (
   INDEX idx_token (token),
   INDEX idx_expires (expires_at),
   FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
-)
+);
 
 CREATE TABLE mfa_codes (
   id INT AUTO_INCREMENT PRIMARY KEY,
@@ -128,7 +150,7 @@ CREATE TABLE mfa_codes (
   INDEX idx_code (code),
   INDEX idx_expires (expires_at),
   FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
-)
+);
 
 CREATE TABLE token_blacklist (
   id INT AUTO_INCREMENT PRIMARY KEY,
@@ -155,17 +177,17 @@ CREATE TABLE training_history (
   FOREIGN KEY (triggered_by) REFERENCES Users(user_id) ON DELETE CASCADE,
   INDEX idx_status (status),
   INDEX idx_created (created_at)
-)
+);
 
 
 -- Create indexes for better performance
-CREATE INDEX idx_sensor_readings_sensor_id ON SensorReadings(sensor_id);
 CREATE INDEX idx_sensor_readings_time ON SensorReadings(reading_time);
+CREATE INDEX idx_sensor_readings_sensor_time ON SensorReadings(sensor_id, reading_time);
 CREATE INDEX idx_plant_observations_user_id ON PlantObservations(user_id);
 CREATE INDEX idx_plant_observations_plant_id ON PlantObservations(plant_id);
 CREATE INDEX idx_plant_observations_date ON PlantObservations(observation_date);
 CREATE INDEX idx_alerts_sensor_id ON Alerts(sensor_id);
-CREATE INDEX idx_alerts_observation_id ON Alerts(observation_id);
+CREATE INDEX idx_alerts_observation_type_created ON Alerts(observation_id, alert_type, created_at);
 CREATE INDEX idx_audit_logs_user_id ON AuditLogs(user_id);
 CREATE INDEX idx_audit_logs_time ON AuditLogs(action_time);
 CREATE INDEX idx_plant_observations_verified_by ON PlantObservations(verified_by);
@@ -0,0 +1,51 @@
+-- Composite indexes for the alert monitor and sensor history queries.
+--   SensorReadings(reading_time)             monitor lookback window / time-range scans
+--   SensorReadings(sensor_id, reading_time)  per-sensor history (SensorData.findBy*)
+--   Alerts(observation_id, alert_type, created_at)  debounce and per-observation alert lookups
+-- The composite indexes supersede the single-column sensor_id / observation_id
+-- indexes; they keep a leading sensor_id / observation_id column so the foreign
+-- keys stay backed by an index.
+--
+-- Idempotent: safe to run against databases where init.sql's index section
+-- was (or was not) applied.
+
+DROP PROCEDURE IF EXISTS add_index_if_missing;
+DROP PROCEDURE IF EXISTS drop_index_if_exists;
+
+DELIMITER //
+CREATE PROCEDURE add_index_if_missing(IN tbl VARCHAR(64), IN idx VARCHAR(64), IN cols VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND INDEX_NAME = idx
+    ) THEN
+        SET @ddl = CONCAT('CREATE INDEX ', idx, ' ON ', tbl, '(', cols, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+CREATE PROCEDURE drop_index_if_exists(IN tbl VARCHAR(64), IN idx VARCHAR(64))
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND INDEX_NAME = idx
+    ) THEN
+        SET @ddl = CONCAT('DROP INDEX ', idx, ' ON ', tbl);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+CALL add_index_if_missing('SensorReadings', 'idx_sensor_readings_time', 'reading_time');
+CALL add_index_if_missing('SensorReadings', 'idx_sensor_readings_sensor_time', 'sensor_id, reading_time');
+CALL drop_index_if_exists('SensorReadings', 'idx_sensor_readings_sensor_id');
+
+CALL add_index_if_missing('Alerts', 'idx_alerts_observation_type_created', 'observation_id, alert_type, created_at');
+CALL drop_index_if_exists('Alerts', 'idx_alerts_observation_id');
+
+DROP PROCEDURE add_index_if_missing;
+DROP PROCEDURE drop_index_if_exists;
@@ -0,0 +1,52 @@
+-- OPTIONAL: monthly range partitioning of SensorReadings.
+--
+-- MySQL requires the partitioning column in every unique key and does not
+-- support foreign keys on partitioned InnoDB tables, so this migration:
+--   * drops the SensorReadings -> IoTSensors foreign key (sensor deletes must
+--     then clean up their readings explicitly),
+--   * widens the primary key to (reading_id, reading_time).
+-- reading_id stays AUTO_INCREMENT and leads the primary key, so the alert
+-- monitor's "reading_id > ?" watermark scans are still primary-key range scans
+-- (pruned per partition). Old months can be dropped instantly with
+-- ALTER TABLE SensorReadings DROP PARTITION p2025_01.
+--
+-- Apply after 001_sensor_alert_indexes.sql. Adjust the partition list to the
+-- data range, and add next month's partition ahead of time with:
+--   ALTER TABLE SensorReadings REORGANIZE PARTITION pmax INTO (
+--       PARTITION p2026_02 VALUES LESS THAN ('2026-03-01'),
+--       PARTITION pmax VALUES LESS THAN (MAXVALUE));
+
+SET @fk_name = (
+    SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+    WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'SensorReadings'
+    LIMIT 1
+);
+SET @drop_fk = IF(@fk_name IS NULL, 'DO 0',
+                  CONCAT('ALTER TABLE SensorReadings DROP FOREIGN KEY ', @fk_name));
+PREPARE stmt FROM @drop_fk;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+ALTER TABLE SensorReadings
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (reading_id, reading_time);
+
+ALTER TABLE SensorReadings
+PARTITION BY RANGE COLUMNS(reading_time) (
+    PARTITION p2025_10 VALUES LESS THAN ('2025-11-01'),
+    PARTITION p2025_11 VALUES LESS THAN ('2025-12-01'),
+    PARTITION p2025_12 VALUES LESS THAN ('2026-01-01'),
+    PARTITION p2026_01 VALUES LESS THAN ('2026-02-01'),
+    PARTITION p2026_02 VALUES LESS THAN ('2026-03-01'),
+    PARTITION p2026_03 VALUES LESS THAN ('2026-04-01'),
+    PARTITION p2026_04 VALUES LESS THAN ('2026-05-01'),
+    PARTITION p2026_05 VALUES LESS THAN ('2026-06-01'),
+    PARTITION p2026_06 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_07 VALUES LESS THAN ('2026-08-01'),
+    PARTITION p2026_08 VALUES LESS THAN ('2026-09-01'),
+    PARTITION p2026_09 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p2026_10 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p2026_11 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p2026_12 VALUES LESS THAN ('2027-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
@@ -0,0 +1,29 @@
+-- Downsampled per-sensor rollups of SensorReadings, maintained incrementally by
+-- IOT/backend/sensor_rollup.py.
+--   SensorReadingRollups  min / max / sum / count per (sensor, type, bucket) at
+--                         1-minute ('1m') and 1-hour ('1h') resolution;
+--                         avg = sum_value / reading_count. Storing the sum keeps
+--                         rollups mergeable when late readings arrive.
+--   RollupState           reading_id watermark of each rollup job, updated in
+--                         the same transaction as the rollups it covers.
+-- The primary key serves the history query (sensor_id, resolution, time range).
+--
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS SensorReadingRollups (
+    sensor_id INT NOT NULL,
+    resolution ENUM('1m', '1h') NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    reading_type ENUM('temperature', 'humidity', 'soil_moisture', 'sound', 'motion') NOT NULL,
+    min_value DECIMAL(10,2) NOT NULL,
+    max_value DECIMAL(10,2) NOT NULL,
+    sum_value DECIMAL(16,2) NOT NULL,
+    reading_count INT NOT NULL,
+    PRIMARY KEY (sensor_id, resolution, bucket_start, reading_type)
+);
+
+CREATE TABLE IF NOT EXISTS RollupState (
+    job_name VARCHAR(50) PRIMARY KEY,
+    last_reading_id INT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -2,6 +2,10 @@ const Sensor = require("../models/Sensor");
 const SensorData = require("../models/SensorData");
 const IoTAlert = require("../models/IoTAlert");
 
+// Rollup resolutions written by IOT/backend/sensor_rollup.py
+const ROLLUP_RESOLUTIONS = ["1m", "1h"];
+const AUTO_MINUTE_RESOLUTION_MS = 6 * 60 * 60 * 1000; // Ranges up to 6 hours default to 1m buckets
+
 class SensorDataController {
   async getSensorData(req, res) {
     try {
@@ -140,6 +144,77 @@ class SensorDataController {
       });
     }
   }
+
+  async getAggregatedData(req, res) {
+    try {
+      const sensorId = String(req.params.id);
+      const { startTime, endTime } = req.query;
+
+      if (!startTime || !endTime) {
+        return res.status(400).json({
+          success: false,
+          error: "startTime and endTime are required",
+        });
+      }
+
+      const start = new Date(startTime);
+      const end = new Date(endTime);
+
+      if (isNaN(start.getTime()) || isNaN(end.getTime())) {
+        return res.status(400).json({
+          success: false,
+          error: "Invalid date format",
+        });
+      }
+
+      // Minute buckets for short ranges, hourly buckets otherwise
+      const resolution =
+        req.query.resolution ||
+        (end - start <= AUTO_MINUTE_RESOLUTION_MS ? "1m" : "1h");
+      if (!ROLLUP_RESOLUTIONS.includes(resolution)) {
+        return res.status(400).json({
+          success: false,
+          error: `resolution must be one of: ${ROLLUP_RESOLUTIONS.join(", ")}`,
+        });
+      }
+
+      // Check sensor
+      const sensor = await Sensor.findBySensorId(sensorId);
+      if (!sensor) {
+        return res.status(404).json({
+          success: false,
+          error: "Sensor not found",
+        });
+      }
+
+      const limit = Math.min(parseInt(req.query.limit || "1000", 10), 10000);
+      const data = await SensorData.findAggregated(
+        sensorId,
+        start,
+        end,
+        resolution,
+        limit
+      );
+
+      return res.json({
+        success: true,
+        sensor: {
+          sensorId: sensor.sensor_id,
+          name: sensor.sensor_name,
+        },
+        timeRange: { start, end },
+        resolution,
+        count: data.length,
+        data,
+      });
+    } catch (error) {
+      console.error("❌ Get aggregated data error:", error);
+      return res.status(500).json({
+        success: false,
+        error: "Failed to retrieve aggregated data",
+      });
+    }
+  }
 }
 
 module.exports = new SensorDataController();
@@ -7,6 +7,8 @@ const Training = require("../models/Training");
 exports.startTraining = async (req, res) => {
   try {
     const { epochs, batchSize, learningRate } = req.body;
+    // Optional distillation mode: train a compact student against an existing model
+    const { architecture, widthMult, teacherModel, temperature, alpha } = req.body;
     const modelName = req.body.modelName || `model_${Date.now()}`;
 
     const userId = req.user.id;
@@ -54,6 +56,11 @@ exports.startTraining = async (req, res) => {
       batchSize: batchSize || 32,
       learningRate: learningRate || 0.001,
       modelName: modelName,
+      architecture,
+      widthMult,
+      teacherModel,
+      temperature,
+      alpha,
     });
 
     // Update status
@@ -70,6 +70,36 @@ class SensorData {
     return rows;
 
   }
+  /**
+   * Get downsampled sensor data (min/max/avg/count per bucket) from the
+   * rollups maintained by IOT/backend/sensor_rollup.py
+   */
+  static async findAggregated(sensorId, startTime, endTime, resolution = "1h", limit = 1000) {
+    const query = `
+      SELECT 
+        r.bucket_start as bucketStart,
+        r.reading_type as readingType,
+        r.min_value as minValue,
+        r.max_value as maxValue,
+        ROUND(r.sum_value / r.reading_count, 2) as avgValue,
+        r.reading_count as count
+      FROM SensorReadingRollups r
+      WHERE r.sensor_id = ? AND r.resolution = ? AND r.bucket_start BETWEEN ? AND ?
+      ORDER BY r.bucket_start DESC
+      LIMIT ? 
+    `;
+
+    const [rows] = await pool.query(query, [
+      sensorId,
+      resolution,
+      startTime,
+      endTime,
+      limit,
+    ]);
+
+    return rows;
+  }
+
   /**
    * Delete old data (cleanup)
    */
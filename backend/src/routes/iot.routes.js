@@ -65,7 +65,11 @@ iotRouter.get('/sensors/:id/data/range',
   sensorDataController.getDataByTimeRange
 );
 
-// Sprint 2: Consider creating a route for data aggregation (for graphs)
+// Get downsampled sensor data (min/max/avg per 1m or 1h bucket) for graphs
+iotRouter.get('/sensors/:id/data/aggregate', 
+  requireExpert,
+  sensorDataController.getAggregatedData
+);
 
 // ============================================
 // Alert Management Routes
@@ -45,7 +45,13 @@ class AIServerService {
         epochs: options.epochs || 50,
         batch_size: options.batchSize || 32,
         learning_rate: options.learningRate || 0.001,
-        model_name: options.modelName || `model_${Date.now()}`
+        model_name: options.modelName || `model_${Date.now()}`,
+        // Distillation mode (optional): student architecture and teacher model name
+        architecture: options.architecture,
+        width_mult: options.widthMult,
+        teacher_model: options.teacherModel,
+        temperature: options.temperature,
+        alpha: options.alpha
       });
 
       
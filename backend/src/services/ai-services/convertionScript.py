@@ -1,53 +1,477 @@
-# Convert your Keras model to TensorFlow Lite
-import tensorflow as tf
+#!/usr/bin/env python3
+"""
+Convert a trained plant classifier (ai-backend train_model output) to a
+full-integer quantized TensorFlow Lite model for the mobile app.
 
-# Load your Keras model
-model = tf.keras.models.load_model('plantClassificationModel.keras')
+Input is a model directory as written by ai-backend/scripts/train.py:
 
-# Convert to TensorFlow Lite with optimization
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    models/<model_name>/<model_name>.pth     # checkpoint with model_state_dict
+    models/<model_name>/label_map.json       # class names, in output order
 
-# Optional: Use float16 quantization for smaller size
-converter.target_spec.supported_types = [tf.float16]
+The torchvision network (MobileNetV2 at any width, or a MobileNetV3-Small
+distilled student) is rebuilt layer by layer as a Keras model (NHWC,
+explicit padding, so the float port matches PyTorch to ~1e-5), with the
+ImageNet normalization and the softmax folded into the graph. It is then
+quantized to int8 weights and activations (TFLITE_BUILTINS_INT8 only), with
+activation ranges calibrated on a representative dataset sampled from the
+training folder. The model takes raw RGB pixels (uint8 input, scale 1,
+zero point 0) and returns float32 probabilities by default, which is what
+PlantClassifierService's uint8 path expects.
 
-tflite_model = converter.convert()
+Every run writes tflite_report.json next to the model: file sizes, CPU
+latency and top-1 accuracy / agreement of PyTorch vs float TFLite vs int8
+TFLite on held-out images from the same folder (disjoint from the
+calibration sample, but possibly seen during training - compare the
+models with each other, not with training_results.json).
 
-# Save the model
-with open('plant_classifier.tflite', 'wb') as f:
-    f.write(tflite_model)
+Usage:
+    python convertionScript.py ../../../../ai-backend/models/plants_v3
+    python convertionScript.py models/plants_v3 --dataset /data/plants --assets ../../../../frontend/assets/model
+"""
 
-# Also save labels
+import argparse
 import json
-labels = ["Rafflesia tuan-mudae",
-  "acalypha hispida",
-  "asplenium nidus",
-  "bambusa vulgaris",
-  "bougainvillea spectabilis",
-  "bulbophyllum beccarii",
-  "coelogyne nitida",
-  "cordyline fruticosa",
-  "couroupita guianensis",
-  "cycas revoluta",
-  "dendrobium nobile",
-  "dipteris conjugata",
-  "elaeis guineensis",
-  "eusideroxylon zwageri",
-  "heliconia rostrata",
-  "hibiscus rosa-sinensis",
-  "hymenocallis littoralis",
-  "ixora",
-  "licuala orbicularis",
-  "nepenthes lowii",
-  "nepenthes rajah",
-  "nypa fruticans",
-  "paphiopedilum sanderianum",
-  "phalaenopsis bellina",
-  "phalaenopsis gigantea",
-  "piper nigrum",
-  "polyalthia longifolia",
-  "pteridium aquilinum",
-  "rhizophora apiculata",
-  "zingiber officinale"] 
-with open('labels.json', 'w') as f:
-    json.dump(labels, f)
\ No newline at end of file
+import logging
+import random
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision import models
+from torchvision.models import mobilenetv2, mobilenetv3
+from torchvision.ops.misc import SqueezeExcitation
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ========== EXPORT SETTINGS ==========
+IMAGE_SIZE = 224
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)  # Same normalization as train_model
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+CALIBRATION_IMAGES = 300  # Representative dataset size (spread across classes)
+EVAL_IMAGES = 300  # Held-out images for the accuracy report
+LATENCY_RUNS = 100
+LATENCY_THREADS = 1  # Comparable to a single mobile CPU core
+SEED = 42
+IO_TYPES = {'float32': tf.float32, 'uint8': tf.uint8, 'int8': tf.int8}
+
+# App asset names (frontend/assets/model)
+APP_MODEL_NAME = 'plant_classifier.tflite'
+APP_LABELS_NAME = 'labels.json'
+
+
+# ========== TRAINING ARTIFACTS ==========
+
+def load_artifacts(model_dir):
+    """Load (checkpoint, labels, training results) from a train_model output directory."""
+    model_dir = Path(model_dir)
+    model_path = model_dir / f'{model_dir.name}.pth'
+    if not model_path.exists():
+        candidates = sorted(model_dir.glob('*.pth'))
+        if not candidates:
+            raise FileNotFoundError(f'No .pth checkpoint in {model_dir}')
+        model_path = candidates[0]
+
+    checkpoint = torch.load(model_path, map_location='cpu', weights_only=False)
+    with open(model_dir / 'label_map.json') as f:
+        labels = json.load(f)
+
+    results_path = model_dir / 'training_results.json'
+    results = {}
+    if results_path.exists():
+        with open(results_path) as f:
+            results = json.load(f)
+
+    logger.info(f"📦 Loaded {model_path.name}: {len(labels)} classes, "
+                f"val accuracy {checkpoint.get('val_accuracy', 0):.2f}% (epoch {checkpoint.get('epoch', 0) + 1})")
+    return model_path, checkpoint, labels, results
+
+
+def build_torch_model(checkpoint, num_classes):
+    """Rebuild the network train_model trained (see its build_model) and load its weights."""
+    architecture = checkpoint.get('architecture', 'mobilenet_v2')
+    if architecture == 'mobilenet_v2':
+        model = models.mobilenet_v2(weights=None, num_classes=num_classes,
+                                    width_mult=checkpoint.get('width_mult', 1.0))
+    elif architecture == 'mobilenet_v3_small':
+        model = models.mobilenet_v3_small(weights=None, num_classes=num_classes)
+    else:
+        raise ValueError(f'Unsupported architecture: {architecture}')
+    model.load_state_dict(checkpoint['model_state_dict'])
+    logger.info(f"🏗️  Architecture: {architecture} (width {checkpoint.get('width_mult', 1.0)})")
+    return model.eval()
+
+
+# ========== PYTORCH -> KERAS PORT ==========
+
+def _conv(layer: nn.Conv2d, x):
+    """Conv2d as explicit ZeroPadding2D + 'valid' conv, so stride-2 padding matches PyTorch exactly."""
+    weight = layer.weight.detach().numpy()
+    if layer.padding != (0, 0):
+        x = tf.keras.layers.ZeroPadding2D(layer.padding)(x)
+
+    depthwise = layer.groups > 1
+    if depthwise:
+        if layer.groups != layer.in_channels or layer.out_channels != layer.in_channels:
+            raise ValueError(f'Unsupported grouped convolution: {layer}')
+        keras_layer = tf.keras.layers.DepthwiseConv2D(
+            layer.kernel_size, strides=layer.stride, padding='valid', use_bias=layer.bias is not None)
+        kernel = weight.transpose(2, 3, 0, 1)  # [C, 1, kh, kw] -> [kh, kw, C, 1]
+    else:
+        keras_layer = tf.keras.layers.Conv2D(
+            layer.out_channels, layer.kernel_size, strides=layer.stride, padding='valid',
+            use_bias=layer.bias is not None)
+        kernel = weight.transpose(2, 3, 1, 0)  # [out, in, kh, kw] -> [kh, kw, in, out]
+
+    x = keras_layer(x)
+    keras_layer.set_weights([kernel] + ([layer.bias.detach().numpy()] if layer.bias is not None else []))
+    return x
+
+
+def _batch_norm(layer: nn.BatchNorm2d, x):
+    keras_layer = tf.keras.layers.BatchNormalization(epsilon=layer.eps)
+    x = keras_layer(x)
+    keras_layer.set_weights([
+        layer.weight.detach().numpy(),
+        layer.bias.detach().numpy(),
+        layer.running_mean.numpy(),
+        layer.running_var.numpy(),
+    ])
+    return x
+
+
+def _hard_sigmoid(x):
+    """relu6(x + 3) / 6, as torch.nn.Hardsigmoid (Keras' own hard_sigmoid has different slopes)."""
+    x = tf.keras.layers.Rescaling(scale=1.0, offset=3.0)(x)
+    x = tf.keras.layers.ReLU(max_value=6.0)(x)
+    return tf.keras.layers.Rescaling(scale=1.0 / 6.0)(x)
+
+
+def _port(module: nn.Module, x):
+    """Translate the MobileNet modules (conv / BN / activations / inverted residual and SE blocks)."""
+    if isinstance(module, mobilenetv2.InvertedResidual):
+        y = _port(module.conv, x)
+        return tf.keras.layers.Add()([x, y]) if module.use_res_connect else y
+    if isinstance(module, mobilenetv3.InvertedResidual):
+        y = _port(module.block, x)
+        return tf.keras.layers.Add()([x, y]) if module.use_res_connect else y
+    if isinstance(module, SqueezeExcitation):
+        scale = tf.keras.layers.GlobalAveragePooling2D(keepdims=True)(x)
+        scale = _port(module.fc1, scale)
+        scale = _port(module.activation, scale)
+        scale = _port(module.fc2, scale)
+        scale = _port(module.scale_activation, scale)
+        return tf.keras.layers.Multiply()([x, scale])
+    if isinstance(module, nn.Sequential):
+        for child in module:
+            x = _port(child, x)
+        return x
+    if isinstance(module, nn.Conv2d):
+        return _conv(module, x)
+    if isinstance(module, nn.BatchNorm2d):
+        return _batch_norm(module, x)
+    if isinstance(module, nn.ReLU6):
+        return tf.keras.layers.ReLU(max_value=6.0)(x)
+    if isinstance(module, nn.ReLU):
+        return tf.keras.layers.ReLU()(x)
+    if isinstance(module, nn.Hardsigmoid):
+        return _hard_sigmoid(x)
+    if isinstance(module, nn.Hardswish):
+        return tf.keras.layers.Multiply()([x, _hard_sigmoid(x)])
+    if isinstance(module, nn.Linear):
+        dense = tf.keras.layers.Dense(module.out_features)
+        x = dense(x)
+        dense.set_weights([module.weight.detach().numpy().T, module.bias.detach().numpy()])
+        return x
+    if isinstance(module, nn.Dropout):
+        return x  # No-op at inference
+    raise ValueError(f'No Keras translation for {type(module).__name__}')
+
+
+def to_keras(model: nn.Module):
+    """
+    Keras (NHWC) copy of a torchvision MobileNet classifier. Takes raw 0-255
+    RGB pixels and returns softmax probabilities.
+    """
+    inputs = tf.keras.Input(shape=(IMAGE_SIZE, IMAGE_SIZE, 3), batch_size=1, name='image')
+    # (x / 255 - mean) / std as one affine op, folded into the first conv by the converter
+    x = tf.keras.layers.Rescaling(scale=1.0 / (255.0 * STD), offset=-MEAN / STD)(inputs)
+    x = _port(model.features, x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    x = _port(model.classifier, x)
+    outputs = tf.keras.layers.Softmax(name='probabilities')(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+# ========== DATASET SAMPLING ==========
+
+def sample_images(dataset_path, labels, count, seed=SEED, exclude=frozenset()):
+    """Up to `count` (path, label index) pairs, round-robin across the class folders."""
+    dataset_path = Path(dataset_path)
+    rng = random.Random(seed)
+    per_class = []
+    for index, name in enumerate(labels):
+        class_dir = dataset_path / name
+        if not class_dir.is_dir():
+            logger.warning(f"⚠️ Class folder missing from dataset: {name}")
+            continue
+        files = sorted(p for p in class_dir.iterdir()
+                       if p.suffix.lower() in IMAGE_EXTENSIONS and p not in exclude)
+        rng.shuffle(files)
+        per_class.append([(path, index) for path in files])
+
+    samples = []
+    while len(samples) < count and any(per_class):
+        for files in per_class:
+            if files and len(samples) < count:
+                samples.append(files.pop())
+    return samples
+
+
+def load_image(path):
+    """
+    HWC uint8 RGB at IMAGE_SIZE, decoded like ai-backend's scripts/preprocessing.py
+    (reduced-size JPEG decode) and resized like train_model's Resize((224, 224)).
+    """
+    with Image.open(path) as image:
+        if image.format == 'JPEG':
+            image.draft('RGB', (IMAGE_SIZE, IMAGE_SIZE))
+        image = image.convert('RGB').resize((IMAGE_SIZE, IMAGE_SIZE), Image.BILINEAR)
+        return np.asarray(image, dtype=np.uint8)
+
+
+# ========== CONVERSION ==========
+
+def convert_float(keras_model):
+    """Unquantized reference model, for the accuracy comparison."""
+    return tf.lite.TFLiteConverter.from_keras_model(keras_model).convert()
+
+
+def convert_int8(keras_model, calibration, input_type='uint8', output_type='float32'):
+    """Full-integer model: every op in int8, calibrated on the representative images."""
+    def representative_dataset():
+        for pixels in calibration:
+            sample = pixels[np.newaxis].astype(np.float32)
+            # Pin the observed input range to 0-255 so the uint8 input is raw pixels (scale 1, zero point 0)
+            sample[0, 0, 0] = 0.0
+            sample[0, 0, 1] = 255.0
+            yield [sample]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]  # Fail instead of falling back to float
+    converter.inference_input_type = IO_TYPES[input_type]
+    converter.inference_output_type = IO_TYPES[output_type]
+    return converter.convert()
+
+
+class TFLiteClassifier:
+    """Runs a converted model on HWC uint8 pixels, handling (de)quantization of the I/O tensors."""
+
+    def __init__(self, model_content, num_threads=LATENCY_THREADS):
+        self.interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+
+    def set_input(self, pixels):
+        dtype = self.input['dtype']
+        data = pixels[np.newaxis].astype(np.float32)
+        if dtype != np.float32:
+            scale, zero_point = self.input['quantization']
+            info = np.iinfo(dtype)
+            data = np.clip(np.round(data / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input['index'], data.astype(dtype))
+
+    def get_output(self):
+        output = self.interpreter.get_tensor(self.output['index'])[0]
+        if self.output['dtype'] != np.float32:
+            scale, zero_point = self.output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def predict(self, pixels):
+        self.set_input(pixels)
+        self.interpreter.invoke()
+        return self.get_output()
+
+
+# ========== REPORT ==========
+
+def _latency_stats(samples_ms):
+    samples_ms = np.array(samples_ms)
+    return {
+        'mean_ms': round(float(samples_ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(samples_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(samples_ms, 95)), 3),
+    }
+
+
+def measure_latency(predict, pixels, runs=LATENCY_RUNS):
+    for _ in range(5):  # Warm-up
+        predict(pixels)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(pixels)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _latency_stats(samples)
+
+
+def torch_predict(model):
+    def predict(pixels):
+        tensor = torch.from_numpy((pixels.astype(np.float32) / 255.0 - MEAN) / STD).permute(2, 0, 1)[None]
+        with torch.no_grad():
+            return torch.softmax(model(tensor), dim=1)[0].numpy()
+    return predict
+
+
+def evaluate(predictors, eval_set):
+    """Top-1 accuracy of each predictor, plus top-1 agreement / max probability error against 'pytorch'."""
+    top1 = {name: [] for name in predictors}
+    probabilities = {name: [] for name in predictors}
+    targets = []
+    for path, label in eval_set:
+        pixels = load_image(path)
+        targets.append(label)
+        for name, predict in predictors.items():
+            probs = predict(pixels)
+            probabilities[name].append(probs)
+            top1[name].append(int(np.argmax(probs)))
+
+    targets = np.array(targets)
+    reference = np.array(top1['pytorch'])
+    report = {}
+    for name in predictors:
+        predicted = np.array(top1[name])
+        report[name] = {'top1_accuracy': round(100.0 * float((predicted == targets).mean()), 2)}
+        if name != 'pytorch':
+            report[name]['top1_agreement_with_pytorch'] = round(100.0 * float((predicted == reference).mean()), 2)
+            report[name]['max_probability_error'] = round(
+                float(np.abs(np.array(probabilities[name]) - np.array(probabilities['pytorch'])).max()), 5)
+    return report
+
+
+def export(model_dir, dataset_path=None, input_type='uint8', output_type='float32',
+           calibration_images=CALIBRATION_IMAGES, eval_images=EVAL_IMAGES, assets_dir=None):
+    model_dir = Path(model_dir)
+    model_path, checkpoint, labels, results = load_artifacts(model_dir)
+    dataset_path = dataset_path or results.get('dataset_path')
+    if not dataset_path:
+        raise ValueError('Training folder unknown: pass --dataset (training_results.json has no dataset_path)')
+
+    torch_model = build_torch_model(checkpoint, len(labels))
+    keras_model = to_keras(torch_model)
+
+    calibration_set = sample_images(dataset_path, labels, calibration_images)
+    eval_set = sample_images(dataset_path, labels, eval_images, seed=SEED + 1,
+                             exclude=frozenset(path for path, _ in calibration_set))
+    if not calibration_set:
+        raise ValueError(f'No images found in {dataset_path} for the classes in label_map.json')
+    logger.info(f"🎯 Representative dataset: {len(calibration_set)} images, evaluation: {len(eval_set)} images")
+
+    logger.info("🔄 Converting float reference model...")
+    float_model = convert_float(keras_model)
+    logger.info("🔄 Converting full-integer int8 model...")
+    int8_model = convert_int8(keras_model, [load_image(path) for path, _ in calibration_set],
+                              input_type, output_type)
+
+    float_path = model_dir / f'{model_dir.name}_float32.tflite'
+    int8_path = model_dir / f'{model_dir.name}_int8.tflite'
+    float_path.write_bytes(float_model)
+    int8_path.write_bytes(int8_model)
+    logger.info(f"✅ Saved {int8_path} ({len(int8_model) / 1e6:.2f} MB)")
+
+    torch.set_num_threads(LATENCY_THREADS)
+    float_runner = TFLiteClassifier(float_model)
+    int8_runner = TFLiteClassifier(int8_model)
+    predictors = {
+        'pytorch': torch_predict(torch_model),
+        'tflite_float32': float_runner.predict,
+        'tflite_int8': int8_runner.predict,
+    }
+
+    sample = load_image(calibration_set[0][0])
+    report = {
+        'model_name': model_dir.name,
+        'checkpoint': str(model_path),
+        'num_classes': len(labels),
+        'dataset_path': str(dataset_path),
+        'calibration_images': len(calibration_set),
+        'eval_images': len(eval_set),
+        'input': {
+            'shape': [int(d) for d in int8_runner.input['shape']],
+            'dtype': np.dtype(int8_runner.input['dtype']).name,
+            'quantization': [float(q) for q in int8_runner.input['quantization']],
+        },
+        'output': {
+            'shape': [int(d) for d in int8_runner.output['shape']],
+            'dtype': np.dtype(int8_runner.output['dtype']).name,
+            'quantization': [float(q) for q in int8_runner.output['quantization']],
+        },
+        'size_bytes': {
+            'pytorch_checkpoint': model_path.stat().st_size,
+            'tflite_float32': len(float_model),
+            'tflite_int8': len(int8_model),
+        },
+        'latency': {
+            'threads': LATENCY_THREADS,
+            'runs': LATENCY_RUNS,
+            **{name: measure_latency(predict, sample) for name, predict in predictors.items()},
+        },
+        'accuracy': evaluate(predictors, eval_set) if eval_set else {},
+        'created_at': datetime.now().isoformat(),
+    }
+
+    report_path = model_dir / 'tflite_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("=" * 60)
+    logger.info(f"TFLITE EXPORT: {model_dir.name}")
+    for name in predictors:
+        size = report['size_bytes']['pytorch_checkpoint' if name == 'pytorch' else name]
+        accuracy = report['accuracy'].get(name, {})
+        logger.info(f"  {name:<15} {size / 1e6:7.2f} MB | {report['latency'][name]['p50_ms']:8.2f} ms p50 | "
+                    f"top-1 {accuracy.get('top1_accuracy', float('nan')):6.2f}%"
+                    + (f" | agreement {accuracy['top1_agreement_with_pytorch']:.2f}%"
+                       if 'top1_agreement_with_pytorch' in accuracy else ''))
+    logger.info(f"  Report: {report_path}")
+    logger.info("=" * 60)
+
+    if assets_dir:
+        assets_dir = Path(assets_dir)
+        assets_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(int8_path, assets_dir / APP_MODEL_NAME)
+        with open(assets_dir / APP_LABELS_NAME, 'w') as f:
+            json.dump(labels, f, indent=2)
+        logger.info(f"📱 Installed {APP_MODEL_NAME} and {APP_LABELS_NAME} into {assets_dir}")
+
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export a trained plant classifier to full-integer TFLite")
+    parser.add_argument('model_dir', help="train_model output directory (<model>.pth + label_map.json)")
+    parser.add_argument('--dataset', help="Training folder (default: dataset_path from training_results.json)")
+    parser.add_argument('--input-type', choices=['uint8', 'int8'], default='uint8',
+                        help="Input tensor type (uint8: raw RGB pixels)")
+    parser.add_argument('--output-type', choices=sorted(IO_TYPES), default='float32',
+                        help="Output tensor type (float32: probabilities, as the app expects)")
+    parser.add_argument('--calibration-images', type=int, default=CALIBRATION_IMAGES)
+    parser.add_argument('--eval-images', type=int, default=EVAL_IMAGES)
+    parser.add_argument('--assets', metavar='DIR',
+                        help=f"Also install the int8 model and labels as {APP_MODEL_NAME} / {APP_LABELS_NAME} "
+                             f"(e.g. frontend/assets/model)")
+    args = parser.parse_args()
+
+    export(args.model_dir, args.dataset, args.input_type, args.output_type,
+           args.calibration_images, args.eval_images, args.assets)